@@ -0,0 +1,305 @@
+"""
+Ingest Benchmark - Measures the serial collection path of DataManager
+
+Feeds DataManager.start_real_collection() from a simulated Arduino, either an
+in-memory fake serial port (with a bounded input buffer like a real UART
+driver) or a pseudo-terminal opened through pyserial. Lines are replayed in
+the formats the sketches send:
+
+    json  - arduino/data_logger          {"timestamp":1234,"voltage":4.85,...}
+    vtc   - arduino/test_data_generator  V:4.85,C:1.23,T:24.5
+    csv   - bare CSV                     4.85,1.23,24.5
+
+and the report gives lines per second, end-to-end latency percentiles
+(line written -> stored in SQLite and CSV), dropped lines and CPU time per
+sample for the parse, DB and CSV stages.
+
+Example:
+    python benchmarks/ingest_benchmark.py --formats json vtc csv --rate 20 --lines 200
+    python benchmarks/ingest_benchmark.py --transport pty --rate 0 --output ingest_report.json
+    python benchmarks/ingest_benchmark.py --formats csv --rate 2000 --lines 20000 --raw-log
+"""
+
+import argparse
+import collections
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'python_app'))
+
+FORMATS = ('json', 'vtc', 'csv')
+
+# Stages timed inside the collector thread: DataManager method -> report name
+STAGES = {'parse_line': 'parse', 'store_data': 'db', 'store_csv_data': 'csv'}
+
+
+def make_line(fmt, millis):
+    """One reading in the given Arduino output format"""
+    voltage = random.uniform(3.0, 5.2)
+    current = random.uniform(0.1, 2.5)
+    temperature = random.uniform(18.0, 35.0)
+
+    if fmt == 'json':
+        return ('{"timestamp":%d,"voltage":%.2f,"current":%.2f,"temperature":%.1f,'
+                '"humidity":%.1f,"power":%.2f}' % (millis, voltage, current, temperature,
+                                                    random.uniform(30, 70), voltage * current))
+    if fmt == 'vtc':
+        return f"V:{voltage:.2f},C:{current:.2f},T:{temperature:.1f}"
+    return f"{voltage:.2f},{current:.2f},{temperature:.1f}"
+
+
+class FakeSerial:
+    """In-memory stand-in for serial.Serial with a bounded input buffer"""
+
+    def __init__(self, buffer_size=4096):
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    def feed(self, data):
+        """Arduino side: append bytes, dropping the line if the buffer is full"""
+        with self.lock:
+            if len(self.buffer) + len(data) > self.buffer_size:
+                self.dropped += 1
+                return False
+            self.buffer += data
+            return True
+
+    @property
+    def in_waiting(self):
+        with self.lock:
+            return len(self.buffer)
+
+    def readline(self):
+        with self.lock:
+            end = self.buffer.find(b'\n')
+            end = len(self.buffer) if end < 0 else end + 1
+            line = bytes(self.buffer[:end])
+            del self.buffer[:end]
+            return line
+
+    def close(self):
+        pass
+
+
+class PtySerial:
+    """Pseudo-terminal pair: the app reads through a real pyserial port"""
+
+    def __init__(self):
+        import pty
+        import serial
+        import tty
+
+        self.master, slave = pty.openpty()
+        tty.setraw(slave)
+        self.port = serial.Serial(os.ttyname(slave), 9600, timeout=1)
+        os.close(slave)
+        self.dropped = 0
+
+    def feed(self, data):
+        os.write(self.master, data)
+        return True
+
+    def close(self):
+        self.port.close()
+        os.close(self.master)
+
+
+class IngestProbe:
+    """Wraps DataManager stages to time them and track per-line latency"""
+
+    def __init__(self, data_manager):
+        self.sent_times = collections.deque()
+        self.current_sent = None
+        self.latencies = []
+        self.cpu = {name: [] for name in STAGES.values()}
+        self.parsed = 0
+        self.rejected = 0
+        self.stored = 0
+
+        for method, name in STAGES.items():
+            setattr(data_manager, method, self.timed(getattr(data_manager, method), name))
+        data_manager.process_data = self.track_latency(data_manager.process_data)
+
+    def timed(self, func, name):
+        samples = self.cpu[name]
+
+        def wrapper(*args, **kwargs):
+            if name == 'parse':
+                # Lines are read in order, so the oldest send time is this line's
+                self.current_sent = self.sent_times.popleft() if self.sent_times else None
+            start = time.thread_time()
+            result = func(*args, **kwargs)
+            samples.append(time.thread_time() - start)
+            if name == 'parse':
+                if result:
+                    self.parsed += 1
+                else:
+                    self.rejected += 1
+            return result
+        return wrapper
+
+    def track_latency(self, func):
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            if self.current_sent is not None:
+                self.latencies.append(time.perf_counter() - self.current_sent)
+            self.stored += 1
+            return result
+        return wrapper
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_format(fmt, transport, rate, lines, drain_timeout, buffer_size, raw_log=False):
+    """Replay `lines` readings in one format and measure the collector"""
+    from data.data_manager import DataManager
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ['IOT_MONITOR_DATA_DIR'] = data_dir
+        with contextlib.redirect_stdout(io.StringIO()):
+            data_manager = DataManager(demo_only=True, raw_log=raw_log)
+            data_manager.prepare_storage()
+        probe = IngestProbe(data_manager)
+
+        port = FakeSerial(buffer_size) if transport == 'fake' else PtySerial()
+        data_manager.serial_connection = port if transport == 'fake' else port.port
+        data_manager.is_collecting = True
+
+        collector_cpu = {}
+
+        def collect():
+            start = time.thread_time()
+            data_manager.start_real_collection()
+            collector_cpu['seconds'] = time.thread_time() - start
+
+        # The collector prints every sample; keep that cost but not the output
+        with contextlib.redirect_stdout(io.StringIO()):
+            collector = threading.Thread(target=collect, daemon=True)
+            collector.start()
+
+            interval = 1.0 / rate if rate > 0 else 0.0
+            start = time.perf_counter()
+            for i in range(lines):
+                if interval:
+                    delay = start + i * interval - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                data = (make_line(fmt, int((time.perf_counter() - start) * 1000)) + '\r\n').encode()
+                sent_at = time.perf_counter()
+                probe.sent_times.append(sent_at)
+                if not port.feed(data):
+                    probe.sent_times.pop()
+            send_seconds = time.perf_counter() - start
+
+            # Let the collector drain what is still buffered
+            deadline = time.perf_counter() + drain_timeout
+            while probe.stored + probe.rejected < lines - port.dropped and time.perf_counter() < deadline:
+                time.sleep(0.01)
+            elapsed = time.perf_counter() - start
+
+            data_manager.is_collecting = False
+            collector.join(timeout=2)
+            data_manager.close_raw_log()
+            port.close()
+
+    stored = probe.stored
+    unprocessed = lines - port.dropped - stored - probe.rejected
+    return {
+        'format': fmt,
+        'transport': transport,
+        'raw_log': raw_log,
+        'target_rate': rate,
+        'lines_sent': lines,
+        'send_seconds': round(send_seconds, 3),
+        'elapsed_seconds': round(elapsed, 3),
+        'lines_per_second': round(stored / elapsed, 2) if elapsed else None,
+        'stored': stored,
+        'dropped': {
+            'buffer_overflow': port.dropped,
+            'rejected_by_parser': probe.rejected,
+            'not_ingested_before_timeout': max(0, unprocessed)
+        },
+        'latency_ms': {
+            f'p{pct}': round(percentile(probe.latencies, pct) * 1000, 3) if probe.latencies else None
+            for pct in (50, 90, 99)
+        },
+        'cpu_us_per_sample': {
+            name: round(statistics.mean(samples) * 1e6, 1) if samples else None
+            for name, samples in probe.cpu.items()
+        },
+        'collector_cpu_us_per_sample': (round(collector_cpu['seconds'] / stored * 1e6, 1)
+                                        if stored and 'seconds' in collector_cpu else None)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the serial ingest path of DataManager")
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--transport', choices=['fake', 'pty'], default='fake')
+    parser.add_argument('--rate', type=float, default=10.0,
+                        help="lines per second sent by the simulated Arduino (0 = as fast as possible)")
+    parser.add_argument('--lines', type=int, default=100)
+    parser.add_argument('--drain-timeout', type=float, default=10.0,
+                        help="seconds to wait for buffered lines after sending stops")
+    parser.add_argument('--buffer-size', type=int, default=4096,
+                        help="fake serial input buffer in bytes (lines beyond it are dropped)")
+    parser.add_argument('--raw-log', action='store_true',
+                        help="store through the memory-mapped raw log (data/raw_log.py) instead of batches")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    if args.transport == 'pty' and sys.platform == 'win32':
+        parser.error("the pty transport needs a POSIX system")
+
+    random.seed(args.seed)
+    print(f"📡 Ingest benchmark: {args.lines} lines per format at "
+          f"{args.rate or 'max'} lines/s over {args.transport} serial")
+
+    results = []
+    for fmt in args.formats:
+        result = run_format(fmt, args.transport, args.rate, args.lines,
+                            args.drain_timeout, args.buffer_size, args.raw_log)
+        results.append(result)
+
+        dropped = sum(result['dropped'].values())
+        latency = result['latency_ms']
+        cpu = result['cpu_us_per_sample']
+        print(f"   {fmt:>4}: {result['lines_per_second']} lines/s, {result['stored']} stored, "
+              f"{dropped} dropped | latency p50 {latency['p50']}ms p99 {latency['p99']}ms | "
+              f"CPU/sample parse {cpu['parse']}us db {cpu['db']}us csv {cpu['csv']}us")
+
+    if args.output:
+        report = {
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'settings': vars(args),
+            'results': results
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
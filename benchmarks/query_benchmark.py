@@ -0,0 +1,278 @@
+"""
+Query Benchmark - Times history queries, Past Data and Predictions rendering at scale
+
+Builds synthetic databases (and matching daily CSV files) of each requested
+size with benchmarks/synthetic_data.py, in the monthly partitions the app
+writes (or --layout legacy for the old single table), then times:
+
+    history   DataManager.get_historical_data() for growing limits
+    past_data PastDataPage.to_dataframe(), update_statistics() and update_chart()
+    forecast  the PredictionsPage.generate_predictions() pipeline per model type:
+              scheduler training run, first full draw and a blitted refresh
+
+Pages are built without Tk: their figures are drawn on a plain Agg canvas.
+Results are written as JSON, and --history appends one line per run so scaling
+curves can be compared across versions.
+
+Example:
+    python benchmarks/query_benchmark.py --sizes 10000 100000 1000000 --output query_report.json
+    python benchmarks/query_benchmark.py --label v1.4 --history benchmarks/query_history.jsonl
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import matplotlib.pyplot as plt
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'python_app'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_data import LAYOUTS, generate_readings, write_database, write_csv
+
+HISTORY_LIMITS = (100, 1000, 10_000, 100_000, 1_000_000)
+STAT_VARS = ('voltage_avg_var', 'voltage_min_var', 'voltage_max_var',
+             'current_avg_var', 'current_min_var', 'current_max_var',
+             'temp_avg_var', 'temp_min_var', 'temp_max_var',
+             'record_count_var', 'avg_power_var', 'csv_info_var')
+
+
+class Var:
+    """Minimal stand-in for tk.StringVar on headless pages"""
+
+    def __init__(self, value=''):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+def timed(func, repeat):
+    """Median wall time of `repeat` calls in milliseconds, plus the last result"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 2), result
+
+
+def prepare_dataset(data_dir, rows, layout='partitions'):
+    """Create (once) a database and today's CSV with `rows` readings"""
+    size_dir = os.path.join(data_dir, f'rows_{rows}' if layout == 'partitions' else f'rows_{rows}_{layout}')
+    db_path = os.path.join(size_dir, 'sensor_data.db')
+    csv_path = os.path.join(size_dir, f"sensor_data_{datetime.now().strftime('%Y-%m-%d')}.csv")
+
+    if not os.path.exists(db_path) or not os.path.exists(csv_path):
+        os.makedirs(size_dir, exist_ok=True)
+        for path in (db_path, csv_path):
+            if os.path.exists(path):
+                os.remove(path)
+        start = time.perf_counter()
+        readings = generate_readings(rows)
+        write_database(db_path, readings, layout)
+        write_csv(csv_path, readings)
+        print(f"   generated {rows} rows in {time.perf_counter() - start:.1f}s")
+    return size_dir, db_path
+
+
+def headless_past_page(data_manager):
+    """PastDataPage with its real figure on an Agg canvas"""
+    from pages.past_data import PastDataPage
+
+    page = PastDataPage.__new__(PastDataPage)
+    page.data_manager = data_manager
+    page.frame = None
+    page.range_var = Var('50')
+    for name in STAT_VARS:
+        setattr(page, name, Var())
+    page.create_figure()
+    page.canvas = FigureCanvasAgg(page.fig)
+    return page
+
+
+def headless_predictions_page(data_manager, scheduler):
+    """PredictionsPage with its real figure on an Agg canvas"""
+    from pages.predictions import PredictionsPage
+    from prediction.engine import ForecastEngine
+
+    page = PredictionsPage.__new__(PredictionsPage)
+    page.data_manager = data_manager
+    page.scheduler = scheduler
+    page.pending_timer = None
+    page.frame = None
+    page.engine = ForecastEngine()
+    page.horizon_options = ["1", "5", "10", "15", "30", "60"]
+    page.predict_minutes_var = Var("10")
+    page.data_range_var = Var("100")
+    page.model_var = Var("Polynomial")
+    page.zoom_var = Var("Auto")
+    page.create_figure()
+    page.canvas = FigureCanvasAgg(page.fig)
+    page.background = None
+    page.background_bounds = None
+    page.canvas.mpl_connect('draw_event', page.on_chart_draw)
+    page.update_artist_colors()
+    return page
+
+
+def bench_history(data_manager, rows, repeat):
+    results = {}
+    for limit in HISTORY_LIMITS:
+        if limit > rows:
+            break
+        ms, _ = timed(lambda: data_manager.get_historical_data(limit), repeat)
+        results[str(limit)] = ms
+    # Whole table, like an export
+    ms, _ = timed(lambda: data_manager.get_historical_data(rows), repeat)
+    results['all'] = ms
+    return results
+
+
+def bench_past_data(data_manager, rows, repeat):
+    page = headless_past_page(data_manager)
+    results = {}
+    for limit in HISTORY_LIMITS:
+        if limit > rows:
+            break
+        data = data_manager.get_historical_data(limit)
+        to_df_ms, df = timed(lambda: page.to_dataframe(data), repeat)
+        stats_ms, _ = timed(lambda: page.update_statistics(df.copy()), repeat)
+        chart_ms, _ = timed(lambda: page.update_chart(df), repeat)
+        results[str(limit)] = {'to_dataframe': to_df_ms, 'statistics': stats_ms, 'chart': chart_ms}
+    plt.close(page.fig)
+    return results
+
+
+def bench_forecasts(data_manager, models, points, repeat):
+    from prediction.scheduler import ForecastScheduler
+
+    results = {}
+    for model_type in models:
+        for data_points in points:
+            scheduler = ForecastScheduler(data_manager.db_path)
+            page = headless_predictions_page(data_manager, scheduler)
+            page.model_var.set(model_type)
+            page.data_range_var.set(str(data_points))
+
+            horizons = [int(option) for option in page.horizon_options]
+            scheduler.request(model_type, data_points, horizons)
+            train_ms, _ = timed(scheduler.run_once, repeat)
+
+            # First call does a full draw, the next ones blit over the cached background
+            first_ms, _ = timed(page.generate_predictions, 1)
+            if page.last_xlim is None:
+                raise RuntimeError(f"{model_type} forecast was not drawn")
+            refresh_ms, _ = timed(page.generate_predictions, repeat)
+
+            results[f'{model_type}/{data_points}'] = {
+                'scheduler_run': train_ms,
+                'first_draw': first_ms,
+                'refresh': refresh_ms
+            }
+            plt.close(page.fig)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark history queries and page rendering on large databases")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--models', nargs='+', choices=["Linear", "Polynomial", "Advanced"],
+                        default=["Linear", "Polynomial", "Advanced"])
+    parser.add_argument('--prediction-points', type=int, nargs='+', default=[500, 10000],
+                        help="training windows to forecast with (10000 is the page's 'All')")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--layout', choices=LAYOUTS, default='partitions',
+                        help="storage layout of the generated databases")
+    parser.add_argument('--data-dir', default=None, help="keep generated databases here between runs")
+    parser.add_argument('--label', default=None, help="version label stored with the results")
+    parser.add_argument('--output', default='query_report.json')
+    parser.add_argument('--history', default=None, help="append a one-line summary to this JSONL file")
+    args = parser.parse_args(argv)
+
+    from data.data_manager import DataManager
+
+    # Import costs belong to the startup benchmark, not to the first timed call
+    import pandas  # noqa: F401
+    import sklearn.ensemble, sklearn.linear_model, sklearn.pipeline, sklearn.preprocessing  # noqa: E401,F401
+    warnings.filterwarnings('ignore', message='Glyph .* missing from font')
+
+    with contextlib.ExitStack() as stack:
+        data_dir = args.data_dir or stack.enter_context(tempfile.TemporaryDirectory())
+        results = {}
+        for rows in args.sizes:
+            print(f"📊 {rows} rows")
+            size_dir, db_path = prepare_dataset(data_dir, rows, args.layout)
+
+            # Page code prints status lines; keep them out of the report output
+            os.environ['IOT_MONITOR_DATA_DIR'] = size_dir
+            with contextlib.redirect_stdout(io.StringIO()):
+                data_manager = DataManager(db_path=db_path, demo_only=True)
+                result = {
+                    'history_ms': bench_history(data_manager, rows, args.repeat),
+                    'past_data_ms': bench_past_data(data_manager, rows, args.repeat),
+                    'forecast_ms': bench_forecasts(data_manager, args.models,
+                                                   args.prediction_points, args.repeat)
+                }
+            results[str(rows)] = result
+
+            for limit, ms in result['history_ms'].items():
+                past = result['past_data_ms'].get(limit)
+                line = f"   history[{limit}]: {ms}ms"
+                if past:
+                    line += (f" | to_dataframe {past['to_dataframe']}ms, statistics {past['statistics']}ms,"
+                             f" chart {past['chart']}ms")
+                print(line)
+            for selection, timing in result['forecast_ms'].items():
+                print(f"   forecast[{selection}]: scheduler {timing['scheduler_run']}ms, "
+                      f"first draw {timing['first_draw']}ms, refresh {timing['refresh']}ms")
+
+    report = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'label': args.label,
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'layout': args.layout,
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Report written to {args.output}")
+
+    if args.history:
+        with open(args.history, 'a') as f:
+            f.write(json.dumps(report) + '\n')
+        print(f"📈 Appended to {args.history}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
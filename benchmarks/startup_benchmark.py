@@ -0,0 +1,205 @@
+"""
+Startup Benchmark - Measures how long the dashboard takes to become usable
+
+Runs main_fixed.py headless (on $DISPLAY, or under xvfb-run when there is no
+display) and records the startup milestones reported by utils.startup_timer,
+including time to first live sample. Without any display it falls back to a
+Tk-free "stub" run that times the same stages minus the widgets. Every run also
+records a `python -X importtime` breakdown of the app's module imports.
+Runs use demo data and a throwaway data directory, so serial probing and
+existing databases do not skew the numbers.
+
+Example:
+    python benchmarks/startup_benchmark.py --runs 5 --output startup_report.json
+    python benchmarks/startup_benchmark.py --baseline startup_report.json --max-regression 20
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(PROJECT_ROOT, 'python_app')
+ENTRY_POINT = os.path.join(PROJECT_ROOT, 'main_fixed.py')
+
+# Milestone compared against the baseline to catch regressions
+KEY_MILESTONE = "first live sample"
+
+# Stub mode: the startup stages of main_fixed.py without any Tk widgets
+STUB_SCRIPT = r'''
+import sys, time, threading
+sys.path.insert(0, {app_dir!r})
+from utils.startup_timer import startup_timer
+from data.data_manager import DataManager
+from utils.theme_manager import theme_manager
+
+data_manager = DataManager()
+startup_timer.mark("data manager ready")
+threading.Thread(target=data_manager.start_collection, daemon=True).start()
+
+import matplotlib
+matplotlib.use("Agg")
+theme_manager.apply_theme()
+import matplotlib.pyplot as plt
+import pages.live_data
+plt.subplots(3, 1, figsize=(11, 7))
+startup_timer.mark("Live Data page built")
+
+while not data_manager.get_latest_data().get("timestamp"):
+    time.sleep(0.01)
+startup_timer.mark("first live sample")
+startup_timer.report()
+data_manager.stop_collection()
+'''
+
+
+def detect_mode(requested):
+    """Pick display, xvfb or stub mode"""
+    if requested != 'auto':
+        return requested
+    if os.environ.get('DISPLAY') or sys.platform == 'win32' or sys.platform == 'darwin':
+        return 'display'
+    if shutil.which('xvfb-run'):
+        return 'xvfb'
+    return 'stub'
+
+
+def run_once(mode, timeout):
+    """Launch the app once and return its startup milestones (seconds)"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        report_path = os.path.join(data_dir, 'startup.json')
+        env = dict(os.environ,
+                   IOT_MONITOR_DATA_DIR=data_dir,
+                   IOT_MONITOR_STARTUP_REPORT=report_path,
+                   IOT_MONITOR_EXIT_AFTER_STARTUP='1',
+                   IOT_MONITOR_DEMO_ONLY='1',
+                   PYTHONDONTWRITEBYTECODE='1')
+
+        if mode == 'stub':
+            command = [sys.executable, '-c', STUB_SCRIPT.format(app_dir=APP_DIR)]
+        else:
+            command = [sys.executable, ENTRY_POINT]
+            if mode == 'xvfb':
+                command = ['xvfb-run', '-a'] + command
+
+        start = time.perf_counter()
+        subprocess.run(command, env=env, cwd=PROJECT_ROOT, timeout=timeout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wall = time.perf_counter() - start
+
+        if not os.path.exists(report_path):
+            raise RuntimeError("app exited without writing a startup report")
+        with open(report_path) as f:
+            milestones = json.load(f)
+
+    milestones['process wall time'] = round(wall, 4)
+    return milestones
+
+
+def import_profile(top):
+    """Run `python -X importtime` on the app's imports; return the slowest modules"""
+    code = f"import sys; sys.path.insert(0, {APP_DIR!r}); import main"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=APP_DIR, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONDONTWRITEBYTECODE='1'))
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append({
+            'module': name.strip(),
+            'depth': (len(name) - len(name.lstrip())) // 2,
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000
+        })
+
+    total_ms = max((entry['cumulative_ms'] for entry in entries), default=0.0)
+    slowest = sorted(entries, key=lambda entry: entry['cumulative_ms'], reverse=True)[:top]
+    return {'total_ms': total_ms, 'slowest': slowest}
+
+
+def summarize(runs):
+    """Median and max of every milestone across runs"""
+    labels = sorted({label for run in runs for label in run})
+    summary = {}
+    for label in labels:
+        values = [run[label] for run in runs if label in run]
+        summary[label] = {'median': round(statistics.median(values), 4), 'max': round(max(values), 4)}
+    return summary
+
+
+def check_regression(report, baseline_path, max_regression):
+    """Return a failure message if the key milestone regressed past the threshold"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    before = baseline['summary'].get(KEY_MILESTONE, {}).get('median')
+    after = report['summary'].get(KEY_MILESTONE, {}).get('median')
+    if not before or after is None:
+        return None
+
+    change = (after - before) / before * 100
+    print(f"📈 '{KEY_MILESTONE}': {before:.3f}s -> {after:.3f}s ({change:+.1f}%)")
+    if change > max_regression:
+        return f"startup regressed by {change:.1f}% (limit {max_regression}%)"
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dashboard startup time")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--mode', choices=['auto', 'display', 'xvfb', 'stub'], default='auto')
+    parser.add_argument('--timeout', type=float, default=60.0, help="seconds per run")
+    parser.add_argument('--top', type=int, default=25, help="slowest imports to record")
+    parser.add_argument('--output', default='startup_report.json')
+    parser.add_argument('--baseline', default=None, help="earlier report to compare against")
+    parser.add_argument('--max-regression', type=float, default=20.0,
+                        help="allowed slowdown of time to first live sample, in percent")
+    args = parser.parse_args(argv)
+
+    mode = detect_mode(args.mode)
+    print(f"⏱️ Startup benchmark: {args.runs} run(s) in {mode} mode")
+
+    runs = []
+    for i in range(args.runs):
+        milestones = run_once(mode, args.timeout)
+        runs.append(milestones)
+        print(f"   run {i + 1}: first live sample after {milestones.get(KEY_MILESTONE, float('nan')):.3f}s")
+
+    report = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'mode': mode,
+        'runs': runs,
+        'summary': summarize(runs),
+        'imports': import_profile(args.top)
+    }
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Report written to {args.output}")
+
+    for label, stats in report['summary'].items():
+        print(f"   {stats['median']:7.3f}s (max {stats['max']:.3f}s)  {label}")
+    print(f"   {report['imports']['total_ms']:7.1f}ms  importing main (see report for breakdown)")
+
+    if args.baseline:
+        failure = check_regression(report, args.baseline, args.max_regression)
+        if failure:
+            print(f"✗ {failure}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,173 @@
+"""
+Synthetic Data - Builds large sensor_readings databases and CSV files
+
+Readings follow the demo-mode signal (slow voltage/current/temperature cycles
+plus noise, one sample per second by default) with a sprinkling of outliers so
+the cleaning code has something to do. Files use the same schema and CSV
+layout as DataManager: readings go to monthly partitions next to the database,
+finished months sealed (compressed, read-only) as the app leaves them, or with
+--layout legacy to the single sensor_readings table of older versions.
+
+Example:
+    python benchmarks/synthetic_data.py --rows 1000000 --db big.db --csv big.csv
+    python benchmarks/synthetic_data.py --rows 1000000 --db old.db --layout legacy
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'python_app'))
+
+# Rows written per executemany / CSV batch
+CHUNK_SIZE = 100_000
+
+# 'partitions': monthly files as DataManager writes them; 'legacy': one table in the main database
+LAYOUTS = ('partitions', 'legacy')
+
+
+def generate_readings(rows, start=None, interval_seconds=1.0, outlier_rate=0.001, seed=42):
+    """Vectorized synthetic readings ending now: (timestamps, voltage, current, temperature)"""
+    rng = np.random.default_rng(seed)
+    elapsed = np.arange(rows) * interval_seconds
+
+    if start is None:
+        # Local time, like the datetime.now() timestamps DataManager stores
+        start = np.datetime64(datetime.now(), 'us') - np.timedelta64(int(elapsed[-1] * 1e6) if rows else 0, 'us')
+    timestamps = np.datetime64(start, 'us') + (elapsed * 1e6).astype('timedelta64[us]')
+
+    # Same shape as DataManager.start_demo_mode()
+    voltage = 4.2 + 0.3 * np.sin(elapsed / 60) + rng.uniform(-0.2, 0.2, rows)
+    current = 1.0 + 0.4 * np.sin(elapsed / 45) + rng.uniform(-0.15, 0.15, rows)
+    temperature = 22.0 + 2.0 * np.sin(elapsed / 120) + rng.uniform(-0.5, 0.5, rows) + (current - 1.0) * 2
+
+    voltage = np.clip(voltage, 3.0, 5.2)
+    current = np.clip(current, 0.1, 2.5)
+    temperature = np.clip(temperature, 18.0, 35.0)
+
+    # Occasional sensor glitches
+    spikes = rng.random(rows) < outlier_rate
+    voltage[spikes] *= rng.uniform(1.5, 3.0, spikes.sum())
+
+    return timestamps, voltage, current, temperature
+
+
+def timestamp_strings(timestamps, with_microseconds=True):
+    """datetime64 array -> 'YYYY-MM-DD HH:MM:SS[.ffffff]' strings (str(datetime) format)"""
+    unit = 'us' if with_microseconds else 's'
+    return np.char.replace(np.datetime_as_string(timestamps, unit=unit), 'T', ' ')
+
+
+def reading_rows(readings, begin, end):
+    timestamps, voltage, current, temperature = readings
+    return zip(timestamp_strings(timestamps[begin:end]).tolist(),
+               voltage[begin:end].tolist(),
+               temperature[begin:end].tolist(),
+               current[begin:end].tolist())
+
+
+def write_database(db_path, readings, layout='partitions'):
+    """Append readings in the given storage layout (see LAYOUTS)"""
+    if layout == 'legacy':
+        write_legacy_table(db_path, readings)
+        return
+    from data.partitions import PartitionRouter
+
+    sqlite3.connect(db_path).close()  # The main database holds gaps, rollups and forecasts
+    router = PartitionRouter(db_path)
+    for begin in range(0, len(readings[0]), CHUNK_SIZE):
+        router.insert(list(reading_rows(readings, begin, begin + CHUNK_SIZE)))
+    # Finished months are sealed in the background; wait so every run measures the same files
+    if router.seal_thread:
+        router.seal_thread.join()
+    if router.active_key:
+        router.seal_before(router.active_key)
+
+
+def database_size(db_path):
+    """Bytes of the main database plus its real and demo partition files"""
+    from data.partitions import PartitionRouter
+
+    partitions = PartitionRouter(db_path, 'all').partitions()
+    return os.path.getsize(db_path) + sum(os.path.getsize(partition.path)
+                                          for partition in partitions if not partition.legacy)
+
+
+def write_legacy_table(db_path, readings):
+    """Append readings to a sensor_readings table in the main database (created if missing)"""
+    timestamps = readings[0]
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sensor_readings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                voltage REAL NOT NULL,
+                temperature REAL NOT NULL,
+                current REAL NOT NULL
+            )
+        ''')
+        for begin in range(0, len(timestamps), CHUNK_SIZE):
+            rows = reading_rows(readings, begin, begin + CHUNK_SIZE)
+            conn.executemany('''
+                INSERT INTO sensor_readings (timestamp, voltage, temperature, current)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def write_csv(csv_path, readings):
+    """Write readings in DataManager's daily CSV layout"""
+    timestamps, voltage, current, temperature = readings
+    with open(csv_path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['timestamp', 'voltage', 'current', 'temperature', 'power'])
+        for begin in range(0, len(timestamps), CHUNK_SIZE):
+            end = begin + CHUNK_SIZE
+            v, c, t = voltage[begin:end], current[begin:end], temperature[begin:end]
+            writer.writerows(zip(timestamp_strings(timestamps[begin:end], with_microseconds=False).tolist(),
+                                 np.char.mod('%.2f', v).tolist(),
+                                 np.char.mod('%.2f', c).tolist(),
+                                 np.char.mod('%.1f', t).tolist(),
+                                 np.char.mod('%.2f', v * c).tolist()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic sensor databases and CSV files")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--db', default=None, help="sensor_data.db to create or append to")
+    parser.add_argument('--csv', default=None, help="CSV file to write")
+    parser.add_argument('--interval', type=float, default=1.0, help="seconds between readings")
+    parser.add_argument('--outlier-rate', type=float, default=0.001)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--layout', choices=LAYOUTS, default='partitions',
+                        help="monthly partitions (as the app stores readings) or the old single table")
+    args = parser.parse_args(argv)
+
+    if not args.db and not args.csv:
+        parser.error("give --db and/or --csv")
+
+    start = time.perf_counter()
+    readings = generate_readings(args.rows, interval_seconds=args.interval,
+                                 outlier_rate=args.outlier_rate, seed=args.seed)
+    if args.db:
+        write_database(args.db, readings, args.layout)
+        print(f"🗄️ {args.rows} readings written to {args.db} ({args.layout}, "
+              f"{database_size(args.db) / 1e6:.1f} MB)")
+    if args.csv:
+        write_csv(args.csv, readings)
+        print(f"📄 {args.rows} readings written to {args.csv} ({os.path.getsize(args.csv) / 1e6:.1f} MB)")
+    print(f"⏱️ Generated in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,173 @@
+"""
+Headless Collector Service
+Runs DataManager ingest without Tk so collection continues with no display
+
+The dashboard attaches to a running collector as a read-only client (see
+data/collector_status.py) and receives readings from its live stream
+(data/live_stream.py). Stop with Ctrl+C or SIGTERM; pending readings are
+flushed before exit.
+
+Example:
+    python collector.py --port /dev/ttyUSB0 --batch-size 50 --flush-interval 2
+    python collector.py --demo --api-port 8750     # also serve data/api_server.py
+    python collector.py --raw-days 30 --rollup-days 365
+    python collector.py --raw-log --batch-size 5000   # high-rate capture (data/raw_log.py)
+"""
+
+import argparse
+import os
+import signal
+import sqlite3
+import threading
+from datetime import datetime
+
+from data.data_manager import DataManager, resolve_data_dir
+from data.collector_status import (read_collector_status, write_collector_status,
+                                   clear_collector_status)
+from data.api_server import ApiServer
+from data.retention import RetentionJob, env_days
+from utils.logger import log_manager, get_logger
+from utils.metrics import metrics
+
+logger = get_logger('collector')
+
+# Seconds between heartbeats (and time-based flush checks)
+HEARTBEAT_INTERVAL = 2.0
+
+
+class CollectorService:
+    def __init__(self, data_manager, heartbeat_interval=HEARTBEAT_INTERVAL):
+        self.data_manager = data_manager
+        self.heartbeat_interval = heartbeat_interval
+        self.stop_event = threading.Event()
+        self.started_at = datetime.now()
+        self.mode = "starting"
+        self.thread = None
+
+    def install_signal_handlers(self):
+        """Stop gracefully on Ctrl+C, SIGTERM (systemd, docker) and Ctrl+Break on Windows"""
+        for name in ('SIGINT', 'SIGTERM', 'SIGBREAK'):
+            if hasattr(signal, name):
+                signal.signal(getattr(signal, name), self.handle_signal)
+
+    def handle_signal(self, signum, frame):
+        logger.info("🛑 Received %s - shutting down", signal.Signals(signum).name)
+        self.stop_event.set()
+
+    def on_status(self, status, message):
+        self.mode = status
+
+    def enable_wal(self):
+        """WAL lets GUI clients read while the collector writes"""
+        conn = sqlite3.connect(self.data_manager.db_path)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+        finally:
+            conn.close()
+
+    def write_heartbeat(self):
+        write_collector_status(
+            self.data_manager.data_dir,
+            mode=self.mode,
+            port=self.data_manager.port,
+            db_path=self.data_manager.db_path,
+            started_at=self.started_at.isoformat(timespec='seconds'),
+            latest=self.data_manager.get_latest_data().get('timestamp')
+        )
+
+    def run(self):
+        """Collect until a stop signal arrives, then flush and exit"""
+        data_manager = self.data_manager
+        data_manager.register_status_callback(self.on_status)
+        self.enable_wal()
+        data_manager.start_publishing()
+        data_manager.create_shared_ring()
+
+        self.thread = threading.Thread(target=data_manager.start_collection, name='collection', daemon=True)
+        self.thread.start()
+        logger.info("🛰️ Collector running (pid %d) - batch %d, flush every %.1fs",
+                    os.getpid(), data_manager.batch_size, data_manager.flush_interval)
+
+        try:
+            while not self.stop_event.is_set():
+                # Time-based flush also covers pauses in the data stream
+                data_manager.flush_if_due()
+                self.write_heartbeat()
+                self.stop_event.wait(self.heartbeat_interval)
+        finally:
+            data_manager.stop_collection()
+            self.thread.join(timeout=5)
+            data_manager.flush()
+            clear_collector_status(data_manager.data_dir)
+            logger.info("✓ Collector stopped; pending readings flushed")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collect sensor data without the GUI")
+    parser.add_argument('--port', default='COM5', help="serial port (auto-detected if unavailable)")
+    parser.add_argument('--baudrate', type=int, default=9600)
+    parser.add_argument('--data-dir', default=None, help="IoT_Data directory (default: next to the app)")
+    parser.add_argument('--demo', action='store_true', help="generate demo data instead of reading serial")
+    parser.add_argument('--batch-size', type=int, default=50, help="readings per database transaction")
+    parser.add_argument('--flush-interval', type=float, default=2.0,
+                        help="seconds before a partial batch is written")
+    parser.add_argument('--raw-log', action='store_true', default=bool(os.environ.get('IOT_MONITOR_RAW_LOG')),
+                        help="append readings to a memory-mapped binary log, compacted into SQLite on flush")
+    parser.add_argument('--spike-filter', action='store_true',
+                        default=bool(os.environ.get('IOT_MONITOR_SPIKE_FILTER')),
+                        help="drop real readings that a rolling median/MAD filter flags as spikes")
+    parser.add_argument('--journal-sync', type=float, default=0.0,
+                        help="seconds between fsyncs of the ingest journal (0 = before every reading is queued)")
+    parser.add_argument('--api-port', type=int, default=None,
+                        help="also serve the HTTP/WebSocket API on this localhost port")
+    parser.add_argument('--raw-days', type=float, default=env_days('IOT_MONITOR_RAW_DAYS'),
+                        help="roll up and delete raw readings older than this (see data/retention.py)")
+    parser.add_argument('--rollup-days', type=float, default=env_days('IOT_MONITOR_ROLLUP_DAYS'),
+                        help="delete per-minute rollups older than this (default: keep)")
+    parser.add_argument('--force', action='store_true', help="start even if another collector looks alive")
+    args = parser.parse_args(argv)
+
+    if args.data_dir:
+        os.environ['IOT_MONITOR_DATA_DIR'] = args.data_dir
+    data_dir = resolve_data_dir()
+    os.makedirs(data_dir, exist_ok=True)
+
+    log_manager.setup(os.path.join(data_dir, 'logs'))
+    metrics.start_from_env()
+    try:
+        running = read_collector_status(data_dir)
+        if running and not args.force:
+            logger.error("✗ A collector is already running (pid %s); use --force to start anyway",
+                         running.get('pid'))
+            return 1
+
+        data_manager = DataManager(port=args.port, baudrate=args.baudrate, demo_only=args.demo or None,
+                                   batch_size=args.batch_size, flush_interval=args.flush_interval,
+                                   raw_log=args.raw_log, journal_sync=args.journal_sync,
+                                   spike_filter=args.spike_filter)
+        service = CollectorService(data_manager)
+        service.install_signal_handlers()
+
+        api_server = None
+        if args.api_port:
+            api_server = ApiServer(data_manager.db_path, data_manager.data_dir, port=args.api_port)
+            api_server.start()
+        retention_job = None
+        if args.raw_days:
+            retention_job = RetentionJob(data_manager.db_path, args.raw_days, args.rollup_days)
+            retention_job.start()
+        try:
+            service.run()
+        finally:
+            if retention_job:
+                retention_job.stop()
+            if api_server:
+                api_server.stop()
+        return 0
+    finally:
+        metrics.stop()
+        log_manager.shutdown()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
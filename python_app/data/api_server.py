@@ -0,0 +1,706 @@
+"""
+API Server - Local HTTP/WebSocket API over the sensor database
+
+Serves history, rollups and forecasts through read-only SQLite connections
+(readings via the monthly partitions in data/partitions.py), so dashboards and
+scripts share one query path instead of each opening the database next to the
+writer. Built on asyncio streams only.
+
+    GET /api/readings?start=&end=&limit=    raw readings in a time range
+    GET /api/rollups?start=&end=&bucket=60  avg/min/max per bucket (seconds)
+    GET /api/forecasts?model=&horizon=&points=&source_db=
+    GET /api/latest                         newest stored reading
+    WS  /ws/live                            every live reading as it arrives
+
+Reading endpoints return real readings; add ?source=demo or ?source=all for
+the demo generator's readings.
+
+Responses stream in pages (chunked) as JSON, CSV (?format=csv or Accept:
+text/csv) or Arrow IPC (?format=arrow, needs pyarrow). Every response carries
+an ETag derived from the version of the partitions it reads, so unchanged
+queries answer 304, and small responses are cached until their data changes -
+queries over sealed months stay cached while new readings arrive.
+
+Example:
+    python data/api_server.py --data-dir IoT_Data --port 8750
+"""
+
+import argparse
+import asyncio
+import base64
+import collections
+import csv
+import hashlib
+import heapq
+import importlib
+import itertools
+import io
+import json
+import os
+import sqlite3
+import struct
+import sys
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.metrics import metrics
+from utils.logger import get_logger
+from data.live_stream import stream_address
+from data.partitions import PartitionRouter, READ_SOURCES, merge_rollups
+from data.retention import load_rollups
+
+logger = get_logger('api')
+
+DEFAULT_API_PORT = 8750
+
+# Rows fetched per page while streaming a response
+PAGE_ROWS = 2000
+DEFAULT_LIMIT = 10000
+MAX_LIMIT = 1000000
+
+# Response cache: entries up to this size, least recently used evicted first
+CACHE_ENTRIES = 128
+CACHE_MAX_BODY = 1024 * 1024
+
+# Live readings queued per WebSocket client before it is dropped as too slow
+WEBSOCKET_QUEUE = 256
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+CONTENT_TYPES = {'json': 'application/json', 'csv': 'text/csv; charset=utf-8', 'arrow': ARROW_STREAM}
+READING_COLUMNS = ('timestamp', 'voltage', 'temperature', 'current')
+ROLLUP_COLUMNS = ('bucket', 'count',
+                  'voltage_avg', 'voltage_min', 'voltage_max',
+                  'temperature_avg', 'temperature_min', 'temperature_max',
+                  'current_avg', 'current_min', 'current_max')
+
+API_REQUESTS = metrics.counter('iot_api_requests_total', 'HTTP API requests served')
+API_NOT_MODIFIED = metrics.counter('iot_api_not_modified_total', 'API requests answered 304 from the ETag')
+API_CACHE_HITS = metrics.counter('iot_api_cache_hits_total', 'API responses served from the response cache')
+API_REQUEST_SECONDS = metrics.histogram('iot_api_request_seconds', 'Time to serve one HTTP API request')
+WEBSOCKET_CLIENTS = metrics.gauge('iot_api_websocket_clients', 'Connected live WebSocket clients')
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_time(value, name):
+    """ISO time parameter as the string form stored in SQLite"""
+    if value is None:
+        return None
+    try:
+        return str(datetime.fromisoformat(value))
+    except ValueError:
+        raise ApiError(400, f"{name} must be an ISO date/time, got {value!r}")
+
+
+def parse_int(value, name, default, minimum=1, maximum=None):
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer, got {value!r}")
+    if number < minimum or (maximum is not None and number > maximum):
+        raise ApiError(400, f"{name} must be between {minimum} and {maximum or 'unlimited'}")
+    return number
+
+
+def parse_source(value):
+    """Reading source parameter: real (default), demo or all"""
+    if value is None:
+        return 'real'
+    if value not in READ_SOURCES:
+        raise ApiError(400, f"source must be one of {', '.join(READ_SOURCES)}")
+    return value
+
+
+def choose_format(params, headers):
+    """Response format from ?format=, else the Accept header, else JSON"""
+    requested = params.get('format')
+    if requested is None:
+        accept = headers.get('accept', '')
+        requested = 'csv' if 'text/csv' in accept else 'arrow' if ARROW_STREAM in accept else 'json'
+    if requested not in CONTENT_TYPES:
+        raise ApiError(400, f"format must be one of {', '.join(CONTENT_TYPES)}")
+    return requested
+
+
+class ConnectionPool:
+    """Read-only SQLite connections reused across requests"""
+
+    def __init__(self, db_path, max_idle=4):
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self.idle = []
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+        # Used from executor threads, one request at a time
+        return sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True, check_same_thread=False)
+
+    def release(self, conn):
+        with self.lock:
+            if len(self.idle) < self.max_idle:
+                self.idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self.lock:
+            for conn in self.idle:
+                conn.close()
+            self.idle = []
+
+
+class ResponseCache:
+    """LRU of complete small response bodies keyed by ETag"""
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+
+    def get(self, etag):
+        entry = self.entries.get(etag)
+        if entry is not None:
+            self.entries.move_to_end(etag)
+        return entry
+
+    def put(self, etag, content_type, body):
+        self.entries[etag] = (content_type, body)
+        self.entries.move_to_end(etag)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+class RowEncoder:
+    """Turns pages of rows into response chunks for one output format"""
+
+    def __init__(self, fmt, columns):
+        self.fmt = fmt
+        self.columns = columns
+        self.rows_written = 0
+        self.arrow_writer = None
+        self.arrow_sink = None
+
+    def begin(self):
+        if self.fmt == 'json':
+            return b'['
+        if self.fmt == 'csv':
+            return self.csv_lines([self.columns])
+        return b''
+
+    def page(self, rows):
+        if self.fmt == 'json':
+            # One dumps call per page; strip its brackets to continue the array
+            body = json.dumps([dict(zip(self.columns, row)) for row in rows])[1:-1]
+            prefix = ',' if self.rows_written and rows else ''
+            self.rows_written += len(rows)
+            return (prefix + body).encode()
+        if self.fmt == 'csv':
+            return self.csv_lines(rows)
+        return self.arrow_page(rows)
+
+    def end(self):
+        if self.fmt == 'json':
+            return b']'
+        if self.fmt == 'arrow':
+            if self.arrow_writer is None:
+                self.arrow_page([])  # Empty result still needs a schema
+            self.arrow_writer.close()
+            return self.arrow_sink.drain()
+        return b''
+
+    def csv_lines(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(rows)
+        return buffer.getvalue().encode()
+
+    def arrow_page(self, rows):
+        import pyarrow as pa
+        columns = list(zip(*rows)) if rows else [[] for _ in self.columns]
+        batch = pa.RecordBatch.from_arrays([pa.array(values) for values in columns], names=list(self.columns))
+        if self.arrow_writer is None:
+            self.arrow_sink = ChunkSink()
+            self.arrow_writer = pa.ipc.new_stream(self.arrow_sink, batch.schema)
+        self.arrow_writer.write_batch(batch)
+        return self.arrow_sink.drain()
+
+
+class ChunkSink(io.RawIOBase):
+    """File-like sink the Arrow stream writer fills between drains"""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+class LiveRelay:
+    """One live stream subscription fanned out to every WebSocket client"""
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.clients = set()
+        self.task = None
+
+    def add(self):
+        queue = asyncio.Queue(WEBSOCKET_QUEUE)
+        self.clients.add(queue)
+        WEBSOCKET_CLIENTS.set(len(self.clients))
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self.relay())
+        return queue
+
+    def remove(self, queue):
+        self.clients.discard(queue)
+        WEBSOCKET_CLIENTS.set(len(self.clients))
+
+    def drop(self, queue):
+        """Disconnect a client that fell WEBSOCKET_QUEUE readings behind"""
+        self.remove(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    async def relay(self):
+        kind, target = stream_address(self.data_dir)
+        while self.clients:
+            try:
+                if kind == 'unix':
+                    reader, writer = await asyncio.open_unix_connection(target)
+                else:
+                    reader, writer = await asyncio.open_connection(*target)
+            except OSError:
+                await asyncio.sleep(2)  # Nothing publishing yet
+                continue
+
+            try:
+                while self.clients:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    # Already JSON; forwarded without decoding
+                    message = line.rstrip(b'\n')
+                    for queue in list(self.clients):
+                        try:
+                            queue.put_nowait(message)
+                        except asyncio.QueueFull:
+                            self.drop(queue)
+            finally:
+                writer.close()
+
+
+class ApiServer:
+    def __init__(self, db_path, data_dir, host='127.0.0.1', port=DEFAULT_API_PORT):
+        self.db_path = db_path
+        self.data_dir = data_dir
+        self.host = host
+        self.port = port
+        self.pool = ConnectionPool(db_path)
+        self.routers = {source: PartitionRouter(db_path, source) for source in READ_SOURCES}
+        self.cache = ResponseCache()
+        self.relay = LiveRelay(data_dir)
+        self.routes = {
+            '/api/readings': self.readings,
+            '/api/rollups': self.rollups,
+            '/api/forecasts': self.forecasts,
+            '/api/latest': self.latest
+        }
+        self.loop = None
+        self.server = None
+        self.thread = None
+
+    # --- database helpers (run in executor threads) ---
+
+    async def run_query(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    def data_version(self, start=None, end=None, source='real'):
+        """Changes whenever readings of `source` in [start, end) or forecasts are added"""
+        readings = self.routers[source].version(start, end)
+        conn = self.pool.acquire()
+        try:
+            try:
+                forecasts = conn.execute('SELECT MAX(id) FROM forecasts').fetchone()[0]
+            except sqlite3.OperationalError:
+                forecasts = None  # No forecasts table yet
+            return f'{readings}|{forecasts}'
+        finally:
+            self.pool.release(conn)
+
+    async def stream_rows(self, rows, encoder):
+        """Yield response chunks, pulling PAGE_ROWS rows at a time from a row iterator"""
+        try:
+            yield encoder.begin()
+            while True:
+                page = await self.run_query(list, itertools.islice(rows, PAGE_ROWS))
+                if not page:
+                    break
+                yield encoder.page(page)
+            yield encoder.end()
+        finally:
+            rows.close()  # Closes the partition connections
+
+    # --- endpoints: return (content_type, chunk iterator) ---
+
+    def time_range(self, params):
+        return parse_time(params.get('start'), 'start'), parse_time(params.get('end'), 'end')
+
+    def readings(self, params, fmt):
+        start, end = self.time_range(params)
+        limit = parse_int(params.get('limit'), 'limit', DEFAULT_LIMIT, maximum=MAX_LIMIT)
+        rows = self.routers[parse_source(params.get('source'))].select(start=start, end=end, limit=limit)
+        return self.stream_rows(rows, RowEncoder(fmt, READING_COLUMNS))
+
+    def rollups(self, params, fmt):
+        start, end = self.time_range(params)
+        bucket = parse_int(params.get('bucket'), 'bucket', 60, maximum=366 * 86400)
+        source = parse_source(params.get('source'))
+        return self.stream_rows(self.rollup_rows(source, start, end, bucket), RowEncoder(fmt, ROLLUP_COLUMNS))
+
+    def rollup_rows(self, source, start, end, bucket):
+        """Per-partition aggregates merged in bucket order
+
+        A bucket can straddle a month boundary (or the legacy table, or both
+        sources), so equal buckets from different partitions are combined by count.
+        Real readings that retention already deleted come from sensor_rollups
+        (demo readings are not rolled up).
+        """
+        router = self.routers[source]
+        streams = [router.rollups(partition, bucket, start, end) for partition in router.partitions(start, end)]
+        if source != 'demo':
+            streams.append(load_rollups(self.db_path, self.routers['real'], bucket, start, end))
+        merged = None
+        for row in heapq.merge(*streams):
+            if merged and merged[0] == row[0]:
+                merged = merge_rollups(merged, row)
+                continue
+            if merged:
+                yield merged
+            merged = row
+        if merged:
+            yield merged
+
+    def forecasts(self, params, fmt):
+        model = params.get('model', 'Polynomial')
+        horizon = parse_int(params.get('horizon'), 'horizon', 10)
+        points = parse_int(params.get('points'), 'points', None)
+        # Set for forecasts that forecast_cli --output-db wrote for another database
+        source_db = params.get('source_db')
+        return self.forecast_chunks(model, horizon, points, source_db, fmt)
+
+    async def forecast_chunks(self, model, horizon, points, source_db, fmt):
+        # The engine pulls in pandas; import it off the event loop
+        engine = await self.run_query(importlib.import_module, 'prediction.engine')
+        if model not in engine.MODEL_TYPES:
+            raise ApiError(400, f"model must be one of {', '.join(engine.MODEL_TYPES)}")
+        forecast = await self.run_query(engine.load_latest_forecast, self.db_path, model, horizon, points,
+                                        source_db)
+        if forecast is None:
+            raise ApiError(404, f"No stored {model} forecast for {horizon} minutes")
+
+        columns = ['step_time'] + [name for name in forecast if name != 'times']
+        rows = [
+            [str(step_time)] + [float(forecast[name][i]) for name in columns[1:]]
+            for i, step_time in enumerate(forecast['times'].to_pydatetime())
+        ]
+        encoder = RowEncoder(fmt, columns)
+        yield encoder.begin()
+        yield encoder.page(rows)
+        yield encoder.end()
+
+    def latest(self, params, fmt):
+        rows = self.routers[parse_source(params.get('source'))].select(descending=True, limit=1)
+        return self.stream_rows(rows, RowEncoder(fmt, READING_COLUMNS))
+
+    # --- HTTP ---
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                method, target, headers = request
+                if headers.get('upgrade', '').lower() == 'websocket':
+                    await self.handle_websocket(target, headers, reader, writer)
+                    break
+                keep_alive = await self.handle_request(method, target, headers, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception:
+            logger.exception("API connection error")
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise ConnectionError("request headers too large")
+
+        lines = head.decode('latin-1').split('\r\n')
+        parts = lines[0].split()
+        if len(parts) != 3:
+            raise ConnectionError("malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        return parts[0], parts[1], headers
+
+    async def handle_request(self, method, target, headers, writer):
+        """Serve one request; returns whether the connection stays open"""
+        API_REQUESTS.inc()
+        keep_alive = headers.get('connection', '').lower() != 'close'
+        url = urlsplit(target)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        with API_REQUEST_SECONDS.time():
+            try:
+                if method != 'GET':
+                    raise ApiError(405, "Only GET is supported")
+                if url.path == '/':
+                    body = json.dumps({'endpoints': sorted(self.routes) + ['/ws/live']}).encode()
+                    await self.send(writer, 200, 'application/json', body, keep_alive=keep_alive)
+                    return keep_alive
+                endpoint = self.routes.get(url.path)
+                if endpoint is None:
+                    raise ApiError(404, f"Unknown endpoint {url.path}")
+
+                fmt = choose_format(params, headers)
+                if fmt == 'arrow':
+                    try:
+                        import pyarrow  # noqa: F401
+                    except ImportError:
+                        raise ApiError(406, "Arrow output needs pyarrow (pip install pyarrow)")
+
+                # Readings outside the requested range do not change the ETag
+                version = await self.run_query(self.data_version, *self.time_range(params),
+                                               parse_source(params.get('source')))
+                key = f"{url.path}?{sorted(params.items())}|{fmt}|{version}"
+                etag = '"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+                extra = {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+                if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+                    API_NOT_MODIFIED.inc()
+                    await self.send(writer, 304, None, b'', extra, keep_alive)
+                    return keep_alive
+
+                cached = self.cache.get(etag)
+                if cached:
+                    API_CACHE_HITS.inc()
+                    await self.send(writer, 200, cached[0], cached[1], extra, keep_alive)
+                    return keep_alive
+
+                chunks = endpoint(params, fmt)
+                try:
+                    first = await chunks.__anext__()  # Surface query errors before the 200 goes out
+                    try:
+                        await self.send_stream(writer, CONTENT_TYPES[fmt], first, chunks, etag, extra, keep_alive)
+                    except (ApiError, sqlite3.Error, ValueError) as e:
+                        # The 200 and part of the body are out; another response would land inside
+                        # the chunked body, so end the connection and let the client see it cut short
+                        logger.warning("API response to %s aborted mid-stream: %s", url.path, e)
+                        writer.close()
+                        return False
+                finally:
+                    await chunks.aclose()  # Returns the connection even if the client went away
+            except ApiError as e:
+                body = json.dumps({'error': str(e)}).encode()
+                await self.send(writer, e.status, 'application/json', body, keep_alive=keep_alive)
+            except (sqlite3.Error, ValueError) as e:
+                # ValueError: a compressed partition that cannot be decoded
+                logger.warning("API query failed: %s", e)
+                body = json.dumps({'error': f"database error: {e}"}).encode()
+                await self.send(writer, 503, 'application/json', body, keep_alive=keep_alive)
+        return keep_alive
+
+    async def send(self, writer, status, content_type, body, extra=None, keep_alive=True):
+        headers = {'Content-Length': str(len(body))}
+        if content_type:
+            headers['Content-Type'] = content_type
+        headers.update(extra or {})
+        writer.write(self.status_head(status, headers, keep_alive) + body)
+        await writer.drain()
+
+    async def send_stream(self, writer, content_type, first, chunks, etag, extra, keep_alive):
+        """Chunked response; kept in the cache if it turns out small"""
+        headers = dict(extra, **{'Content-Type': content_type, 'Transfer-Encoding': 'chunked'})
+        writer.write(self.status_head(200, headers, keep_alive))
+
+        body, size = [], 0
+        async def write_chunk(chunk):
+            nonlocal size
+            if not chunk:
+                return
+            writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            await writer.drain()
+            if size <= CACHE_MAX_BODY:
+                body.append(chunk)
+                size += len(chunk)
+
+        await write_chunk(first)
+        async for chunk in chunks:
+            await write_chunk(chunk)
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+        if size <= CACHE_MAX_BODY:
+            self.cache.put(etag, content_type, b''.join(body))
+
+    def status_head(self, status, headers, keep_alive):
+        reasons = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+                   405: 'Method Not Allowed', 406: 'Not Acceptable', 503: 'Service Unavailable'}
+        lines = [f'HTTP/1.1 {status} {reasons.get(status, "")}']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    # --- WebSocket (RFC 6455, server side) ---
+
+    async def handle_websocket(self, target, headers, reader, writer):
+        if urlsplit(target).path != '/ws/live' or 'sec-websocket-key' not in headers:
+            await self.send(writer, 404, 'application/json', b'{"error": "Unknown endpoint"}', keep_alive=False)
+            return
+
+        accept = base64.b64encode(hashlib.sha1((headers['sec-websocket-key'] + WEBSOCKET_GUID).encode()).digest())
+        writer.write(b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                     b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+        await writer.drain()
+
+        queue = self.relay.add()
+        sender = asyncio.ensure_future(self.websocket_send(queue, writer))
+        try:
+            await self.websocket_receive(reader, writer)
+        finally:
+            self.relay.remove(queue)
+            sender.cancel()
+
+    async def websocket_send(self, queue, writer):
+        while True:
+            message = await queue.get()
+            if message is None:
+                # Fell behind: close with 1008 (policy violation)
+                writer.write(self.websocket_frame(0x8, struct.pack('!H', 1008)))
+                await writer.drain()
+                writer.close()
+                return
+            writer.write(self.websocket_frame(0x1, message))
+            await writer.drain()
+
+    async def websocket_receive(self, reader, writer):
+        """Answer pings and close frames until the client goes away"""
+        while True:
+            header = await reader.readexactly(2)
+            opcode, length = header[0] & 0x0F, header[1] & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', await reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', await reader.readexactly(8))[0]
+            mask = await reader.readexactly(4) if header[1] & 0x80 else b'\0\0\0\0'
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(await reader.readexactly(length)))
+
+            if opcode == 0x8:
+                writer.write(self.websocket_frame(0x8, payload[:2]))
+                await writer.drain()
+                return
+            if opcode == 0x9:
+                writer.write(self.websocket_frame(0xA, payload))
+                await writer.drain()
+
+    @staticmethod
+    def websocket_frame(opcode, payload):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+        return header + payload
+
+    # --- lifecycle ---
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        logger.info("🌐 API: http://%s:%d/api/readings (live: ws://%s:%d/ws/live)",
+                    self.host, self.port, self.host, self.port)
+        async with self.server:
+            try:
+                await self.server.serve_forever()
+            except asyncio.CancelledError:
+                pass  # stop() closed the server
+
+    def start(self):
+        """Serve from a daemon thread (embedded in the collector or GUI)"""
+        self.thread = threading.Thread(target=asyncio.run, args=(self.serve(),), name='api', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.loop and self.server:
+            self.loop.call_soon_threadsafe(self.server.close)
+        if self.thread:
+            self.thread.join(timeout=2)
+        self.pool.close()
+
+
+def main(argv=None):
+    from data.data_manager import resolve_data_dir
+    from utils.logger import log_manager
+
+    parser = argparse.ArgumentParser(description="Serve sensor history and live readings over HTTP")
+    parser.add_argument('--data-dir', default=None, help="IoT_Data directory (default: next to the app)")
+    parser.add_argument('--db', default=None, help="database path (default: <data-dir>/sensor_data.db)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_API_PORT)
+    args = parser.parse_args(argv)
+
+    data_dir = args.data_dir or resolve_data_dir()
+    db_path = args.db or os.path.join(data_dir, 'sensor_data.db')
+    if not os.path.exists(db_path):
+        print(f"❌ Database not found: {db_path}", file=sys.stderr)
+        return 1
+
+    log_manager.setup(os.path.join(data_dir, 'logs'))
+    server = ApiServer(db_path, data_dir, args.host, args.port)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        logger.error("❌ Could not listen on %s:%d: %s", args.host, args.port, e)
+        return 1
+    finally:
+        server.pool.close()
+        log_manager.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
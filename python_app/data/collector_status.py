@@ -0,0 +1,51 @@
+"""
+Collector Status - Heartbeat file shared by the collector service and GUI clients
+
+The collector rewrites IoT_Data/collector.json every few seconds. A GUI that
+finds a fresh heartbeat attaches as a read-only client instead of opening the
+serial port itself.
+"""
+
+import json
+import os
+import time
+
+STATUS_FILE = 'collector.json'
+
+# A heartbeat older than this means the collector is gone
+STALE_AFTER_SECONDS = 15.0
+
+
+def status_path(data_dir):
+    return os.path.join(data_dir, STATUS_FILE)
+
+
+def write_collector_status(data_dir, **fields):
+    """Atomically write the collector heartbeat (pid, mode, counters, ...)"""
+    status = dict(fields, pid=os.getpid(), heartbeat=time.time())
+    path = status_path(data_dir)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(status, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def read_collector_status(data_dir, max_age=STALE_AFTER_SECONDS):
+    """The running collector's status, or None if there is no fresh heartbeat"""
+    try:
+        with open(status_path(data_dir)) as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if time.time() - status.get('heartbeat', 0) > max_age:
+        return None
+    return status
+
+
+def clear_collector_status(data_dir):
+    """Remove the heartbeat on clean shutdown"""
+    try:
+        os.remove(status_path(data_dir))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,273 @@
+"""
+Compression - Lossless chunk encoding for sealed months of readings
+
+When a month is sealed (data/partitions.py) its rows are rewritten into
+reading_chunks, CHUNK_ROWS readings per row, and the raw table is dropped:
+
+    timestamps   microseconds, delta-of-delta
+    channels     scaled integers, delta-encoded, when no value has more than
+                 MAX_DECIMALS decimals (Arduino readings); otherwise the XOR
+                 of consecutive float64 bit patterns (Gorilla)
+
+Each stream is zigzagged, packed at the narrowest whole-byte width and
+deflated, so decoding is a few vectorized NumPy operations per chunk (cumsum,
+bitwise_xor.accumulate) instead of a bit-by-bit loop. Every chunk is checked
+to round-trip exactly before the raw rows are dropped.
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+from data.partitions import init_reading_table, merge_rollups
+
+# Readings per chunk row
+CHUNK_ROWS = 4096
+
+# Largest decimal scale tried before falling back to XOR encoding
+MAX_DECIMALS = 6
+
+CODEC_DELTA = 0      # scaled integers, delta-encoded (param = decimals)
+CODEC_XOR = 1        # float64 bits XOR the previous value
+HEADER = struct.Struct('<BBB')  # codec, param, byte width
+
+EPOCH = np.datetime64('1970-01-01T00:00:00', 'us')
+
+
+def init_chunk_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS reading_chunks (
+            chunk INTEGER PRIMARY KEY,
+            first_us INTEGER NOT NULL,
+            last_us INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            timestamps BLOB NOT NULL,
+            voltage BLOB NOT NULL,
+            temperature BLOB NOT NULL,
+            current BLOB NOT NULL
+        )
+    ''')
+
+
+def is_compacted(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'reading_chunks'").fetchone() is not None
+
+
+# --- timestamps as stored ('YYYY-MM-DD HH:MM:SS[.ffffff]', local time) <-> microseconds ---
+
+def to_microseconds(timestamps):
+    return np.array(timestamps, dtype='datetime64[us]').astype(np.int64)
+
+
+def to_timestamp_strings(microseconds):
+    """Stored form: str(datetime) omits the fraction on whole seconds
+
+    Digits are written straight into a UCS4 buffer; np.datetime_as_string on
+    every reading was most of the cost of a row scan.
+    """
+    seconds, fraction = np.divmod(microseconds, 1000000)
+    days, clock = np.divmod(seconds, 86400)
+    unique_days, day_index = np.unique(days, return_inverse=True)
+    dates = np.datetime_as_string(unique_days.astype('datetime64[D]')).astype('U10')
+    wide = bool(fraction.any())
+    text = np.empty((len(microseconds), 26 if wide else 19), dtype=np.uint32)
+    text[:, :10] = dates.view(np.uint32).reshape(-1, 10)[day_index]
+    text[:, 10] = ord(' ')
+    text[:, 13] = text[:, 16] = ord(':')
+    for offset, value in ((11, clock // 3600), (14, clock // 60 % 60), (17, clock % 60)):
+        text[:, offset] = value // 10 + ord('0')
+        text[:, offset + 1] = value % 10 + ord('0')
+    if not wide:
+        return text.view('U19').ravel()
+    text[:, 19] = ord('.')
+    for digit in range(6):
+        text[:, 25 - digit] = fraction // 10 ** digit % 10 + ord('0')
+    text = text.view('U26').ravel()
+    return np.where(fraction == 0, text.astype('U19'), text)
+
+
+def bound_microseconds(timestamp):
+    """Query bound (stored timestamp string) as microseconds, or None"""
+    if timestamp is None:
+        return None
+    return int((np.datetime64(timestamp, 'us') - EPOCH).astype(np.int64))
+
+
+# --- integer streams ---
+
+def pack(values):
+    """Zigzag int64 values, store at the narrowest width, deflate"""
+    unsigned = ((values << 1) ^ (values >> 63)).astype(np.uint64)
+    largest = int(unsigned.max()) if len(unsigned) else 0
+    width = next(width for width in (1, 2, 4, 8) if largest < 1 << (8 * width))
+    return width, zlib.compress(unsigned.astype(f'<u{width}').tobytes(), 6)
+
+
+def unpack(width, payload):
+    unsigned = np.frombuffer(zlib.decompress(payload), dtype=f'<u{width}').astype(np.uint64)
+    # Shift as unsigned: XOR residues can use all 64 bits
+    return (unsigned >> np.uint64(1)).view(np.int64) ^ -(unsigned & np.uint64(1)).view(np.int64)
+
+
+def encode_timestamps(microseconds):
+    deltas = np.diff(microseconds)
+    width, payload = pack(np.diff(deltas, prepend=0))
+    return HEADER.pack(CODEC_DELTA, 0, width) + payload
+
+
+def decode_timestamps(first, blob):
+    _, _, width = HEADER.unpack_from(blob)
+    deltas = np.cumsum(unpack(width, blob[HEADER.size:]))
+    return first + np.concatenate(([0], np.cumsum(deltas)))
+
+
+def encode_channel(values):
+    for decimals in range(MAX_DECIMALS + 1):
+        scaled = np.round(values * 10.0 ** decimals)
+        if np.abs(scaled).max(initial=0) < 2 ** 53 and np.array_equal(scaled / 10.0 ** decimals, values):
+            width, payload = pack(np.diff(scaled.astype(np.int64), prepend=0))
+            return HEADER.pack(CODEC_DELTA, decimals, width) + payload
+
+    bits = values.view(np.int64)
+    width, payload = pack(bits ^ np.concatenate(([0], bits[:-1])))
+    return HEADER.pack(CODEC_XOR, 0, width) + payload
+
+
+def decode_channel(blob):
+    codec, decimals, width = HEADER.unpack_from(blob)
+    values = unpack(width, blob[HEADER.size:])
+    if codec == CODEC_DELTA:
+        return np.cumsum(values) / 10.0 ** decimals
+    return np.bitwise_xor.accumulate(values).view(np.float64)
+
+
+# --- chunks ---
+
+def encode_chunk(rows):
+    """(timestamp, voltage, temperature, current) rows -> reading_chunks values
+
+    Raises ValueError if the chunk would not decode to exactly the same rows.
+    """
+    timestamps = [row[0] for row in rows]
+    microseconds = to_microseconds(timestamps)
+    channels = [np.array([row[i] for row in rows], dtype=np.float64) for i in (1, 2, 3)]
+    record = (int(microseconds[0]), int(microseconds[-1]), len(rows),
+              encode_timestamps(microseconds), *(encode_channel(values) for values in channels))
+
+    decoded = decode_chunk(record[0], *record[3:])
+    if decoded[0].tolist() != timestamps or not all(
+            np.array_equal(a, b) for a, b in zip(decoded[1:], channels)):
+        raise ValueError(f"chunk starting {timestamps[0]} does not round-trip")
+    return record
+
+
+def decode_chunk(first_us, timestamps, voltage, temperature, current, strings=True):
+    """Arrays (timestamps, voltage, temperature, current) of one chunk"""
+    microseconds = decode_timestamps(first_us, timestamps)
+    return (to_timestamp_strings(microseconds) if strings else microseconds,
+            decode_channel(voltage), decode_channel(temperature), decode_channel(current))
+
+
+def decode_range(conn, start=None, end=None, descending=False, strings=True):
+    """Yield decoded chunk arrays for [start, end) in time order"""
+    start_us, end_us = bound_microseconds(start), bound_microseconds(end)
+    clauses, args = [], []
+    if start_us is not None:
+        clauses.append('last_us >= ?')
+        args.append(start_us)
+    if end_us is not None:
+        clauses.append('first_us < ?')
+        args.append(end_us)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    order = 'DESC' if descending else 'ASC'
+
+    for record in conn.execute(f'''
+        SELECT first_us, timestamps, voltage, temperature, current
+        FROM reading_chunks {where}
+        ORDER BY chunk {order}
+    ''', args):
+        microseconds = decode_timestamps(record[0], record[1])
+        keep = np.ones(len(microseconds), dtype=bool)
+        if start_us is not None:
+            keep &= microseconds >= start_us
+        if end_us is not None:
+            keep &= microseconds < end_us
+        arrays = [microseconds] + [decode_channel(blob) for blob in record[2:]]
+        arrays = [array[keep] for array in arrays]
+        if descending:
+            arrays = [array[::-1] for array in arrays]
+        if strings:
+            arrays[0] = to_timestamp_strings(arrays[0])
+        yield arrays
+
+
+def chunk_rows(conn, start=None, end=None, descending=False):
+    """Rows like SELECT timestamp, voltage, temperature, current ORDER BY timestamp"""
+    for arrays in decode_range(conn, start, end, descending):
+        yield from zip(*(array.tolist() for array in arrays))
+
+
+def aggregate(conn, bucket_seconds, start=None, end=None):
+    """Rollup rows (bucket, count, avg/min/max per channel) of the chunks in [start, end)"""
+    rows = []
+    for microseconds, *channels in decode_range(conn, start, end, strings=False):
+        if not len(microseconds):
+            continue
+        buckets = microseconds // (bucket_seconds * 1000000)
+        starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+        counts = np.diff(np.append(starts, len(buckets)))
+        bucket_times = np.datetime_as_string((buckets[starts] * bucket_seconds).astype('datetime64[s]'))
+        columns = [np.char.replace(bucket_times, 'T', ' '), counts]
+        for values in channels:
+            columns += [np.add.reduceat(values, starts) / counts,
+                        np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts)]
+        chunk = list(zip(*(column.tolist() for column in columns)))
+        # A bucket cut by a chunk boundary is merged with its other part
+        if rows and chunk and rows[-1][0] == chunk[0][0]:
+            rows[-1] = merge_rollups(rows[-1], chunk.pop(0))
+        rows.extend(chunk)
+    return rows
+
+
+def compact(conn, chunk_rows=CHUNK_ROWS):
+    """Rewrite sensor_readings as reading_chunks in one transaction; returns readings compacted
+
+    `conn` must be in autocommit mode. Raises ValueError (leaving the rows as
+    they were) if any chunk would not round-trip exactly.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        init_chunk_table(conn)
+        compacted = 0
+        cursor = conn.execute('SELECT timestamp, voltage, temperature, current FROM sensor_readings '
+                              'ORDER BY timestamp, id')
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            conn.execute('INSERT INTO reading_chunks (first_us, last_us, count, timestamps, voltage, '
+                         'temperature, current) VALUES (?, ?, ?, ?, ?, ?, ?)', encode_chunk(rows))
+            compacted += len(rows)
+        conn.execute('DROP TABLE sensor_readings')
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('VACUUM')  # Give the raw table's pages back
+    return compacted
+
+
+def expand(conn):
+    """Turn reading_chunks back into sensor_readings rows (before writing to a sealed month)"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        init_reading_table(conn)
+        for arrays in decode_range(conn):
+            conn.executemany('INSERT INTO sensor_readings (timestamp, voltage, temperature, current) '
+                             'VALUES (?, ?, ?, ?)', zip(*(array.tolist() for array in arrays)))
+        conn.execute('DROP TABLE reading_chunks')
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
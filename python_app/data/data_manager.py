@@ -7,17 +7,98 @@ import json
 import sqlite3
 import threading
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.metrics import metrics
+from utils.logger import get_logger, ActivitySummary
+from data.collector_status import read_collector_status
+from data.live_stream import StreamPublisher, stream_address, subscribe
+from data.partitions import PartitionRouter
+from data.journal import IngestJournal, journal_path, SINK_DB, SINK_CSV, DEMO
+from data.ingest_index import IngestIndex, init_gaps_table, load_gaps, purge_gaps
+from data.retention import load_rollups
+from utils.data_cleaning import RollingMADFilter
+
+logger = get_logger('data')
+
+# One aggregated line per minute instead of a print per reading
+activity = ActivitySummary(logger)
+
+# Ingest metrics (no-ops unless metrics are enabled)
+LINES_READ = metrics.counter('iot_serial_lines_read_total', 'Lines read from the serial port')
+PARSE_FAILURES = metrics.counter('iot_parse_failures_total', 'Serial lines that could not be parsed')
+SERIAL_QUEUE_BYTES = metrics.gauge('iot_serial_queue_bytes', 'Bytes waiting in the serial input buffer')
+SAMPLES_STORED = metrics.counter('iot_samples_stored_total', 'Readings written to the database')
+DB_COMMIT_SECONDS = metrics.histogram('iot_db_commit_seconds', 'Time to insert and commit one batch of readings')
+CSV_WRITE_SECONDS = metrics.histogram('iot_csv_write_seconds', 'Time to append one batch of readings to the CSV file')
+SPIKES_DROPPED = metrics.counter('iot_spikes_dropped_total', 'Real readings dropped by the spike filter')
+
+# Live-stream readings a GUI client accepts while the collector's ring head stands still
+# before re-attaching the ring (the collector restarted and created a new one)
+RING_STALL_READINGS = 5
+
+CSV_HEADER = ['timestamp', 'voltage', 'current', 'temperature', 'power']
+
+def resolve_data_dir():
+    """IoT_Data directory for databases, CSV files and logs"""
+    # Overridable for benchmarks and headless installs
+    if os.environ.get('IOT_MONITOR_DATA_DIR'):
+        return os.environ['IOT_MONITOR_DATA_DIR']
+    
+    # Get the directory where the executable or script is located
+    if hasattr(sys, '_MEIPASS'):
+        # Running as PyInstaller bundle - use directory where .exe is located
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        # Running as script - use current directory
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        base_dir = os.path.join(base_dir, '..')  # Go up to project root
+    return os.path.join(base_dir, 'IoT_Data')
 
 class DataManager:
-    def __init__(self, port='COM5', baudrate=9600, db_path=None):
+    def __init__(self, port='COM5', baudrate=9600, db_path=None, demo_only=None,
+                 batch_size=1, flush_interval=0.0, raw_log=None, journal=None, journal_sync=0.0,
+                 spike_filter=None):
+        import os
+        
         self.port = port
         self.baudrate = baudrate
+        # Demo-only mode never probes serial ports (benchmarks, demos without hardware)
+        if demo_only is None:
+            demo_only = bool(os.environ.get('IOT_MONITOR_DEMO_ONLY'))
+        self.demo_only = demo_only
         self.serial_connection = None
         self.is_collecting = False
         self.latest_data = {'voltage': 0.0, 'temperature': 0.0, 'current': 0.0, 'timestamp': None}
         self.status_callback = None
+        self.read_only = False
+        self.publisher = None
+        self.ring = None
+        self.ring_owner = None  # (pid, started_at) of the collector whose ring is mapped
+        self.ring_head = None
+        self.ring_stalls = 0
+        self.raw_log = None
+        self.compactor = None
+        self.compactor_stop = threading.Event()
+        self.journal = None
+        self.journal_seq = 0
+        self.unmarked_sinks = set()  # Sinks whose failed rows were re-queued, unmarked until stored
+        self.ingest_index = IngestIndex()
+        
+        # Readings are buffered and written once `batch_size` are pending or
+        # `flush_interval` seconds have passed (1 / 0 = write every reading)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.pending_db_rows = []
+        self.pending_demo_rows = []
+        self.pending_csv_rows = []
+        self.pending_gaps = []
+        self.pending_lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.last_flush = time.monotonic()
         
         # Set up proper paths for executable
         self.setup_data_paths(db_path)
@@ -25,23 +106,30 @@ class DataManager:
         # Initialize database and CSV storage
         self.init_database()
         self.init_csv_storage()
+        
+        # High-rate capture: readings go to a memory-mapped binary log and are
+        # compacted into SQLite every flush interval by a background thread
+        if raw_log is None:
+            raw_log = bool(os.environ.get('IOT_MONITOR_RAW_LOG'))
+        self.use_raw_log = raw_log
+        
+        # Batched readings are journaled first so a crash cannot lose them
+        if journal is None:
+            journal = self.batch_size > 1 or flush_interval > 0
+        self.use_journal = journal
+        self.journal_sync = journal_sync
+        
+        # Optional rolling median/MAD filter that drops single-reading spikes of real data
+        if spike_filter is None:
+            spike_filter = bool(os.environ.get('IOT_MONITOR_SPIKE_FILTER'))
+        self.spike_filter = RollingMADFilter() if spike_filter else None
     
     def setup_data_paths(self, db_path=None):
         """Setup proper data paths for both script and executable modes"""
         import os
-        import sys
-        
-        # Get the directory where the executable or script is located
-        if hasattr(sys, '_MEIPASS'):
-            # Running as PyInstaller bundle - use directory where .exe is located
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            # Running as script - use current directory
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            base_dir = os.path.join(base_dir, '..')  # Go up to project root
         
         # Create IoT_Data directory for all data files
-        self.data_dir = os.path.join(base_dir, 'IoT_Data')
+        self.data_dir = resolve_data_dir()
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir, exist_ok=True)
         
@@ -51,8 +139,8 @@ class DataManager:
         else:
             self.db_path = db_path
         
-        print(f"📁 Data directory: {self.data_dir}")
-        print(f"🗄️ Database path: {self.db_path}")
+        logger.info("📁 Data directory: %s", self.data_dir)
+        logger.info("🗄️ Database path: %s", self.db_path)
     
     def scan_ports(self):
         """Scan for available COM ports"""
@@ -61,20 +149,20 @@ class DataManager:
             ports = serial.tools.list_ports.comports()
             available_ports = []
             
-            print("Scanning for available COM ports...")
+            logger.debug("Scanning for available COM ports...")
             for port in ports:
                 try:
                     # Try to open each port briefly to check availability
                     test_serial = serial.Serial(port.device, self.baudrate, timeout=0.1)
                     test_serial.close()
                     available_ports.append(port.device)
-                    print(f"  ✓ {port.device} - {port.description} (Available)")
+                    logger.debug("  ✓ %s - %s (Available)", port.device, port.description)
                 except:
-                    print(f"  ✗ {port.device} - {port.description} (Busy)")
+                    logger.debug("  ✗ %s - %s (Busy)", port.device, port.description)
             
             return available_ports
         except ImportError:
-            print("serial.tools.list_ports not available")
+            logger.warning("serial.tools.list_ports not available")
             return []
     
     def auto_connect(self):
@@ -82,17 +170,17 @@ class DataManager:
         available_ports = self.scan_ports()
         
         if not available_ports:
-            print("No available COM ports found!")
+            logger.info("No available COM ports found!")
             return False
         
         # Try each available port
         for port in available_ports:
-            print(f"Trying to connect to {port}...")
+            logger.info("Trying to connect to %s...", port)
             self.port = port
             if self.connect_arduino():
                 return True
         
-        print("Could not connect to any available port")
+        logger.info("Could not connect to any available port")
         return False
     
     def init_database(self):
@@ -104,21 +192,144 @@ class DataManager:
         if db_dir and not os.path.exists(db_dir):
             os.makedirs(db_dir, exist_ok=True)
         
+        # Readings go to monthly partition files; the main database keeps
+        # forecasts, rollups, gaps and any readings stored before partitioning
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        try:
+            init_gaps_table(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        # Demo readings get their own files, so real queries never scan them
+        self.router = PartitionRouter(self.db_path)
+        self.demo_router = PartitionRouter(self.db_path, 'demo')
+    
+    def reader(self, source='real'):
+        """Router for reading 'real', 'demo' or 'all' readings"""
+        if source == 'real':
+            return self.router
+        if source == 'demo':
+            return self.demo_router
+        return PartitionRouter(self.db_path, source)
+    
+    def prepare_storage(self):
+        """Open the stores only the collecting process writes (GUI clients of a collector never do)"""
+        # Downtime since then is recorded as a gap of each stream
+        for source, router in (('real', self.router), ('demo', self.demo_router)):
+            latest = router.latest()
+            if latest:
+                self.ingest_index.seed(latest[0], source)
+        if self.use_journal and self.journal is None:
+            self.open_journal()
+        if self.use_raw_log and self.raw_log is None:
+            self.open_raw_log()
+    
+    def open_journal(self):
+        """Journal batched readings, after replaying whatever a crash left in it"""
+        try:
+            journal = IngestJournal(journal_path(self.data_dir), self.journal_sync)
+        except OSError as e:
+            logger.warning("Ingest journal unavailable, batches are only kept in memory: %s", e)
+            return None
+        try:
+            journal.replay(self.replay_db_rows, self.replay_csv_rows)
+        except (OSError, sqlite3.Error) as e:
+            # Left as it is for the next start rather than journaling on top of it
+            logger.error("Error replaying ingest journal: %s", e)
+            journal.close()
+            return None
+        self.journal = journal
+        return journal
+    
+    def replay_db_rows(self, rows, source='real'):
+        """Store journaled readings that did not reach SQLite before a crash"""
+        router = self.reader(source)
+        timestamps = [row[0] for row in rows]
+        stored = {row[0] for row in router.select(str(min(timestamps)),
+                                                  str(max(timestamps) + timedelta(microseconds=1)))}
+        missing = [row for row in rows if str(row[0]) not in stored]
+        router.insert(missing)
+        SAMPLES_STORED.inc(len(missing))
+    
+    def replay_csv_rows(self, rows):
+        """Append journaled readings to the CSV files of their days, minus any already there"""
+        days = {}
+        for timestamp, voltage, temperature, current in rows:
+            days.setdefault(timestamp.date(), []).append(self.csv_row(voltage, current, temperature, timestamp))
+        for day, csv_rows in sorted(days.items()):
+            self.append_csv_rows(os.path.join(self.data_dir, f'sensor_data_{day:%Y-%m-%d}.csv'), csv_rows)
+    
+    def append_csv_rows(self, path, csv_rows):
+        """Append CSV rows to `path`, skipping those an interrupted write already left at its end"""
+        import csv
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sensor_readings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                voltage REAL NOT NULL,
-                temperature REAL NOT NULL,
-                current REAL NOT NULL
-            )
-        ''')
+        if not os.path.exists(path):
+            with open(path, 'w', newline='') as csvfile:
+                csv.writer(csvfile).writerow(CSV_HEADER)
         
-        conn.commit()
-        conn.close()
+        with open(path, 'r+b') as f:
+            size = f.seek(0, os.SEEK_END)
+            start = f.seek(max(0, size - 128 * (len(csv_rows) + 1)))
+            tail = f.read()
+            # A batch cut off mid-line by the crash: drop the partial line
+            complete = tail.rfind(b'\n') + 1
+            if complete < len(tail):
+                f.truncate(start + complete)
+            lines = tail[:complete].decode('utf-8', 'replace').splitlines()
+            written = list(csv.reader(lines[1:] if start else lines))
+        
+        # The longest run of these rows already at the end of the file
+        overlap = next((n for n in range(min(len(written), len(csv_rows)), 0, -1)
+                        if written[-n:] == csv_rows[:n]), 0)
+        with open(path, 'a', newline='') as csvfile:
+            csv.writer(csvfile).writerows(csv_rows[overlap:])
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+    
+    def close_journal(self):
+        if self.journal:
+            journal, self.journal = self.journal, None
+            journal.close()
+    
+    def open_raw_log(self):
+        """Append readings to IoT_Data/raw_log; a background thread compacts it into SQLite"""
+        from data.raw_log import RawLog, raw_log_dir
+        try:
+            self.raw_log = RawLog(raw_log_dir(self.data_dir))
+            logger.info("📼 Raw binary log: %s (%d records to compact)", self.raw_log.directory,
+                        self.raw_log.pending)
+        except (OSError, ValueError) as e:
+            logger.warning("Raw log unavailable, storing readings in batches: %s", e)
+            return None
+        
+        # Anything left by the last run is compacted on the first pass
+        self.compactor_stop.clear()
+        self.compactor = threading.Thread(target=self.compact_raw_log, name='raw-log-compactor', daemon=True)
+        self.compactor.start()
+        return self.raw_log
+    
+    def compact_raw_log(self):
+        """Compactor thread: moves the raw log into SQLite every flush interval, off the capture thread
+
+        It also flushes the log to disk on the log's sync interval, which
+        appends only do while readings keep arriving.
+        """
+        raw_log = self.raw_log
+        last_compact = None
+        while True:
+            if last_compact is None or time.monotonic() - last_compact >= self.flush_interval:
+                try:
+                    with DB_COMMIT_SECONDS.time():
+                        SAMPLES_STORED.inc(raw_log.compact(self.router, self.demo_router))
+                except Exception as e:
+                    logger.error("Error compacting raw log: %s", e)
+                last_compact = time.monotonic()
+            try:
+                raw_log.sync_if_due()
+            except (OSError, ValueError) as e:
+                logger.error("Error syncing raw log: %s", e)
+            if self.compactor_stop.wait(max(min(self.flush_interval, raw_log.sync_interval), 0.1)):
+                return
     
     def init_csv_storage(self):
         """Initialize CSV file for data storage with proper executable path handling"""
@@ -135,10 +346,10 @@ class DataManager:
             import csv
             with open(self.csv_path, 'w', newline='') as csvfile:
                 writer = csv.writer(csvfile)
-                writer.writerow(['timestamp', 'voltage', 'current', 'temperature', 'power'])
-                print(f"📄 Created CSV file: {self.csv_path}")
+                writer.writerow(CSV_HEADER)
+                logger.info("📄 Created CSV file: %s", self.csv_path)
         
-        print(f"💾 CSV data will be saved to: {self.csv_path}")
+        logger.info("💾 CSV data will be saved to: %s", self.csv_path)
     
     def register_status_callback(self, callback):
         """Register callback for connection status updates"""
@@ -156,39 +367,46 @@ class DataManager:
         try:
             self.serial_connection = serial.Serial(self.port, self.baudrate, timeout=1)
             time.sleep(2)  # Wait for Arduino to initialize
-            print(f"✓ Connected to Arduino on {self.port}")
+            if self.spike_filter:
+                self.spike_filter.reset()  # The level may have changed while disconnected
+            logger.info("✓ Connected to Arduino on %s", self.port)
             self.update_status("connected", f"Connected to {self.port}")
             return True
         except serial.SerialException as e:
             if "PermissionError" in str(e) or "Access is denied" in str(e):
-                print(f"✗ Port {self.port} is busy!")
-                print("  Troubleshooting steps:")
-                print("  1. Close Arduino IDE Serial Monitor")
-                print("  2. Close any other serial terminal programs")
-                print("  3. Disconnect and reconnect Arduino USB cable")
-                print("  4. Try a different COM port")
+                logger.warning("✗ Port %s is busy!\n"
+                               "  Troubleshooting steps:\n"
+                               "  1. Close Arduino IDE Serial Monitor\n"
+                               "  2. Close any other serial terminal programs\n"
+                               "  3. Disconnect and reconnect Arduino USB cable\n"
+                               "  4. Try a different COM port", self.port)
                 self.update_status("error", f"Port {self.port} busy")
             else:
-                print(f"✗ Serial connection error: {e}")
-                print("  Check if Arduino is connected and drivers are installed")
+                logger.warning("✗ Serial connection error: %s\n"
+                               "  Check if Arduino is connected and drivers are installed", e)
                 self.update_status("error", "Connection failed")
             return False
         except Exception as e:
-            print(f"✗ Failed to connect to Arduino: {e}")
+            logger.warning("✗ Failed to connect to Arduino: %s", e)
             self.update_status("error", "Connection error")
             return False
     
     def start_collection(self):
         """Start collecting data from Arduino"""
-        print("🚀 Starting data collection system...")
+        logger.info("🚀 Starting data collection system...")
         self.is_collecting = True
+        self.prepare_storage()
+        
+        if self.demo_only:
+            self.start_demo_mode()
+            return
         
         # Try to connect to the specified port first
         if not self.connect_arduino():
-            print(f"Retrying with auto-detection...")
+            logger.info("Retrying with auto-detection...")
             if not self.auto_connect():
-                print("Could not establish Arduino connection. Running in demo mode...")
-                print("You can plug in Arduino anytime - the system will auto-detect it!")
+                logger.info("Could not establish Arduino connection. Running in demo mode...\n"
+                            "You can plug in Arduino anytime - the system will auto-detect it!")
                 self.start_demo_mode()
                 return
         
@@ -220,7 +438,7 @@ class DataManager:
                 return None
                 
         except Exception as e:
-            print(f"Error parsing Arduino CSV: {e}")
+            logger.warning("Error parsing Arduino CSV: %s", e)
             return None
     
     def get_csv_file_path(self):
@@ -255,7 +473,7 @@ class DataManager:
                     'exists': False
                 }
         except Exception as e:
-            print(f"Error getting CSV info: {e}")
+            logger.error("Error getting CSV info: %s", e)
             return {'exists': False, 'error': str(e)}
     
     def process_data(self, data: Dict, is_demo: bool = False):
@@ -269,6 +487,17 @@ class DataManager:
             # Check if data is valid (not all zeros or inactive)
             is_valid_data = not (voltage == 0 and current == 0 and temperature == 0)
             
+            # Lines replayed after a reconnect are dropped before anyone sees them
+            if is_valid_data and not self.index_reading(data, timestamp, is_demo):
+                activity.count('duplicates dropped')
+                return
+            
+            if is_valid_data and not is_demo and self.spike_filter and not self.spike_filter.accept(
+                    {'voltage': voltage, 'current': current, 'temperature': temperature}):
+                SPIKES_DROPPED.inc()
+                activity.count('spikes dropped')
+                return
+            
             # Update latest data (always update for GUI display)
             self.latest_data = {
                 'voltage': voltage,
@@ -277,31 +506,48 @@ class DataManager:
                 'timestamp': timestamp
             }
             
+            # Zero-copy handoff to chart readers in this and other processes
+            if self.ring and self.ring.owner:
+                self.ring.append(timestamp, None if is_demo else self.port, voltage, current, temperature)
+            
+            # Push to live stream subscribers (GUI clients, recorders, alerting)
+            if self.publisher:
+                self.publisher.publish(dict(self.latest_data, demo=is_demo))
+            
             # Only store data if it's valid (not all zeros)
             if is_valid_data:
-                # Store in database
-                self.store_data(voltage, temperature, current, timestamp)
+                # Journal before queueing; the raw log is its own durable copy
+                sinks = (0 if self.raw_log else SINK_DB) | (DEMO if is_demo else SINK_CSV)
+                seq = self.journal_reading(timestamp, voltage, temperature, current, sinks)
+                
+                # Store in database (demo readings in their own partitions)
+                self.store_data(voltage, temperature, current, timestamp, is_demo)
                 
                 # Store in CSV file only for real data (not demo data)
                 if not is_demo:
                     self.store_csv_data(voltage, current, temperature, timestamp)
-                    print(f"📊 Real Data: V={voltage:.2f}V, C={current:.2f}A, T={temperature:.1f}°C")
+                    activity.count('samples', 'real')
+                    logger.debug("📊 Real Data: V=%.2fV, C=%.2fA, T=%.1f°C", voltage, current, temperature)
                 else:
-                    print(f"🎭 Demo Data: V={voltage:.2f}V, C={current:.2f}A, T={temperature:.1f}°C")
+                    activity.count('samples', 'demo')
+                    logger.debug("🎭 Demo Data: V=%.2fV, C=%.2fA, T=%.1f°C", voltage, current, temperature)
+                if seq:
+                    self.journal_seq = seq  # Only once queued: flush() marks up to here
             else:
-                print(f"⚠️  Skipping inactive data (all zeros)")
+                activity.count('inactive skipped')
+                logger.warning("⚠️  Skipping inactive data (all zeros)")
             
         except Exception as e:
-            print(f"Error processing data: {e}")
+            logger.error("Error processing data: %s", e)
     
     def start_demo_mode(self):
         """Start demo mode with simulated data when Arduino is not available"""
         import random
         import math
         
-        print("🎭 Starting DEMO MODE - Generating simulated sensor data")
-        print("   (This allows you to test the GUI without Arduino)")
-        print("   💡 Plug in Arduino anytime - system will auto-detect and switch!")
+        logger.info("🎭 Starting DEMO MODE - Generating simulated sensor data\n"
+                    "   (This allows you to test the GUI without Arduino)\n"
+                    "   💡 Plug in Arduino anytime - system will auto-detect and switch!")
         self.update_status("demo", "Demo mode - plug Arduino to switch")
         
         self.is_collecting = True
@@ -313,10 +559,10 @@ class DataManager:
                 current_time = time.time()
                 
                 # Check for Arduino every 5 seconds
-                if current_time - last_arduino_check > 5:
-                    print("🔍 Checking for Arduino connection...")
+                if not self.demo_only and current_time - last_arduino_check > 5:
+                    logger.debug("🔍 Checking for Arduino connection...")
                     if self.auto_connect():
-                        print("🎉 Arduino detected! Switching from demo mode to real data...")
+                        logger.info("🎉 Arduino detected! Switching from demo mode to real data...")
                         self.start_real_collection()
                         return
                     last_arduino_check = current_time
@@ -353,97 +599,344 @@ class DataManager:
                 time.sleep(1.0)
                 
             except Exception as e:
-                print(f"Error in demo mode: {e}")
+                logger.error("Error in demo mode: %s", e)
                 time.sleep(1)
     
+    def parse_line(self, line: str) -> Optional[Dict]:
+        """Parse one line from the Arduino (JSON, V:/C:/T: or bare CSV format)"""
+        # Handle both JSON format and CSV format from Arduino
+        if line.startswith('{') and line.endswith('}'):
+            # JSON format (original)
+            try:
+                return json.loads(line)
+            except json.JSONDecodeError:
+                PARSE_FAILURES.inc()
+                activity.count('parse errors')
+                logger.warning("Invalid JSON: %s", line)
+        elif line.startswith('V:') and 'C:' in line and 'T:' in line:
+            # CSV format from Arduino test generator: "V:4.85,C:1.23,T:24.5"
+            data = self.parse_arduino_csv(line)
+            if data is None:
+                PARSE_FAILURES.inc()
+                activity.count('parse errors')
+            return data
+        elif not line.startswith('#'):  # Ignore debug messages starting with #
+            # Try to parse as simple CSV: voltage,current,temperature
+            try:
+                parts = line.split(',')
+                if len(parts) == 3:
+                    return {
+                        'voltage': float(parts[0]),
+                        'current': float(parts[1]),
+                        'temperature': float(parts[2])
+                    }
+            except (ValueError, IndexError):
+                if line.strip():  # Only print non-empty lines
+                    PARSE_FAILURES.inc()
+                    activity.count('parse errors')
+                    logger.warning("Unrecognized data format: %s", line)
+        return None
+    
     def start_real_collection(self):
         """Start collecting real data from Arduino"""
-        print("📡 Starting real Arduino data collection...")
+        logger.info("📡 Starting real Arduino data collection...")
         self.update_status("connected", "Collecting real data")
         
         while self.is_collecting:
             try:
-                if self.serial_connection and self.serial_connection.in_waiting > 0:
+                waiting = self.serial_connection.in_waiting if self.serial_connection else 0
+                SERIAL_QUEUE_BYTES.set(waiting)
+                if waiting > 0:
                     line = self.serial_connection.readline().decode('utf-8').strip()
-                    
-                    # Handle both JSON format and CSV format from Arduino
-                    if line.startswith('{') and line.endswith('}'):
-                        # JSON format (original)
-                        try:
-                            data = json.loads(line)
-                            self.process_data(data, is_demo=False)
-                        except json.JSONDecodeError:
-                            print(f"Invalid JSON: {line}")
-                    elif line.startswith('V:') and 'C:' in line and 'T:' in line:
-                        # CSV format from Arduino test generator: "V:4.85,C:1.23,T:24.5"
-                        try:
-                            data = self.parse_arduino_csv(line)
-                            if data:
-                                self.process_data(data, is_demo=False)
-                        except Exception as e:
-                            print(f"Error parsing Arduino CSV: {line} - {e}")
-                    elif not line.startswith('#'):  # Ignore debug messages starting with #
-                        # Try to parse as simple CSV: voltage,current,temperature
-                        try:
-                            parts = line.split(',')
-                            if len(parts) == 3:
-                                data = {
-                                    'voltage': float(parts[0]),
-                                    'current': float(parts[1]),
-                                    'temperature': float(parts[2])
-                                }
-                                self.process_data(data, is_demo=False)
-                        except (ValueError, IndexError):
-                            if line.strip():  # Only print non-empty lines
-                                print(f"Unrecognized data format: {line}")
-                
-                time.sleep(0.1)  # Small delay to prevent excessive CPU usage
+                    LINES_READ.inc()
+                    data = self.parse_line(line)
+                    if data:
+                        self.process_data(data, is_demo=False)
+                else:
+                    time.sleep(0.01)  # Idle poll; short enough that a 4 KB UART buffer cannot fill at kHz rates
                 
             except Exception as e:
-                print(f"Error reading Arduino data: {e}")
-                print("🔌 Arduino disconnected! Switching back to demo mode...")
+                if not self.is_collecting:
+                    return  # Port closed by stop_collection()
+                logger.error("Error reading Arduino data: %s", e)
+                logger.warning("🔌 Arduino disconnected! Switching back to demo mode...")
                 self.serial_connection = None
                 self.start_demo_mode()
                 return
     
-    def store_data(self, voltage: float, temperature: float, current: float, timestamp: datetime):
-        """Store data in SQLite database"""
+    def store_data(self, voltage: float, temperature: float, current: float, timestamp: datetime,
+                   is_demo: bool = False):
+        """Queue a reading for the SQLite database"""
+        raw_log = self.raw_log
+        if raw_log:
+            # Compacted by the compactor thread, not here
+            raw_log.append(timestamp, None if is_demo else self.port, voltage, temperature, current)
+            return
+        with self.pending_lock:
+            rows = self.pending_demo_rows if is_demo else self.pending_db_rows
+            rows.append((timestamp, voltage, temperature, current))
+        self.flush_if_due()
+    
+    def index_reading(self, data, timestamp, is_demo):
+        """Duplicate and gap check for one reading; False if it is a duplicate"""
+        sequence = None if is_demo else data.get('timestamp')  # millis() from the JSON format
+        if not isinstance(sequence, (int, float)):
+            sequence = None
+        accepted, gap = self.ingest_index.check('demo' if is_demo else self.port, timestamp, sequence)
+        if gap:
+            logger.info("⏸️ Gap of %.0fs in %s readings (%s) since %s", gap[3], gap[0], gap[4], gap[1])
+            with self.pending_lock:
+                self.pending_gaps.append(gap)
+        return accepted
+    
+    def journal_reading(self, timestamp, voltage, temperature, current, sinks):
+        """Write-ahead record of a reading bound for `sinks`; its sequence number or None"""
+        if not self.journal or not sinks & (SINK_DB | SINK_CSV):
+            return None
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            return self.journal.append(timestamp, voltage, temperature, current, sinks)
+        except OSError as e:
+            logger.error("Error writing ingest journal: %s", e)
+            return None
+    
+    def csv_row(self, voltage, current, temperature, timestamp):
+        # Calculate power
+        power = voltage * current
+        return [
+            timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            f"{voltage:.2f}",
+            f"{current:.2f}",
+            f"{temperature:.1f}",
+            f"{power:.2f}"
+        ]
+    
+    def store_csv_data(self, voltage: float, current: float, temperature: float, timestamp: datetime):
+        """Queue a reading for the CSV file"""
+        with self.pending_lock:
+            self.pending_csv_rows.append(self.csv_row(voltage, current, temperature, timestamp))
+        self.flush_if_due()
+    
+    def flush_if_due(self):
+        """Write pending readings once the batch is full or the flush interval has passed"""
+        with self.pending_lock:
+            pending = max(len(self.pending_db_rows) + len(self.pending_demo_rows), len(self.pending_csv_rows))
+            due = pending >= self.batch_size or (
+                pending and time.monotonic() - self.last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+    
+    def flush(self):
+        """Write all pending readings to SQLite (one transaction) and the CSV file"""
+        # One batch at a time, so journal marks follow the order batches were stored
+        with self.flush_lock:
+            with self.pending_lock:
+                db_rows, self.pending_db_rows = self.pending_db_rows, []
+                demo_rows, self.pending_demo_rows = self.pending_demo_rows, []
+                csv_rows, self.pending_csv_rows = self.pending_csv_rows, []
+                gaps, self.pending_gaps = self.pending_gaps, []
+                journal_seq = self.journal_seq
+                self.last_flush = time.monotonic()
             
-            cursor.execute('''
-                INSERT INTO sensor_readings (timestamp, voltage, temperature, current)
-                VALUES (?, ?, ?, ?)
-            ''', (timestamp, voltage, temperature, current))
+            # Rows of a failed write go back to the front of the queue. Until a later
+            # flush stores them (skipping any the failed write got through) the sink
+            # is not marked, so a crash in between replays them from the journal.
+            failed = set()
+            retry_db = SINK_DB in self.unmarked_sinks
+            for source, rows in (('real', db_rows), ('demo', demo_rows)):
+                if not rows:
+                    continue
+                try:
+                    with DB_COMMIT_SECONDS.time():
+                        if retry_db:
+                            self.replay_db_rows(rows, source)
+                        else:
+                            self.reader(source).insert(rows)
+                            SAMPLES_STORED.inc(len(rows))
+                except Exception as e:
+                    logger.error("Error storing data: %s", e)
+                    failed.add(SINK_DB)
+                    with self.pending_lock:
+                        pending = self.pending_demo_rows if source == 'demo' else self.pending_db_rows
+                        pending[:0] = rows
             
-            conn.commit()
-            conn.close()
+            if csv_rows:
+                try:
+                    import csv
+                
+                    # Append data to CSV file
+                    with CSV_WRITE_SECONDS.time():
+                        if SINK_CSV in self.unmarked_sinks:
+                            self.append_csv_rows(self.csv_path, csv_rows)
+                        else:
+                            with open(self.csv_path, 'a', newline='') as csvfile:
+                                csv.writer(csvfile).writerows(csv_rows)
+                                if self.journal:
+                                    csvfile.flush()
+                                    os.fsync(csvfile.fileno())  # Durable before the journal lets go of it
+                except Exception as e:
+                    logger.error("Error storing CSV data: %s", e)
+                    failed.add(SINK_CSV)
+                    with self.pending_lock:
+                        self.pending_csv_rows[:0] = csv_rows
             
-        except Exception as e:
-            print(f"Error storing data: {e}")
-    
-    def store_csv_data(self, voltage: float, current: float, temperature: float, timestamp: datetime):
-        """Store data in CSV file"""
-        try:
-            import csv
+            if gaps:
+                try:
+                    conn = sqlite3.connect(self.db_path, timeout=30)
+                    try:
+                        conn.executemany('INSERT INTO gaps (device, start, end, seconds, reason) '
+                                         'VALUES (?, ?, ?, ?, ?)', gaps)
+                        conn.commit()
+                    finally:
+                        conn.close()
+                except sqlite3.Error as e:
+                    logger.error("Error storing gaps: %s", e)
             
-            # Calculate power
-            power = voltage * current
+            self.unmarked_sinks = failed
             
-            # Append data to CSV file
-            with open(self.csv_path, 'a', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow([
-                    timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                    f"{voltage:.2f}",
-                    f"{current:.2f}",
-                    f"{temperature:.1f}",
-                    f"{power:.2f}"
-                ])
+            # Everything journaled up to journal_seq is stored, except in sinks with rows still queued
+            if self.journal and journal_seq:
+                for sink in (SINK_DB, SINK_CSV):
+                    if sink not in self.unmarked_sinks:
+                        try:
+                            self.journal.mark(sink, journal_seq)
+                        except OSError as e:
+                            logger.error("Error writing ingest journal: %s", e)
+    
+    def start_publishing(self):
+        """Publish every processed reading on the local live stream"""
+        if self.publisher is None:
+            publisher = StreamPublisher(stream_address(self.data_dir))
+            if publisher.start():
+                self.publisher = publisher
+        return self.publisher is not None
+    
+    def create_shared_ring(self, capacity=None):
+        """Write every processed reading to a shared-memory ring for local readers"""
+        if self.ring is None:
+            from data.shared_ring import SharedRing, DEFAULT_CAPACITY, ring_name
+            try:
+                self.ring = SharedRing.create(ring_name(self.data_dir), capacity or DEFAULT_CAPACITY)
+                logger.info("🧠 Shared ring buffer: %s (%d records)", self.ring.shm.name, self.ring.capacity)
+            except (OSError, ValueError) as e:
+                logger.warning("Shared ring buffer unavailable: %s", e)
+        return self.ring
+    
+    def attach_shared_ring(self):
+        """Map the collector's ring buffer read-only; None if it has none"""
+        if self.ring is None:
+            from data.shared_ring import SharedRing, ring_name
+            try:
+                self.ring = SharedRing.attach(ring_name(self.data_dir))
+            except (OSError, ValueError):
+                return None
+        return self.ring
+    
+    def follow_collector(self, poll_interval=1.0):
+        """Read-only client: mirror the readings of a collector process"""
+        logger.info("🔗 Attached to collector - reading %s (read-only)", self.db_path)
+        self.update_status("attached", "Attached to collector")
+        self.is_collecting = True
+        self.read_only = True
+        last_timestamp = None
+        
+        while self.is_collecting:
+            status = read_collector_status(self.data_dir)
+            if status:
+                self.watch_collector_ring(status)
+            # Prefer the collector's live stream; poll the database if it has none
+            try:
+                for reading in subscribe(stream_address(self.data_dir), idle_timeout=poll_interval * 5):
+                    status = read_collector_status(self.data_dir)
+                    if not self.is_collecting or not status:
+                        break
+                    self.watch_collector_ring(status, reading is not None)
+                    if reading is not None:
+                        reading.pop('seq', None)
+                        reading.pop('demo', None)
+                        self.latest_data = reading
+            except OSError:
+                try:
+                    last_timestamp = self.poll_latest_reading(last_timestamp)
+                except (sqlite3.Error, ValueError) as e:
+                    logger.warning("Error reading collector data: %s", e)
+                time.sleep(poll_interval)
             
-        except Exception as e:
-            print(f"Error storing CSV data: {e}")
+            # Take over collection if the collector went away
+            if self.is_collecting and not read_collector_status(self.data_dir):
+                logger.warning("🔌 Collector stopped! Collecting in this process instead...")
+                self.read_only = False
+                self.close_shared_ring()
+                self.create_shared_ring()
+                self.start_publishing()
+                self.start_collection()
+                return
+    
+    def watch_collector_ring(self, status, new_reading=False):
+        """Keep the mapped ring the running collector's own
+        
+        A restarted collector unlinks its old ring and creates a new one; a
+        client still mapping the old one would show a frozen chart. The ring
+        is re-attached when the collector's pid or start time changes, or when
+        stream readings keep arriving while the ring head stands still.
+        """
+        owner = (status.get('pid'), status.get('started_at'))
+        if self.ring is not None and new_reading:
+            head = self.ring.head
+            if head != self.ring_head:
+                self.ring_head, self.ring_stalls = head, 0
+            else:
+                self.ring_stalls += 1
+        
+        if owner == self.ring_owner and self.ring_stalls < RING_STALL_READINGS:
+            return
+        if self.ring_owner is not None:
+            logger.info("🔄 Collector restarted (pid %s) - re-attaching its ring buffer", owner[0])
+        self.close_shared_ring()
+        self.attach_shared_ring()
+        self.ring_owner = owner
+        self.ring_head = self.ring.head if self.ring else None
+        self.ring_stalls = 0
+    
+    def poll_latest_reading(self, last_timestamp=None):
+        """Load the newest stored reading into latest_data; returns its timestamp"""
+        # The live display follows the collector, demo or not
+        row = self.reader('all').latest()
+        if row and row[0] != last_timestamp:
+            self.latest_data = {
+                'voltage': row[1],
+                'temperature': row[2],
+                'current': row[3],
+                'timestamp': datetime.fromisoformat(row[0])
+            }
+            return row[0]
+        return last_timestamp
+    
+    def close_shared_ring(self):
+        if self.ring:
+            # Pages check self.ring on every frame; they must not pick up a closed one
+            ring, self.ring = self.ring, None
+            ring.close()
+    
+    def unstored_rows(self, timestamp=None, source='real'):
+        """Raw log rows newer than `timestamp` (the newest stored reading), oldest first"""
+        from data.raw_log import RawLogReader, raw_log_dir
+        directory = raw_log_dir(self.data_dir)
+        if not os.path.isdir(directory):
+            return []  # Raw log never used (and NumPy not needed)
+        return RawLogReader(directory).rows_after(timestamp, source)
+    
+    def close_raw_log(self):
+        if self.compactor:
+            self.compactor_stop.set()
+            self.compactor.join(timeout=30)
+            self.compactor = None
+        if self.raw_log:
+            raw_log, self.raw_log = self.raw_log, None  # Late readings fall back to batched inserts
+            try:
+                SAMPLES_STORED.inc(raw_log.compact(self.router, self.demo_router))
+            except Exception as e:
+                logger.error("Error compacting raw log: %s", e)  # Kept in the log for the next run
+            raw_log.close()
     
     def get_latest_data(self) -> Dict:
         """Get the most recent sensor reading"""
@@ -451,21 +944,27 @@ class DataManager:
             'voltage': 0.0, 'current': 0.0, 'temperature': 0.0, 'timestamp': None
         }
     
-    def get_historical_data(self, limit: int = 100) -> List[Dict]:
-        """Get historical data from database"""
+    def get_historical_data(self, limit: int = 100, source: str = 'real') -> List[Dict]:
+        """Get historical data from database ('real', 'demo' or 'all' readings)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            # Readings still waiting in the raw log for compaction come first. The
+            # partitions are read up to the newest reading they held before, so a
+            # compaction in between cannot return a reading twice.
+            router = self.reader(source)
+            latest = router.latest()
+            rows = self.unstored_rows(latest[0] if latest else None, source)[::-1][:limit]
             
-            cursor.execute('''
-                SELECT timestamp, voltage, temperature, current 
-                FROM sensor_readings 
-                ORDER BY timestamp DESC 
-                LIMIT ?
-            ''', (limit,))
+            # Newest month first; older partitions are only opened if needed
+            if latest and (limit is None or len(rows) < limit):
+                end = str(datetime.fromisoformat(str(latest[0])) + timedelta(microseconds=1))
+                rows += router.select(end=end, descending=True, limit=None if limit is None else limit - len(rows))
             
-            rows = cursor.fetchall()
-            conn.close()
+            # Past the oldest raw reading, the per-minute averages retention kept
+            if source != 'demo' and (limit is None or len(rows) < limit):
+                rollups = load_rollups(self.db_path, self.router, descending=True,
+                                       limit=None if limit is None else limit - len(rows))
+                rows += [(bucket, voltage, temperature, current)
+                         for bucket, _, voltage, _, _, temperature, _, _, current, _, _ in rollups]
             
             return [
                 {
@@ -478,11 +977,44 @@ class DataManager:
             ]
             
         except Exception as e:
-            print(f"Error retrieving historical data: {e}")
+            logger.error("Error retrieving historical data: %s", e)
+            return []
+    
+    def get_gaps(self, start=None, end=None, source: str = 'real') -> List[Dict]:
+        """Recorded gaps of a source overlapping [start, end), oldest first"""
+        try:
+            conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
+            try:
+                rows = load_gaps(conn, start, end, source)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.error("Error retrieving gaps: %s", e)
             return []
+        return [
+            {'device': row[0], 'start': row[1], 'end': row[2], 'seconds': row[3], 'reason': row[4]}
+            for row in rows
+        ]
+    
+    def purge_demo_data(self) -> int:
+        """Delete every stored demo reading and demo gap; returns the readings removed"""
+        self.flush()
+        with self.flush_lock:
+            readings = self.demo_router.purge()
+            purge_gaps(self.db_path, 'demo')
+        logger.info("🧽 Purged %d demo readings", readings)
+        return readings
     
     def stop_collection(self):
         """Stop data collection"""
         self.is_collecting = False
+        self.flush()
+        self.close_raw_log()
+        self.close_journal()
+        activity.flush()
+        if self.publisher:
+            self.publisher.stop()
+            self.publisher = None
+        self.close_shared_ring()
         if self.serial_connection:
             self.serial_connection.close()
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+Exporter - Streams the full reading history to CSV, gzipped CSV or Parquet
+
+Reads the monthly partitions one after another through a streaming cursor, so
+memory stays bounded by one chunk however large the history is, and each month
+is read from one consistent snapshot. Readings a high-rate capture still
+holds in the raw log (data/raw_log.py) are appended from its memory map, so
+the export ends with the newest reading. Output goes to `<path>.part` and is
+renamed into place only when complete.
+"""
+
+import csv
+import gzip
+import itertools
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.partitions import PartitionRouter
+
+# Rows read and written per chunk (one Parquet row group each)
+CHUNK_ROWS = 50000
+
+COLUMNS = ('timestamp', 'voltage', 'temperature', 'current')
+
+FORMATS = {
+    '.csv': 'csv',
+    '.gz': 'csv.gz',
+    '.parquet': 'parquet'
+}
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def export_format(path):
+    """'csv', 'csv.gz' or 'parquet' from the file name (CSV if unknown)"""
+    return FORMATS.get(os.path.splitext(path)[1].lower(), 'csv')
+
+
+class CsvWriter:
+    def __init__(self, path, compress=False):
+        if compress:
+            self.file = gzip.open(path, 'wt', compresslevel=6, newline='', encoding='utf-8')
+        else:
+            self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(COLUMNS)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        self.pa = pa
+        self.schema = pa.schema([('timestamp', pa.timestamp('us')), ('voltage', pa.float64()),
+                                 ('temperature', pa.float64()), ('current', pa.float64())])
+        self.writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+
+    def write(self, rows):
+        timestamps, voltage, temperature, current = zip(*rows)
+        arrays = [
+            self.pa.array(timestamps, self.pa.string()).cast(self.pa.timestamp('us')),  # ISO text in SQLite
+            self.pa.array(voltage, self.pa.float64()),
+            self.pa.array(temperature, self.pa.float64()),
+            self.pa.array(current, self.pa.float64())
+        ]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def open_writer(path, fmt):
+    if fmt == 'parquet':
+        return ParquetWriter(path)
+    return CsvWriter(path, compress=fmt == 'csv.gz')
+
+
+def export_readings(db_path, path, fmt=None, chunk_rows=CHUNK_ROWS, progress=None, cancel_event=None,
+                    source='real', raw_log_dir=None):
+    """Write every reading to `path`, oldest first; returns the number of rows
+
+    Only real readings unless `source` is 'demo' or 'all'.
+    `progress(rows_done, rows_total)` is called after each chunk from the
+    calling thread. Setting `cancel_event` stops the export and raises
+    ExportCancelled, leaving no partial file behind. With `raw_log_dir`,
+    readings not yet compacted from that raw log follow the stored ones.
+    """
+    fmt = fmt or export_format(path)
+    router = PartitionRouter(db_path, source)
+
+    # Stored readings up to the newest one now; anything newer is still in the
+    # raw log, even if it is compacted while the export runs
+    latest = router.latest()
+    unstored = []
+    if raw_log_dir and os.path.isdir(raw_log_dir):
+        from data.raw_log import RawLogReader
+        unstored = RawLogReader(raw_log_dir).rows_after(latest[0] if latest else None, source)
+    end = str(datetime.fromisoformat(str(latest[0])) + timedelta(microseconds=1)) if latest else None
+
+    tmp_path = f'{path}.part'
+    writer = None
+    stored = router.select(end=end)
+    rows = itertools.chain(stored, unstored)
+    try:
+        total = router.count() + len(unstored)
+        writer = open_writer(tmp_path, fmt)
+        done = 0
+
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise ExportCancelled()
+
+            chunk = list(itertools.islice(rows, chunk_rows))
+            if not chunk:
+                break
+
+            writer.write(chunk)
+            done += len(chunk)
+            if progress:
+                progress(done, max(total, done))
+
+        writer.close()
+        writer = None
+        os.replace(tmp_path, path)
+        return done
+    finally:
+        stored.close()
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
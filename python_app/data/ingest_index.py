@@ -0,0 +1,188 @@
+"""
+Ingest Index - Per-device duplicate filter and gap detector for live readings
+
+DataManager checks every reading here before storing it. Each device (serial
+port, or 'demo') keeps its last timestamp, its last few device sequence
+numbers (the Arduino's millis() in the JSON format) and a running estimate of
+its sampling interval, so both checks are O(1) dictionary/set lookups:
+
+    duplicate  sequence number seen in the last DUPLICATE_SECONDS (a reconnect
+               replaying lines), or the same timestamp as the previous reading
+    gap        more than max(GAP_MIN_SECONDS, GAP_FACTOR x usual interval)
+               since the previous reading; recorded in the `gaps` table of the
+               main database so charts can shade it without scanning readings
+
+Real readings (any serial port) and demo readings are separate streams: each
+reading is compared with the last one of its own stream, never the other's.
+When real readings resume after the app fell back to demo data, the demo
+period is recorded as a 'switch' gap in the real stream. The first reading of
+a run is compared with the newest stored reading of its stream, so downtime
+between runs is recorded too. Gaps of the demo generator are recorded under
+device 'demo' and filtered like demo readings.
+"""
+
+import collections
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.metrics import metrics
+
+# A gap is at least this long, and GAP_FACTOR times the usual interval
+GAP_MIN_SECONDS = 5.0
+GAP_FACTOR = 5.0
+
+# Sequence numbers remembered per device for duplicate checks, and for how long
+# (millis() restarts at 0 when the board resets, so old numbers come back)
+SEQUENCE_WINDOW = 1024
+DUPLICATE_SECONDS = 60.0
+
+# Weight of the newest interval in the running average
+INTERVAL_SMOOTHING = 0.1
+
+DUPLICATES_DROPPED = metrics.counter('iot_duplicates_dropped_total', 'Readings dropped as duplicates on ingest')
+GAPS_RECORDED = metrics.counter('iot_gaps_recorded_total', 'Gaps in the reading stream recorded on ingest')
+
+
+def init_gaps_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS gaps (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            device TEXT NOT NULL,
+            start TEXT NOT NULL,
+            end TEXT NOT NULL,
+            seconds REAL NOT NULL,
+            reason TEXT NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_gaps_start ON gaps(start)')
+
+
+# Device name of gaps in demo readings
+DEMO_DEVICE = 'demo'
+
+
+def source_clauses(source):
+    """SQL conditions selecting gaps of a reading source ('real', 'demo' or 'all')"""
+    if source == 'real':
+        return [f"device != '{DEMO_DEVICE}'"]
+    if source == 'demo':
+        return [f"device = '{DEMO_DEVICE}'"]
+    return []
+
+
+def load_gaps(conn, start=None, end=None, source='all'):
+    """(device, start, end, seconds, reason) rows of gaps overlapping [start, end)"""
+    clauses, args = source_clauses(source), []
+    if end is not None:
+        clauses.append('start < ?')
+        args.append(str(end))
+    if start is not None:
+        clauses.append('end > ?')
+        args.append(str(start))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    return conn.execute(f'SELECT device, start, end, seconds, reason FROM gaps {where} ORDER BY start',
+                        args).fetchall()
+
+
+def purge_gaps(db_path, source='demo'):
+    """Delete the gaps recorded for a source; returns how many"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        init_gaps_table(conn)
+        deleted = conn.execute(f"DELETE FROM gaps WHERE {' AND '.join(source_clauses(source)) or '1'}").rowcount
+        conn.commit()
+        return deleted
+    finally:
+        conn.close()
+
+
+class DeviceState:
+    def __init__(self):
+        self.last_timestamp = None
+        self.last_sequence = None
+        self.recent = {}  # sequence -> when it arrived
+        self.order = collections.deque()
+        self.interval = None
+
+    def seen(self, sequence, timestamp):
+        """True if `sequence` arrived within DUPLICATE_SECONDS; otherwise remember it"""
+        arrived = self.recent.get(sequence)
+        if arrived is not None and (timestamp - arrived).total_seconds() <= DUPLICATE_SECONDS:
+            return True
+        if self.last_sequence is not None and sequence <= self.last_sequence:
+            # Counter went backwards without being a replay: the board reset
+            self.recent.clear()
+            self.order.clear()
+        self.recent[sequence] = timestamp
+        self.order.append(sequence)
+        if len(self.order) > SEQUENCE_WINDOW:
+            self.recent.pop(self.order.popleft(), None)
+        self.last_sequence = sequence
+        return False
+
+
+def device_source(device):
+    return 'demo' if device == DEMO_DEVICE else 'real'
+
+
+class IngestIndex:
+    def __init__(self):
+        self.devices = {}
+        # Per source ('real' / 'demo'): device and timestamp of its newest accepted reading
+        self.last_device = {}
+        self.last_timestamp = {}
+        self.last_source = None  # Source of the newest accepted reading
+
+    def seed(self, timestamp, source='real'):
+        """Newest reading of `source` stored before this run (datetime or stored string)"""
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        self.last_timestamp[source] = timestamp
+
+    def threshold(self, state):
+        if state.interval is None:
+            return GAP_MIN_SECONDS
+        return max(GAP_MIN_SECONDS, GAP_FACTOR * state.interval)
+
+    def check(self, device, timestamp, sequence=None):
+        """(accepted, gap) for one reading; gap is a gaps row or None"""
+        state = self.devices.get(device)
+        if state is None:
+            state = self.devices[device] = DeviceState()
+
+        # Only an exact repeat: local wall-clock time may step back (DST, NTP)
+        if timestamp == state.last_timestamp:
+            DUPLICATES_DROPPED.inc()
+            return False, None
+        if sequence is not None and state.seen(sequence, timestamp):
+            DUPLICATES_DROPPED.inc()
+            return False, None
+
+        # Within a device's own stream; otherwise since the last reading of its source
+        source = device_source(device)
+        last_device = self.last_device.get(source)
+        if device == last_device and source == self.last_source:
+            previous, reason = state.last_timestamp, 'dropout'
+        elif last_device is None:
+            previous, reason = self.last_timestamp.get(source), 'restart'
+        else:
+            previous, reason = self.last_timestamp.get(source), 'switch'
+
+        gap = None
+        if previous is not None:
+            seconds = (timestamp - previous).total_seconds()
+            if seconds > self.threshold(state):
+                gap = (device, str(previous), str(timestamp), seconds, reason)
+                GAPS_RECORDED.inc()
+            elif seconds > 0 and reason == 'dropout':
+                state.interval = seconds if state.interval is None else (
+                    (1 - INTERVAL_SMOOTHING) * state.interval + INTERVAL_SMOOTHING * seconds)
+
+        state.last_timestamp = timestamp
+        self.last_timestamp[source] = timestamp
+        self.last_device[source] = device
+        self.last_source = source
+        return True, gap
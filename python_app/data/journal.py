@@ -0,0 +1,180 @@
+"""
+Journal - Write-ahead journal for readings waiting in DataManager's batches
+
+Every valid reading is appended here before it joins the in-memory batch, and
+DataManager.flush() appends a mark once SQLite and the CSV file hold the
+batch. On the next start, readings past the marks are replayed into both
+sinks, so a crash or power cut between batches (or halfway through one) loses
+nothing and leaves the CSV file and SQLite agreeing.
+
+Records are RECORD.size bytes: kind, sequence number, timestamp (local
+microseconds), voltage, temperature, current and a CRC32. A reading's kind
+says which sinks it is for (SINK_DB, SINK_CSV) and whether it is demo data
+(DEMO, stored in the demo partitions); MARK_DB / MARK_CSV records
+carry the last sequence number stored in that sink. A torn record at the end
+(crash mid-write) fails its CRC and is cut off.
+
+Readings are written straight to the OS (one os.write each), so a process
+crash loses nothing. For power cuts the file is fsynced before a reading is
+acknowledged (sync_interval 0), or at most every `sync_interval` seconds
+(group commit for high rates). The file is truncated whenever every reading in
+it has been stored.
+"""
+
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.metrics import metrics
+from utils.logger import get_logger
+
+logger = get_logger('journal')
+
+SINK_DB = 1
+SINK_CSV = 2
+DEMO = 4
+MARK_DB = 0x10
+MARK_CSV = 0x20
+
+RECORD = struct.Struct('<BQqddd')
+CRC = struct.Struct('<I')
+RECORD_SIZE = RECORD.size + CRC.size
+
+EPOCH = datetime(1970, 1, 1)
+
+# Truncate once this large and fully stored (checked at each mark)
+TRUNCATE_BYTES = 1 << 20
+
+JOURNAL_SYNC_SECONDS = metrics.histogram('iot_journal_sync_seconds', 'Time to fsync the ingest journal')
+JOURNAL_REPLAYED = metrics.counter('iot_journal_replayed_total', 'Readings restored from the journal at startup')
+
+
+def journal_path(data_dir):
+    return os.path.join(data_dir, 'ingest.journal')
+
+
+def encode(kind, seq, timestamp_us=0, voltage=0.0, temperature=0.0, current=0.0):
+    record = RECORD.pack(kind, seq, timestamp_us, voltage, temperature, current)
+    return record + CRC.pack(zlib.crc32(record))
+
+
+def read_records(path):
+    """(kind, seq, timestamp_us, voltage, temperature, current) records and the valid length"""
+    records = []
+    with open(path, 'rb') as f:
+        data = f.read()
+    offset = 0
+    while offset + RECORD_SIZE <= len(data):
+        record = data[offset:offset + RECORD.size]
+        if CRC.unpack_from(data, offset + RECORD.size)[0] != zlib.crc32(record):
+            break
+        records.append(RECORD.unpack(record))
+        offset += RECORD_SIZE
+    return records, offset
+
+
+class IngestJournal:
+    """Single-writer journal; the owning DataManager calls append/mark/replay"""
+
+    def __init__(self, path, sync_interval=0.0):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.last = {SINK_DB: 0, SINK_CSV: 0}    # Newest reading journaled for each sink
+        self.stored = {SINK_DB: 0, SINK_CSV: 0}  # Newest reading marked as stored
+        self.unsynced = False
+        self.last_sync = time.monotonic()
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0), 0o644)
+
+    def append(self, timestamp, voltage, temperature, current, sinks):
+        """Journal one reading before it is queued; returns its sequence number
+
+        `sinks` is SINK_DB and/or SINK_CSV, plus DEMO for demo readings.
+        """
+        with self.lock:
+            self.seq += 1
+            for sink in (SINK_DB, SINK_CSV):
+                if sinks & sink:
+                    self.last[sink] = self.seq
+            microseconds = (timestamp - EPOCH) // timedelta(microseconds=1)
+            os.write(self.fd, encode(sinks, self.seq, microseconds, voltage, temperature, current))
+            self.unsynced = True
+            if time.monotonic() - self.last_sync >= self.sync_interval:
+                self.sync()
+            return self.seq
+
+    def sync(self):
+        if self.unsynced:
+            with JOURNAL_SYNC_SECONDS.time():
+                os.fsync(self.fd)
+            self.unsynced = False
+        self.last_sync = time.monotonic()
+
+    def mark(self, sink, seq):
+        """Readings up to `seq` are stored in `sink` (SINK_DB or SINK_CSV)"""
+        with self.lock:
+            self.stored[sink] = max(self.stored[sink], seq)
+            done = all(self.stored[s] >= self.last[s] for s in (SINK_DB, SINK_CSV))
+            if done and os.fstat(self.fd).st_size >= TRUNCATE_BYTES:
+                os.ftruncate(self.fd, 0)  # Everything journaled is stored
+                return
+            # A lost mark only means the batch is checked again on replay; no fsync
+            os.write(self.fd, encode(MARK_DB if sink == SINK_DB else MARK_CSV, self.stored[sink]))
+
+    def replay(self, store_db, store_csv):
+        """Hand readings past the marks to store_db(rows, source) / store_csv(rows), then start empty
+
+        Rows are (timestamp, voltage, temperature, current) with datetime
+        timestamps; store_db is called once per source ('real', 'demo'). The
+        callbacks skip rows a sink already holds, since the crash may have
+        come after a write but before its mark.
+        """
+        records, valid = read_records(self.path)
+        if valid != os.fstat(self.fd).st_size:
+            logger.warning("⚠️ Journal %s: dropped a torn record at the end", self.path)
+
+        marks = {SINK_DB: 0, SINK_CSV: 0}
+        for kind, seq, *_ in records:
+            if kind == MARK_DB:
+                marks[SINK_DB] = max(marks[SINK_DB], seq)
+            elif kind == MARK_CSV:
+                marks[SINK_CSV] = max(marks[SINK_CSV], seq)
+
+        pending = {SINK_DB: [], SINK_CSV: []}
+        demo_rows = []
+        for kind, seq, microseconds, voltage, temperature, current in records:
+            row = (EPOCH + timedelta(microseconds=microseconds), voltage, temperature, current)
+            for sink in (SINK_DB, SINK_CSV):
+                if kind & sink and kind < MARK_DB and seq > marks[sink]:
+                    (demo_rows if sink == SINK_DB and kind & DEMO else pending[sink]).append(row)
+
+        if pending[SINK_DB] or demo_rows or pending[SINK_CSV]:
+            logger.info("♻️ Replaying journal: %d readings for SQLite (%d demo), %d for CSV",
+                        len(pending[SINK_DB]) + len(demo_rows), len(demo_rows), len(pending[SINK_CSV]))
+            if pending[SINK_DB]:
+                store_db(pending[SINK_DB], 'real')
+            if demo_rows:
+                store_db(demo_rows, 'demo')
+            if pending[SINK_CSV]:
+                store_csv(pending[SINK_CSV])
+            JOURNAL_REPLAYED.inc(max(len(pending[SINK_DB]) + len(demo_rows), len(pending[SINK_CSV])))
+
+        # Both sinks are durable now (store_csv fsyncs); start a fresh journal
+        with self.lock:
+            os.ftruncate(self.fd, 0)
+            os.fsync(self.fd)
+            self.seq = 0
+            self.last = {SINK_DB: 0, SINK_CSV: 0}
+            self.stored = {SINK_DB: 0, SINK_CSV: 0}
+        return len(pending[SINK_DB]) + len(demo_rows), len(pending[SINK_CSV])
+
+    def close(self):
+        with self.lock:
+            self.sync()
+            os.close(self.fd)
@@ -0,0 +1,224 @@
+"""
+Live Stream - Local publish/subscribe channel for every sensor reading
+
+The process that owns collection publishes each reading from process_data() as
+one JSON line to every connected subscriber (the GUI, a recorder, an alerting
+script). Subscribers block on the socket instead of polling; a subscriber that
+falls behind by more than its socket buffer is disconnected rather than
+slowing down ingest.
+
+Transport is a Unix domain socket at IoT_Data/live.sock, or TCP on
+127.0.0.1:IOT_MONITOR_STREAM_PORT (default 9109) where Unix sockets are not
+available.
+
+Example:
+    python data/live_stream.py --data-dir IoT_Data     # print readings as JSON lines
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.metrics import metrics
+from utils.logger import get_logger
+
+logger = get_logger('stream')
+
+SOCKET_NAME = 'live.sock'
+DEFAULT_STREAM_PORT = 9109
+
+# sockaddr_un.sun_path is 108 bytes on Linux, 104 on macOS
+MAX_UNIX_PATH = 100
+
+SUBSCRIBERS = metrics.gauge('iot_stream_subscribers', 'Connected live stream subscribers')
+SUBSCRIBERS_DROPPED = metrics.counter('iot_stream_subscribers_dropped_total',
+                                      'Subscribers disconnected for falling behind')
+READINGS_PUBLISHED = metrics.counter('iot_stream_readings_published_total', 'Readings sent on the live stream')
+
+
+def stream_address(data_dir):
+    """('unix', path) next to the data, or ('tcp', (host, port)) as a fallback"""
+    path = os.path.join(os.path.abspath(data_dir), SOCKET_NAME)
+    if hasattr(socket, 'AF_UNIX') and len(path) <= MAX_UNIX_PATH:
+        return ('unix', path)
+    port = int(os.environ.get('IOT_MONITOR_STREAM_PORT', DEFAULT_STREAM_PORT))
+    return ('tcp', ('127.0.0.1', port))
+
+
+def open_socket(address):
+    kind, target = address
+    family = socket.AF_UNIX if kind == 'unix' else socket.AF_INET
+    return socket.socket(family, socket.SOCK_STREAM), target
+
+
+def encode_reading(reading, seq):
+    """One newline-terminated JSON message; `seq` lets subscribers detect gaps"""
+    message = dict(reading, seq=seq)
+    timestamp = message.get('timestamp')
+    if isinstance(timestamp, datetime):
+        message['timestamp'] = timestamp.isoformat()
+    return (json.dumps(message) + '\n').encode()
+
+
+def decode_reading(line):
+    reading = json.loads(line)
+    if reading.get('timestamp'):
+        reading['timestamp'] = datetime.fromisoformat(reading['timestamp'])
+    return reading
+
+
+class StreamPublisher:
+    def __init__(self, address):
+        self.address = address
+        self.server = None
+        self.clients = []
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.thread = None
+
+    def start(self):
+        """Listen for subscribers; False if another process is already publishing"""
+        kind, target = self.address
+        if kind == 'unix' and os.path.exists(target):
+            if self.is_live():
+                logger.warning("📡 Live stream already published at %s", target)
+                return False
+            os.remove(target)  # Left behind by a process that did not shut down
+
+        server, target = open_socket(self.address)
+        try:
+            if kind == 'tcp':
+                server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind(target)
+            server.listen()
+        except OSError as e:
+            server.close()
+            logger.warning("📡 Live stream unavailable at %s: %s", target, e)
+            return False
+
+        self.server = server
+        self.thread = threading.Thread(target=self.accept_loop, name='stream-accept', daemon=True)
+        self.thread.start()
+        logger.info("📡 Publishing live readings on %s", target)
+        return True
+
+    def is_live(self):
+        sock, target = open_socket(self.address)
+        try:
+            sock.connect(target)
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.close()
+
+    def accept_loop(self):
+        while self.server:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return  # Server socket closed by stop()
+            # Never block ingest on a slow reader
+            client.setblocking(False)
+            with self.lock:
+                self.clients.append(client)
+                SUBSCRIBERS.set(len(self.clients))
+            logger.debug("Live stream subscriber connected (%d total)", len(self.clients))
+
+    def publish(self, reading):
+        """Send one reading to every subscriber; called from the collection thread"""
+        if not self.clients:
+            return
+        self.seq += 1
+        payload = encode_reading(reading, self.seq)
+
+        with self.lock:
+            dropped = []
+            for client in self.clients:
+                try:
+                    sent = client.send(payload)
+                    if sent < len(payload):
+                        raise BlockingIOError  # Partial line; the reader is too far behind
+                except (BlockingIOError, OSError) as e:
+                    if isinstance(e, BlockingIOError):
+                        SUBSCRIBERS_DROPPED.inc()
+                        logger.warning("📡 Dropping live stream subscriber that fell behind")
+                    dropped.append(client)
+            for client in dropped:
+                self.clients.remove(client)
+                client.close()
+            SUBSCRIBERS.set(len(self.clients))
+        READINGS_PUBLISHED.inc()
+
+    def stop(self):
+        server, self.server = self.server, None
+        if server is None:
+            return
+        server.close()
+        with self.lock:
+            for client in self.clients:
+                client.close()
+            self.clients = []
+            SUBSCRIBERS.set(0)
+        kind, target = self.address
+        if kind == 'unix':
+            try:
+                os.remove(target)
+            except FileNotFoundError:
+                pass
+
+
+def subscribe(address, idle_timeout=None):
+    """Yield readings as they are published
+
+    With `idle_timeout`, None is yielded whenever no reading arrived for that
+    many seconds so callers can do housekeeping. Raises OSError if nothing is
+    publishing; returns when the publisher goes away.
+    """
+    sock, target = open_socket(address)
+    try:
+        sock.connect(target)
+        sock.settimeout(idle_timeout)
+        buffer = b''
+        while True:
+            try:
+                chunk = sock.recv(65536)
+            except socket.timeout:
+                yield None
+                continue
+            if not chunk:
+                return
+            buffer += chunk
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                yield decode_reading(line)
+    finally:
+        sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print live readings as JSON lines")
+    parser.add_argument('--data-dir', default=None, help="IoT_Data directory of the publishing process")
+    args = parser.parse_args(argv)
+
+    from data.data_manager import resolve_data_dir
+    address = stream_address(args.data_dir or resolve_data_dir())
+    try:
+        for reading in subscribe(address):
+            reading['timestamp'] = reading['timestamp'].isoformat() if reading.get('timestamp') else None
+            print(json.dumps(reading), flush=True)
+    except OSError as e:
+        print(f"❌ No live stream at {address[1]}: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
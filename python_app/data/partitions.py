@@ -0,0 +1,594 @@
+"""
+Partitions - Monthly database files for sensor readings
+
+Readings are stored in one SQLite file per calendar month
+(sensor_data_partitions/readings_YYYY-MM.db next to sensor_data.db), chosen by
+PartitionRouter. Range queries open only the months they overlap, a month is
+dropped by deleting its file, and months that have ended are sealed:
+checkpointed out of WAL mode, compressed into chunks (data/compression.py) and
+made read-only, so their contents (and cache keys built from them) stay fixed
+and backups only need to copy them once.
+
+Readings stored before partitioning stay in sensor_data.db's sensor_readings
+table, which is read as one more (legacy) partition until moved with --migrate.
+
+Demo readings are kept apart from real ones in their own month files
+(sensor_data_demo_partitions/), so history, statistics and model training
+never scan them, and a demo run is purged by deleting its files (--purge-demo).
+A router reads one source ('real' or 'demo') or both ('all'); legacy readings
+predate the split and count as real.
+
+Example:
+    python data/partitions.py --list
+    python data/partitions.py --migrate
+    python data/partitions.py --compress    # months sealed before compression existed
+    python data/partitions.py --purge-demo
+"""
+
+import argparse
+import glob
+import heapq
+import itertools
+import operator
+import os
+import sqlite3
+import stat
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.metrics import metrics
+from utils.logger import get_logger
+
+logger = get_logger('partitions')
+
+# Rows fetched per step while streaming a partition
+FETCH_ROWS = 5000
+
+# Seconds between retries when a finished month could not be sealed (still open elsewhere)
+SEAL_RETRY = 60
+
+# Where readings come from; routers read one source or 'all'
+SOURCES = ('real', 'demo')
+READ_SOURCES = SOURCES + ('all',)
+
+PARTITIONS_OPENED = metrics.counter('iot_partitions_opened_total', 'Partition files opened for reading')
+PARTITIONS_SEALED = metrics.counter('iot_partitions_sealed_total', 'Finished months made read-only')
+
+
+def init_reading_table(conn, schema='main'):
+    """Create sensor_readings and its time index (shared with import_cli)"""
+    # Only takes effect in a new database; lets retention shrink the file
+    conn.execute(f'PRAGMA {schema}.auto_vacuum = INCREMENTAL')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {schema}.sensor_readings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            voltage REAL NOT NULL,
+            temperature REAL NOT NULL,
+            current REAL NOT NULL
+        )
+    ''')
+
+    # Range queries (history pages, API) seek by time instead of scanning
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_readings_timestamp ON sensor_readings (timestamp)')
+
+
+def merge_rollups(first, second):
+    """One rollup row (bucket, count, avg/min/max per channel) from two partial rows of a bucket"""
+    count = first[1] + second[1]
+    merged = [first[0], count]
+    for i in range(2, len(first), 3):
+        merged += [(first[i] * first[1] + second[i] * second[1]) / count,
+                   min(first[i + 1], second[i + 1]),
+                   max(first[i + 2], second[i + 2])]
+    return tuple(merged)
+
+
+def partition_dir(db_path, source='real'):
+    stem = os.path.splitext(db_path)[0]
+    return stem + '_partitions' if source == 'real' else f'{stem}_{source}_partitions'
+
+
+def partition_key(timestamp):
+    """'YYYY-MM' month of a datetime or stored timestamp string"""
+    return str(timestamp)[:7]
+
+
+def month_start(key):
+    return f'{key}-01 00:00:00'
+
+
+def next_key(key):
+    year, month = int(key[:4]), int(key[5:7])
+    return f'{year + month // 12:04d}-{month % 12 + 1:02d}'
+
+
+class Partition:
+    """One month file, or the legacy table in the main database"""
+
+    def __init__(self, key, path, start, end, legacy=False, source='real'):
+        self.key = key
+        self.path = path
+        self.start = start
+        # Exclusive for months; the newest stored timestamp for the legacy table
+        self.end = end
+        self.legacy = legacy
+        self.source = source
+
+    def __repr__(self):
+        return f'Partition({self.name!r})'
+
+    @property
+    def name(self):
+        """Key, prefixed with the source unless real (unique across sources)"""
+        return self.key if self.source == 'real' else f'{self.source}/{self.key}'
+
+    @property
+    def sealed(self):
+        # Mode bits rather than os.access, which is always true for root
+        return not self.legacy and not os.stat(self.path).st_mode & stat.S_IWUSR
+
+    def overlaps(self, start=None, end=None):
+        """True if the partition can hold readings in [start, end)"""
+        if end is not None and self.start >= end:
+            return False
+        if start is not None and (self.end < start if self.legacy else self.end <= start):
+            return False
+        return True
+
+
+class PartitionRouter:
+    def __init__(self, db_path, source='real'):
+        if source not in READ_SOURCES:
+            raise ValueError(f"source must be one of {', '.join(READ_SOURCES)}, got {source!r}")
+        self.db_path = db_path
+        self.source = source
+        self.sources = SOURCES if source == 'all' else (source,)
+        # Where this router writes; an 'all' router only reads
+        self.directory = None if source == 'all' else partition_dir(db_path, source)
+        self.active_key = None
+        self.unsealed_since = None
+        self.seal_thread = None
+        # Sealed months reopened for late readings, sealed again by the seal thread
+        self.reopened = set()
+        # Per-month locks: a month is never written while it is being sealed
+        self.month_locks = {}
+        self.month_locks_guard = threading.Lock()
+
+    def path(self, key, source=None):
+        return os.path.join(partition_dir(self.db_path, source or self.source), f'readings_{key}.db')
+
+    def partition(self, key, source=None):
+        source = source or self.source
+        return Partition(key, self.path(key, source), month_start(key), month_start(next_key(key)),
+                         source=source)
+
+    def legacy_partition(self):
+        """sensor_readings in the main database, if it still holds readings (read as real)"""
+        if 'real' not in self.sources or not os.path.exists(self.db_path):
+            return None
+        conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
+        try:
+            first, last = conn.execute('SELECT MIN(timestamp), MAX(timestamp) FROM sensor_readings').fetchone()
+        except sqlite3.OperationalError:
+            return None  # No table: created after partitioning, or migrated
+        finally:
+            conn.close()
+        if first is None:
+            return None
+        return Partition('legacy', self.db_path, first, last, legacy=True)
+
+    def partitions(self, start=None, end=None):
+        """Partitions overlapping [start, end), oldest first"""
+        found = []
+        legacy = self.legacy_partition()
+        if legacy and legacy.overlaps(start, end):
+            found.append(legacy)
+        months = []
+        for source in self.sources:
+            for path in glob.glob(os.path.join(partition_dir(self.db_path, source), 'readings_????-??.db')):
+                partition = self.partition(os.path.basename(path)[9:16], source)
+                if partition.overlaps(start, end):
+                    months.append(partition)
+        # Equal months of different sources end up next to each other and are merged by select()
+        return found + sorted(months, key=lambda partition: (partition.key, partition.source))
+
+    def connect(self, partition):
+        """Read-only connection, usable from one thread at a time"""
+        PARTITIONS_OPENED.inc()
+        return sqlite3.connect(f'file:{partition.path}?mode=ro', uri=True, check_same_thread=False)
+
+    def compacted(self, partition, conn):
+        """True if a sealed month holds compressed chunks instead of rows"""
+        if not partition.sealed:
+            return False
+        from data.compression import is_compacted  # NumPy only once a month has been sealed
+        return is_compacted(conn)
+
+    def is_compressed(self, partition):
+        conn = self.connect(partition)
+        try:
+            return self.compacted(partition, conn)
+        finally:
+            conn.close()
+
+    def range_clause(self, start, end):
+        clauses, args = [], []
+        if start is not None:
+            clauses.append('timestamp >= ?')
+            args.append(start)
+        if end is not None:
+            clauses.append('timestamp < ?')
+            args.append(end)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ''), args
+
+    def rows(self, partition, start, end, descending, limit):
+        """Stream matching rows of one partition (opened on first use)"""
+        where, args = self.range_clause(start, end)
+        order = 'DESC' if descending else 'ASC'
+
+        conn = self.connect(partition)
+        try:
+            if self.compacted(partition, conn):
+                from data.compression import chunk_rows
+                yield from itertools.islice(chunk_rows(conn, start, end, descending), limit)
+                return
+            cursor = conn.execute(f'''
+                SELECT timestamp, voltage, temperature, current
+                FROM sensor_readings {where}
+                ORDER BY timestamp {order}, id {order}
+                LIMIT ?
+            ''', args + [-1 if limit is None else limit])
+            while True:
+                rows = cursor.fetchmany(FETCH_ROWS)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def select(self, start=None, end=None, descending=False, limit=None):
+        """(timestamp, voltage, temperature, current) rows in [start, end) across partitions in time order
+
+        Months are read one after another, so a LIMIT stops before opening
+        older (or newer) files than it needs.
+        """
+        partitions = self.partitions(start, end)
+        legacy = next((partition for partition in partitions if partition.legacy), None)
+
+        def group_key(partition):
+            # The legacy table is merged with the months it overlaps (written after the upgrade)
+            if legacy and (partition.legacy or partition_key(legacy.start) <= partition.key <= partition_key(legacy.end)):
+                return partition_key(legacy.start)
+            return partition.key
+
+        groups = [list(group) for _, group in itertools.groupby(sorted(partitions, key=group_key), key=group_key)]
+        if descending:
+            groups.reverse()
+        opened = []
+
+        def group_rows(group):
+            streams = [self.rows(partition, start, end, descending, limit) for partition in group]
+            opened.extend(streams)
+            if len(streams) == 1:
+                return streams[0]
+            return heapq.merge(*streams, key=operator.itemgetter(0), reverse=descending)
+
+        try:
+            yield from itertools.islice(itertools.chain.from_iterable(map(group_rows, groups)), limit)
+        finally:
+            for stream in opened:
+                stream.close()
+
+    def latest(self):
+        """Newest stored (timestamp, voltage, temperature, current), or None"""
+        return next(self.select(descending=True, limit=1), None)
+
+    def count(self, partitions=None):
+        """Readings stored in `partitions` (default: all)"""
+        total = 0
+        for partition in self.partitions() if partitions is None else partitions:
+            conn = self.connect(partition)
+            try:
+                if self.compacted(partition, conn):
+                    total += conn.execute('SELECT SUM(count) FROM reading_chunks').fetchone()[0] or 0
+                else:
+                    total += conn.execute('SELECT COUNT(*) FROM sensor_readings').fetchone()[0]
+            finally:
+                conn.close()
+        return total
+
+    def rollups(self, partition, bucket_seconds, start=None, end=None):
+        """(bucket, count, avg/min/max per channel) rows of one partition, in bucket order"""
+        conn = self.connect(partition)
+        try:
+            if self.compacted(partition, conn):
+                from data.compression import aggregate
+                return aggregate(conn, bucket_seconds, start, end)
+            where, args = self.range_clause(start, end)
+            return conn.execute(f'''
+                SELECT datetime(CAST(strftime('%s', timestamp) AS INTEGER) / ? * ?, 'unixepoch') AS bucket,
+                       COUNT(*),
+                       AVG(voltage), MIN(voltage), MAX(voltage),
+                       AVG(temperature), MIN(temperature), MAX(temperature),
+                       AVG(current), MIN(current), MAX(current)
+                FROM sensor_readings {where}
+                GROUP BY bucket
+                ORDER BY bucket
+            ''', [bucket_seconds, bucket_seconds] + args).fetchall()
+        finally:
+            conn.close()
+
+    def version(self, start=None, end=None):
+        """Changes whenever readings in [start, end) may have changed
+
+        Sealed months contribute only their name and file stamp, so queries over
+        finished months keep the same version while new readings arrive. Open
+        ones use their id range: MAX(id) moves on inserts, MIN(id) when
+        retention deletes the oldest readings of the legacy table.
+        """
+        parts = []
+        for partition in self.partitions(start, end):
+            if partition.sealed:
+                info = os.stat(partition.path)
+                parts.append(f'{partition.name}@{info.st_mtime_ns}:{info.st_size}')
+                continue
+            conn = self.connect(partition)
+            try:
+                low, high = conn.execute('SELECT MIN(id), MAX(id) FROM sensor_readings').fetchone()
+                parts.append(f'{partition.name}:{low}-{high}')
+            finally:
+                conn.close()
+        return ','.join(parts)
+
+    # --- writing ---
+
+    def create(self, key):
+        """Month file with the readings schema in WAL mode; returns its path"""
+        if self.directory is None:
+            raise ValueError("readings are written to one source ('real' or 'demo'), not 'all'")
+        path = self.path(key)
+        if not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(path)
+            try:
+                init_reading_table(conn)
+                conn.execute('PRAGMA journal_mode=WAL')  # Readers never block the writer
+                conn.commit()
+            finally:
+                conn.close()
+            logger.info("🗂️ New partition %s", path)
+        return path
+
+    def month_lock(self, path):
+        with self.month_locks_guard:
+            return self.month_locks.setdefault(path, threading.Lock())
+
+    def insert(self, rows):
+        """Write (timestamp, voltage, temperature, current) rows, one transaction per month
+
+        Rows for a month that is already sealed (journal replay, a raw log
+        backlog, the clock stepping back) reopen it, as imports do; the seal
+        thread compresses it again afterwards.
+        """
+        months = {}
+        for row in rows:
+            months.setdefault(partition_key(row[0]), []).append(row)
+
+        for key, month_rows in sorted(months.items()):
+            path = self.create(key)
+            with self.month_lock(path):
+                partition = self.partition(key)
+                if partition.sealed:
+                    logger.info("🔓 Reopening sealed partition %s for %d late readings",
+                                partition.name, len(month_rows))
+                    self.unseal(partition)
+                    self.reopened.add(key)
+                conn = sqlite3.connect(path)
+                try:
+                    conn.executemany('''
+                        INSERT INTO sensor_readings (timestamp, voltage, temperature, current)
+                        VALUES (?, ?, ?, ?)
+                    ''', month_rows)
+                    conn.commit()
+                finally:
+                    conn.close()
+
+        newest = max(months) if months else None
+        if newest and (newest != self.active_key or self.seal_due() or self.reopened):
+            self.active_key = max(newest, self.active_key or newest)
+            # Compressing a finished month takes seconds; keep it off the collection thread
+            if self.seal_thread is None or not self.seal_thread.is_alive():
+                self.seal_thread = threading.Thread(target=self.seal_before, args=(self.active_key,),
+                                                    name='seal', daemon=True)
+                self.seal_thread.start()
+
+    def seal_due(self):
+        return self.unsealed_since is not None and time.monotonic() - self.unsealed_since >= SEAL_RETRY
+
+    def seal_before(self, key):
+        """Seal every month before `key`, and reopened months; returns how many were sealed"""
+        sealed = 0
+        self.unsealed_since = None
+        reopened, self.reopened = self.reopened, set()
+        partitions = self.partitions(end=month_start(key))
+        partitions += [self.partition(other) for other in sorted(reopened) if other >= key]
+        for partition in partitions:
+            if partition.legacy or partition.sealed:
+                continue
+            try:
+                self.seal(partition)
+                sealed += 1
+            except sqlite3.OperationalError as e:
+                # A reader in another process still has it open in WAL mode; try again later
+                logger.debug("Could not seal %s yet: %s", partition.path, e)
+                self.unsealed_since = time.monotonic()
+                if partition.key >= key:
+                    self.reopened.add(partition.key)
+        return sealed
+
+    def seal(self, partition):
+        """Checkpoint out of WAL mode, compress into chunks and make the file read-only"""
+        with self.month_lock(partition.path):
+            conn = sqlite3.connect(partition.path, isolation_level=None, timeout=1)
+            try:
+                mode = conn.execute('PRAGMA journal_mode=DELETE').fetchone()[0]
+                if mode != 'delete':
+                    raise sqlite3.OperationalError(f"journal mode stayed {mode}")
+                try:
+                    from data.compression import compact, is_compacted
+                    if not is_compacted(conn):
+                        start = time.perf_counter()
+                        before = os.path.getsize(partition.path)
+                        readings = compact(conn)
+                        logger.info("🗜️ Compressed %s: %d readings, %.1f -> %.1f MB in %.1fs", partition.name,
+                                    readings, before / 1e6, os.path.getsize(partition.path) / 1e6,
+                                    time.perf_counter() - start)
+                except (ImportError, ValueError) as e:
+                    # Still sealed; the month is just kept as plain rows
+                    logger.warning("Partition %s left uncompressed: %s", partition.name, e)
+            finally:
+                conn.close()
+            os.chmod(partition.path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            PARTITIONS_SEALED.inc()
+            logger.info("🔒 Sealed partition %s", partition.name)
+
+    def unseal(self, partition):
+        """Make a sealed month writable rows again (imports of old data); seal() re-compresses it"""
+        os.chmod(partition.path, stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IROTH)
+        conn = sqlite3.connect(partition.path, isolation_level=None, timeout=30)
+        try:
+            from data.compression import expand, is_compacted
+            if is_compacted(conn):
+                expand(conn)
+        except ImportError:
+            pass  # Without NumPy nothing was compressed
+        finally:
+            conn.close()
+
+    def drop(self, partition):
+        """Delete a month: one file removal instead of a row-by-row DELETE"""
+        if partition.legacy:
+            raise ValueError("the legacy table is expired row by row, not dropped")
+        for path in (partition.path, partition.path + '-wal', partition.path + '-shm'):
+            if os.path.exists(path):
+                os.chmod(path, stat.S_IRUSR | stat.S_IWUSR)  # Windows will not remove read-only files
+                os.remove(path)
+        logger.info("🗑️ Dropped partition %s", partition.name)
+
+    def purge(self):
+        """Drop every month of this router's source(s); returns the readings removed"""
+        partitions = [partition for partition in self.partitions() if not partition.legacy]
+        readings = self.count(partitions)
+        for partition in partitions:
+            self.drop(partition)
+        return readings
+
+    def migrate_legacy(self, progress=None):
+        """Move the legacy table into month files; safe to re-run after an interruption"""
+        legacy = self.legacy_partition()
+        if legacy is None:
+            return 0
+        moved = 0
+        key = partition_key(legacy.start)
+        current = partition_key(datetime.now())
+        conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+        try:
+            while key <= partition_key(legacy.end):
+                partition = self.partition(key)
+                self.create(key)
+                was_sealed = partition.sealed
+                if was_sealed:
+                    self.unseal(partition)
+                conn.execute('ATTACH DATABASE ? AS part', (partition.path,))
+                try:
+                    conn.execute('BEGIN IMMEDIATE')
+                    try:
+                        # Rows copied before an interruption are already there
+                        rows = conn.execute('''
+                            INSERT INTO part.sensor_readings (timestamp, voltage, temperature, current)
+                            SELECT timestamp, voltage, temperature, current
+                            FROM main.sensor_readings r
+                            WHERE r.timestamp >= ? AND r.timestamp < ?
+                              AND NOT EXISTS (SELECT 1 FROM part.sensor_readings p WHERE p.timestamp = r.timestamp)
+                            ORDER BY r.timestamp
+                        ''', (partition.start, partition.end)).rowcount
+                        conn.execute('DELETE FROM main.sensor_readings WHERE timestamp >= ? AND timestamp < ?',
+                                     (partition.start, partition.end))
+                        conn.execute('COMMIT')
+                    except BaseException:
+                        conn.execute('ROLLBACK')
+                        raise
+                finally:
+                    conn.execute('DETACH DATABASE part')
+                if was_sealed or key < current:
+                    self.seal(partition)
+                moved += rows
+                if progress:
+                    progress(key, rows)
+                key = next_key(key)
+
+            if conn.execute('SELECT COUNT(*) FROM sensor_readings').fetchone()[0] == 0:
+                conn.execute('DROP TABLE sensor_readings')
+        finally:
+            conn.close()
+        return moved
+
+
+def main(argv=None):
+    from data.data_manager import resolve_data_dir
+
+    parser = argparse.ArgumentParser(description="Inspect or migrate the monthly reading partitions")
+    parser.add_argument('--db', default=None, help="database (default: IoT_Data/sensor_data.db)")
+    parser.add_argument('--list', action='store_true', help="show partitions with row counts and sizes")
+    parser.add_argument('--migrate', action='store_true',
+                        help="move readings from the main database's sensor_readings into month files")
+    parser.add_argument('--compress', action='store_true',
+                        help="seal and compress every finished month that is not compressed yet")
+    parser.add_argument('--purge-demo', action='store_true',
+                        help="delete every demo reading (and demo gaps); real readings are untouched")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(resolve_data_dir(), 'sensor_data.db')
+    router = PartitionRouter(db_path)
+    if args.purge_demo:
+        from data.ingest_index import purge_gaps
+        readings = PartitionRouter(db_path, 'demo').purge()
+        print(f"✅ Purged {readings} demo readings and {purge_gaps(db_path, 'demo')} demo gaps")
+
+    # Listing and compression cover real and demo months alike
+    router_all = PartitionRouter(db_path, 'all')
+    if args.migrate:
+        start = time.perf_counter()
+        moved = router.migrate_legacy(lambda key, rows: print(f"  ✓ {key}: {rows} readings"))
+        print(f"✅ Moved {moved} readings into {router.directory} in {time.perf_counter() - start:.2f}s")
+
+    if args.compress:
+        current = partition_key(datetime.now())
+        for partition in router_all.partitions():
+            if partition.legacy or partition.key >= current or router_all.is_compressed(partition):
+                continue
+            if partition.sealed:
+                router_all.unseal(partition)
+            router_all.seal(partition)
+            print(f"  ✓ {partition.name}: {os.path.getsize(partition.path) / 1e6:.1f} MB")
+
+    if args.list or not (args.migrate or args.compress or args.purge_demo):
+        for partition in router_all.partitions():
+            rows = router_all.count([partition])
+            size = os.path.getsize(partition.path)
+            if partition.legacy:
+                state = 'legacy'
+            elif partition.sealed:
+                state = 'compressed' if router_all.is_compressed(partition) else 'sealed'
+            else:
+                state = 'open'
+            print(f"  {partition.name:13} {state:10} {rows:>10} readings {size / 1e6:8.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
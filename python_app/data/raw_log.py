@@ -0,0 +1,408 @@
+"""
+Raw Log - Append-only, memory-mapped binary log of raw readings
+
+For high-rate capture DataManager can write every reading to this log instead
+of batching SQLite inserts: an append is one fixed-size record stored into an
+np.memmap, no syscall. The log is compacted into the monthly partitions
+(data/partitions.py) on the normal flush schedule; demo records (device 0)
+go to the demo partitions.
+
+Layout: IoT_Data/raw_log/segment_NNNNNNNN.bin, each a 64-byte header (magic,
+version, record size, capacity, count, synced, compacted) followed by
+`capacity` records of RECORD_DTYPE. The writer stores a record and then bumps
+`count`, so readers in any process only trust records below `count`. `synced`
+is how far the file has been flushed to disk (every `sync_interval` seconds,
+by appends and by DataManager's compactor thread when capture goes idle);
+after a power cut a segment is trimmed to its last written record. Segments
+are deleted once they are full and every record is in SQLite.
+
+RawLogReader maps the segments read-only. Exports and history queries use it
+for the readings newer than the partitions hold, i.e. those still waiting for
+the next compaction.
+
+Example:
+    python data/raw_log.py --list
+    python data/raw_log.py --compact
+"""
+
+import argparse
+import glob
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.metrics import metrics
+from utils.logger import get_logger
+from data.shared_ring import EPOCH, device_id
+
+logger = get_logger('raw_log')
+
+MAGIC = 0x494F544C  # 'IOTL'
+VERSION = 1
+
+# 1M records (40 MB) per segment file
+SEGMENT_RECORDS = 1 << 20
+
+# Seconds between flushes of the mapped pages to disk
+DEFAULT_SYNC_INTERVAL = 1.0
+
+# Records per SQLite transaction when compacting
+COMPACT_ROWS = 50000
+
+HEADER_DTYPE = np.dtype([
+    ('magic', '<u4'),
+    ('version', '<u4'),
+    ('record_size', '<u4'),
+    ('reserved', '<u4'),
+    ('capacity', '<u8'),
+    ('count', '<u8'),
+    ('synced', '<u8'),
+    ('compacted', '<u8')
+])
+HEADER_SIZE = 64
+
+# Local wall-clock microseconds since 1970-01-01, like the stored timestamps
+RECORD_DTYPE = np.dtype([
+    ('timestamp_us', '<i8'),
+    ('device', '<u4'),
+    ('voltage', '<f8'),
+    ('temperature', '<f8'),
+    ('current', '<f8')
+], align=True)
+
+RAW_LOG_APPENDS = metrics.counter('iot_raw_log_records_total', 'Readings appended to the raw binary log')
+RAW_LOG_COMPACTED = metrics.counter('iot_raw_log_compacted_total', 'Raw log records moved into SQLite')
+RAW_LOG_SYNC_SECONDS = metrics.histogram('iot_raw_log_sync_seconds', 'Time to flush the raw log to disk')
+
+
+def raw_log_dir(data_dir):
+    return os.path.join(data_dir, 'raw_log')
+
+
+def to_microseconds(timestamp):
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+
+class Segment:
+    """One segment file mapped with np.memmap (read-only unless `writable`)"""
+
+    def __init__(self, path, writable=False):
+        self.path = path
+        self.writable = writable
+        mode = 'r+' if writable else 'r'
+        self.header_map = np.memmap(path, dtype=HEADER_DTYPE, mode=mode, shape=())
+        header = self.header_map.view(np.ndarray)
+        if header['magic'] != MAGIC or header['version'] != VERSION \
+                or header['record_size'] != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{path} is not an IoT Monitor raw log segment")
+        self.capacity = int(header['capacity'])
+        self.records_map = np.memmap(path, dtype=RECORD_DTYPE, mode=mode, offset=HEADER_SIZE,
+                                     shape=(self.capacity,))
+        # Plain ndarray views of the same pages: indexing a memmap subclass
+        # costs more than the record write itself
+        self.header = header
+        self.records = self.records_map.view(np.ndarray)
+
+    @classmethod
+    def create(cls, path, capacity):
+        """New zero-filled (sparse) segment"""
+        with open(path, 'xb') as f:
+            f.truncate(HEADER_SIZE + capacity * RECORD_DTYPE.itemsize)
+        header = np.memmap(path, dtype=HEADER_DTYPE, mode='r+', shape=())
+        header['record_size'] = RECORD_DTYPE.itemsize
+        header['capacity'] = capacity
+        header['version'] = VERSION
+        header['magic'] = MAGIC
+        header.flush()
+        del header
+        return cls(path, writable=True)
+
+    @property
+    def count(self):
+        return int(self.header['count'])
+
+    @property
+    def compacted(self):
+        return int(self.header['compacted'])
+
+    def view(self, start=0, stop=None):
+        """Zero-copy view of written records; aliases the file, copy anything kept"""
+        count = self.count
+        return self.records[start:count if stop is None else min(stop, count)]
+
+    def recover(self):
+        """Drop records past the last sync that never reached the disk (timestamp still 0)"""
+        synced, count = int(self.header['synced']), self.count
+        unwritten = np.flatnonzero(self.records['timestamp_us'][synced:count] == 0)
+        if len(unwritten):
+            logger.warning("⚠️ Raw log %s: %d records lost before the last sync",
+                           os.path.basename(self.path), count - synced - int(unwritten[0]))
+            self.header['count'] = synced + int(unwritten[0])
+
+    def sync(self):
+        """Flush records, then the header that makes them count as synced"""
+        count = self.count
+        self.records_map.flush()
+        self.header['synced'] = count
+        self.header_map.flush()
+
+    def close(self):
+        if self.writable:
+            self.sync()
+        # The file is unmapped once no reader view is left
+        self.header = self.records = self.header_map = self.records_map = None
+
+
+def segment_paths(directory):
+    return sorted(glob.glob(os.path.join(directory, 'segment_????????.bin')))
+
+
+class RawLog:
+    """Single writer of the raw log in `directory`"""
+
+    def __init__(self, directory, segment_records=SEGMENT_RECORDS, sync_interval=DEFAULT_SYNC_INTERVAL):
+        self.directory = directory
+        self.segment_records = segment_records
+        self.sync_interval = sync_interval
+        self.lock = threading.Lock()
+        self.compact_lock = threading.Lock()  # Flushes run on more than one thread
+        self.last_sync = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+
+        # Earlier segments are only reopened for compaction
+        self.segments = [Segment(path, writable=True) for path in segment_paths(directory)]
+        for segment in self.segments:
+            segment.recover()
+        # A crash may have come between a batch's commit and its mark: the first
+        # batch of these is checked against what the partitions already hold
+        self.unverified = {segment.path for segment in self.segments if segment.compacted < segment.count}
+        if not self.segments or self.active.count >= self.active.capacity:
+            self.rotate()
+
+    @property
+    def active(self):
+        return self.segments[-1]
+
+    def rotate(self):
+        number = 1
+        if self.segments:
+            self.active.sync()
+            number = int(os.path.basename(self.active.path)[8:16]) + 1
+        path = os.path.join(self.directory, f'segment_{number:08d}.bin')
+        self.segments.append(Segment.create(path, self.segment_records))
+
+    def append(self, timestamp, port, voltage, temperature, current):
+        """Store one reading (port None for demo data)"""
+        with self.lock:
+            segment = self.active
+            count = segment.count
+            if count >= segment.capacity:
+                self.rotate()
+                segment, count = self.active, 0
+            segment.records[count] = (to_microseconds(timestamp), device_id(port), voltage, temperature, current)
+            segment.header['count'] = count + 1
+        RAW_LOG_APPENDS.inc()
+        self.sync_if_due()
+
+    def append_many(self, records):
+        """Store a RECORD_DTYPE array (bursts from a fast source) with one copy per segment"""
+        with self.lock:
+            written = 0
+            while written < len(records):
+                segment = self.active
+                count = segment.count
+                if count >= segment.capacity:
+                    self.rotate()
+                    continue
+                take = min(len(records) - written, segment.capacity - count)
+                segment.records[count:count + take] = records[written:written + take]
+                segment.header['count'] = count + take
+                written += take
+        RAW_LOG_APPENDS.inc(len(records))
+        self.sync_if_due()
+
+    def sync(self):
+        with self.lock:
+            with RAW_LOG_SYNC_SECONDS.time():
+                self.active.sync()
+            self.last_sync = time.monotonic()
+
+    def sync_if_due(self):
+        """Flush to disk if `sync_interval` has passed since the last flush"""
+        if time.monotonic() - self.last_sync >= self.sync_interval:
+            self.sync()
+
+    @property
+    def pending(self):
+        """Records not yet compacted into SQLite"""
+        with self.lock:
+            return sum(segment.count - segment.compacted for segment in self.segments)
+
+    def compact(self, router, demo_router=None, batch_rows=COMPACT_ROWS):
+        """Move every uncompacted record into the partitions; returns records moved
+
+        Demo records go to `demo_router` (`router` too if None). A segment's
+        `compacted` mark is advanced after each committed batch; a crash in
+        between leaves one batch that is compacted again on the next start,
+        minus the readings already stored.
+        """
+        with self.compact_lock:
+            moved = 0
+            for segment in list(self.segments):
+                while True:
+                    start = segment.compacted
+                    records = segment.view(start, start + batch_rows)
+                    if not len(records):
+                        break
+                    verify = segment.path in self.unverified
+                    demo = records['device'] == 0
+                    if demo_router is None or not demo.any():
+                        self.insert(router, records, verify)
+                    elif demo.all():
+                        self.insert(demo_router, records, verify)
+                    else:
+                        self.insert(router, records[~demo], verify)
+                        self.insert(demo_router, records[demo], verify)
+                    self.unverified.discard(segment.path)
+                    with self.lock:
+                        segment.header['compacted'] = start + len(records)
+                        segment.header_map.flush()
+                    moved += len(records)
+                self.retire(segment)
+        RAW_LOG_COMPACTED.inc(moved)
+        return moved
+
+    def insert(self, router, records, verify=False):
+        """Write records to a router; with `verify`, skip readings it already stores"""
+        from data.compression import to_timestamp_strings
+
+        timestamps = to_timestamp_strings(records['timestamp_us']).tolist()
+        rows = list(zip(timestamps, records['voltage'].tolist(),
+                        records['temperature'].tolist(), records['current'].tolist()))
+        if verify:
+            first, last = int(records['timestamp_us'].min()), int(records['timestamp_us'].max())
+            start, end = to_timestamp_strings(np.array([first, last + 1], dtype=np.int64)).tolist()
+            stored = {row[0] for row in router.select(start, end)}
+            if stored:
+                rows = [row for row in rows if row[0] not in stored]
+                logger.info("♻️ Raw log: %d readings of an interrupted compaction were already stored",
+                            len(records) - len(rows))
+        router.insert(rows)
+
+    def retire(self, segment):
+        """Delete a segment that is full and fully compacted"""
+        with self.lock:
+            if segment is self.active or segment.compacted < segment.capacity:
+                return
+            self.segments.remove(segment)
+        segment.close()
+        try:
+            os.remove(segment.path)
+        except OSError as e:
+            # Windows keeps files mapped by a reader; retried after the next compaction
+            logger.debug("Raw log segment %s kept: %s", segment.path, e)
+            self.segments.insert(0, Segment(segment.path, writable=True))
+
+    def close(self):
+        with self.lock:
+            for segment in self.segments:
+                segment.close()
+            self.segments = []
+
+
+class RawLogReader:
+    """Read-only access from any process: memmap views of the written records"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def segments(self):
+        found = []
+        for path in segment_paths(self.directory):
+            try:
+                found.append(Segment(path))
+            except (OSError, ValueError):
+                pass  # Deleted after compaction or still being created
+        return found
+
+    def latest(self, count):
+        """Up to `count` newest records, oldest first (a view unless they span segments)"""
+        parts = []
+        for segment in reversed(self.segments()):
+            records = segment.view()
+            parts.insert(0, records[max(0, len(records) - count):])
+            count -= len(parts[0])
+            if count <= 0:
+                break
+        if not parts:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def since(self, timestamp_us):
+        """Views of every record at or after `timestamp_us`, one per segment"""
+        views = []
+        for segment in self.segments():
+            records = segment.view()
+            if len(records) and records['timestamp_us'][-1] >= timestamp_us:
+                views.append(records[np.searchsorted(records['timestamp_us'], timestamp_us):])
+        return views
+
+    def rows_after(self, timestamp=None, source='real'):
+        """(timestamp, voltage, temperature, current) rows of records newer than a stored timestamp
+
+        Filtered on the memmap views; only the selected records are converted
+        to the stored row form. `source` is 'real', 'demo' or 'all'.
+        """
+        from data.compression import to_timestamp_strings
+
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        rows = []
+        for records in self.since(0 if timestamp is None else to_microseconds(timestamp) + 1):
+            if source != 'all':
+                demo = records['device'] == 0
+                records = records[demo if source == 'demo' else ~demo]
+            if len(records):
+                rows.extend(zip(to_timestamp_strings(records['timestamp_us']).tolist(),
+                                records['voltage'].tolist(), records['temperature'].tolist(),
+                                records['current'].tolist()))
+        return rows
+
+
+def main(argv=None):
+    from data.data_manager import resolve_data_dir
+    from data.partitions import PartitionRouter
+
+    parser = argparse.ArgumentParser(description="Inspect or compact the raw binary log")
+    parser.add_argument('--data-dir', default=None, help="IoT_Data directory (default: next to the app)")
+    parser.add_argument('--list', action='store_true', help="show segments with record counts")
+    parser.add_argument('--compact', action='store_true',
+                        help="move uncompacted records into SQLite (stop the collector first)")
+    args = parser.parse_args(argv)
+
+    data_dir = args.data_dir or resolve_data_dir()
+    directory = raw_log_dir(data_dir)
+    if args.compact:
+        raw_log = RawLog(directory)
+        try:
+            start = time.perf_counter()
+            db_path = os.path.join(data_dir, 'sensor_data.db')
+            moved = raw_log.compact(PartitionRouter(db_path), PartitionRouter(db_path, 'demo'))
+            print(f"✓ Compacted {moved} records in {time.perf_counter() - start:.1f}s")
+        finally:
+            raw_log.close()
+
+    if args.list or not args.compact:
+        for segment in RawLogReader(directory).segments():
+            print(f"  {os.path.basename(segment.path)}  {segment.count:>9} records  "
+                  f"{int(segment.header['synced']):>9} synced  {segment.compacted:>9} compacted")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,435 @@
+"""
+Retention - Keeps sensor_readings bounded by rolling up and deleting old raw data
+
+Raw readings older than `raw_days` are aggregated into per-minute rows in
+sensor_rollups (kept for `rollup_days`, or forever) and then removed. Monthly
+partitions (data/partitions.py) go a whole month at a time, once all of it is
+past the cutoff: the month is rolled up from its read-only file and the file
+deleted. Demo months past the cutoff are just deleted: simulated readings
+are not worth rolling up. Readings in the legacy table are deleted one time
+window per transaction so the collector's writes are never blocked for long,
+and freed pages are returned to the OS with incremental vacuum. The API's
+/api/rollups and the Past Data history read ranges no raw reading covers any
+more back from sensor_rollups (load_rollups).
+
+Environment (GUI) or collector flags:
+    IOT_MONITOR_RAW_DAYS=30        # --raw-days
+    IOT_MONITOR_ROLLUP_DAYS=365    # --rollup-days (default: keep rollups)
+
+Example:
+    python data/retention.py --raw-days 30 --rollup-days 365 --vacuum
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.metrics import metrics
+from utils.logger import get_logger
+from data.partitions import PartitionRouter
+
+logger = get_logger('retention')
+
+# Rollup resolution, and how many buckets are moved per transaction
+BUCKET_SECONDS = 60
+BUCKETS_PER_BATCH = 60
+
+# Pause between batches so other writers get the lock
+BATCH_PAUSE = 0.05
+
+DEFAULT_INTERVAL = 3600
+
+EPOCH = datetime(1970, 1, 1)
+
+DB_SIZE_BYTES = metrics.gauge('iot_db_size_bytes', 'Size of the sensor database file')
+RETENTION_DELETED = metrics.counter('iot_retention_rows_deleted_total', 'Raw readings removed by retention')
+RETENTION_SECONDS = metrics.histogram('iot_retention_run_seconds', 'Time for one retention pass')
+
+# Per-bucket aggregates of the legacy table (:b = bucket seconds), in sensor_rollups column order
+ROLLUP_SELECT = '''
+    SELECT datetime(CAST(strftime('%s', timestamp) AS INTEGER) / :b * :b, 'unixepoch'),
+           :b, COUNT(*),
+           AVG(voltage), MIN(voltage), MAX(voltage),
+           AVG(temperature), MIN(temperature), MAX(temperature),
+           AVG(current), MIN(current), MAX(current)
+    FROM sensor_readings
+'''
+
+# A bucket split across passes (or partitions) is merged with a count-weighted average
+ROLLUP_MERGE = '''
+    ON CONFLICT(bucket) DO UPDATE SET
+        voltage_avg = (voltage_avg * count + excluded.voltage_avg * excluded.count)
+                      / (count + excluded.count),
+        temperature_avg = (temperature_avg * count + excluded.temperature_avg * excluded.count)
+                          / (count + excluded.count),
+        current_avg = (current_avg * count + excluded.current_avg * excluded.count)
+                      / (count + excluded.count),
+        voltage_min = MIN(voltage_min, excluded.voltage_min),
+        voltage_max = MAX(voltage_max, excluded.voltage_max),
+        temperature_min = MIN(temperature_min, excluded.temperature_min),
+        temperature_max = MAX(temperature_max, excluded.temperature_max),
+        current_min = MIN(current_min, excluded.current_min),
+        current_max = MAX(current_max, excluded.current_max),
+        count = count + excluded.count
+'''
+
+
+def init_rollup_table(conn):
+    """Create sensor_rollups: one row per bucket with count and avg/min/max per channel"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sensor_rollups (
+            bucket DATETIME PRIMARY KEY,
+            bucket_seconds INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            voltage_avg REAL, voltage_min REAL, voltage_max REAL,
+            temperature_avg REAL, temperature_min REAL, temperature_max REAL,
+            current_avg REAL, current_min REAL, current_max REAL
+        ) WITHOUT ROWID
+    ''')
+    # Months already rolled up, so a pass interrupted before the file was deleted is not counted twice
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS retired_partitions (
+            key TEXT PRIMARY KEY,
+            file_stamp TEXT NOT NULL,
+            readings INTEGER NOT NULL,
+            retired_at DATETIME NOT NULL
+        )
+    ''')
+
+
+def load_rollups(db_path, router, bucket_seconds=None, start=None, end=None, descending=False, limit=None):
+    """(bucket, count, avg/min/max per channel) rows of sensor_rollups in [start, end)
+
+    Only buckets before the oldest raw reading of `router` (real readings):
+    later ones are still served from the partitions. With `bucket_seconds`,
+    stored buckets are merged into buckets that long (count-weighted averages).
+    """
+    oldest = next(router.select(limit=1), None)
+    if oldest is not None:
+        end = str(oldest[0]) if end is None else min(str(end), str(oldest[0]))
+
+    clauses, args = [], []
+    if start is not None:
+        clauses.append('bucket >= ?')
+        args.append(str(start))
+    if end is not None:
+        clauses.append('bucket < ?')
+        args.append(end)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    order = 'DESC' if descending else ''
+    if limit is not None:
+        args.append(limit)
+
+    if bucket_seconds:
+        query = f'''
+            SELECT datetime(CAST(strftime('%s', bucket) AS INTEGER) / ? * ?, 'unixepoch') AS merged,
+                   SUM(count),
+                   SUM(voltage_avg * count) / SUM(count), MIN(voltage_min), MAX(voltage_max),
+                   SUM(temperature_avg * count) / SUM(count), MIN(temperature_min), MAX(temperature_max),
+                   SUM(current_avg * count) / SUM(count), MIN(current_min), MAX(current_max)
+            FROM sensor_rollups {where}
+            GROUP BY merged
+            ORDER BY merged {order}
+        '''
+        args = [bucket_seconds, bucket_seconds] + args
+    else:
+        query = f'''
+            SELECT bucket, count, voltage_avg, voltage_min, voltage_max,
+                   temperature_avg, temperature_min, temperature_max,
+                   current_avg, current_min, current_max
+            FROM sensor_rollups {where}
+            ORDER BY bucket {order}
+        '''
+    if limit is not None:
+        query += ' LIMIT ?'
+
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True, timeout=30)
+    try:
+        return conn.execute(query, args).fetchall()
+    except sqlite3.OperationalError:
+        return []  # No retention pass has created sensor_rollups yet
+    finally:
+        conn.close()
+
+
+def database_size(conn):
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    return conn.execute('PRAGMA page_count').fetchone()[0] * page_size
+
+
+def storage_size(conn, router):
+    """Main database plus every partition file (real and demo with an 'all' router)"""
+    return database_size(conn) + sum(os.path.getsize(partition.path)
+                                     for partition in router.partitions() if not partition.legacy)
+
+
+def file_stamp(path):
+    info = os.stat(path)
+    return f'{info.st_mtime_ns}:{info.st_size}'
+
+
+def env_days(name):
+    value = os.environ.get(name)
+    return float(value) if value else None
+
+
+class RetentionJob:
+    def __init__(self, db_path, raw_days, rollup_days=None, interval=DEFAULT_INTERVAL,
+                 bucket_seconds=BUCKET_SECONDS):
+        self.db_path = db_path
+        self.router = PartitionRouter(db_path)
+        self.demo_router = PartitionRouter(db_path, 'demo')
+        self.storage_router = PartitionRouter(db_path, 'all')
+        self.raw_days = raw_days
+        self.rollup_days = rollup_days
+        self.interval = interval
+        self.bucket_seconds = bucket_seconds
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_report = None
+
+    @classmethod
+    def from_env(cls, db_path):
+        """Job configured by IOT_MONITOR_RAW_DAYS / IOT_MONITOR_ROLLUP_DAYS, or None"""
+        raw_days = env_days('IOT_MONITOR_RAW_DAYS')
+        if not raw_days:
+            return None
+        return cls(db_path, raw_days, env_days('IOT_MONITOR_ROLLUP_DAYS'))
+
+    def start(self):
+        """Run retention now and then every `interval` seconds on a daemon thread"""
+        if self.thread:
+            return
+        self.thread = threading.Thread(target=self.run_loop, name='retention', daemon=True)
+        self.thread.start()
+        rollups = f"{self.rollup_days:g} days" if self.rollup_days else "forever"
+        logger.info("🧹 Retention: raw readings %g days, rollups %s (every %ds)",
+                    self.raw_days, rollups, self.interval)
+
+    def stop(self):
+        """Stop after the current batch"""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def run_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                logger.error("Retention pass failed: %s", e)
+            self.stop_event.wait(self.interval)
+
+    def run_once(self, now=None):
+        """One retention pass; returns a report of what was removed and reclaimed"""
+        now = now or datetime.now()
+        start = time.perf_counter()
+        # Autocommit: every batch below is its own short transaction
+        conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+        try:
+            init_rollup_table(conn)
+            size_before = storage_size(conn, self.storage_router)
+
+            raw_cutoff = str(now - timedelta(days=self.raw_days))
+            deleted, rolled_up, dropped = self.expire_partitions(conn, raw_cutoff)
+            demo_deleted, demo_dropped = self.expire_demo(raw_cutoff)
+            deleted += demo_deleted
+            dropped += demo_dropped
+            if self.router.legacy_partition():
+                legacy_deleted, legacy_rolled_up = self.expire_raw(conn, raw_cutoff)
+                deleted += legacy_deleted
+                rolled_up += legacy_rolled_up
+            rollups_deleted = 0
+            if self.rollup_days:
+                rollups_deleted = self.expire_rollups(conn, str(now - timedelta(days=self.rollup_days)))
+            pages_freed = self.vacuum(conn)
+
+            size_after = storage_size(conn, self.storage_router)
+        finally:
+            conn.close()
+
+        seconds = time.perf_counter() - start
+        RETENTION_SECONDS.observe(seconds)
+        DB_SIZE_BYTES.set(size_after)
+        self.last_report = {
+            'rows_deleted': deleted,
+            'partitions_dropped': dropped,
+            'buckets_rolled_up': rolled_up,
+            'rollups_deleted': rollups_deleted,
+            'pages_freed': pages_freed,
+            'bytes_before': size_before,
+            'bytes_after': size_after,
+            'bytes_reclaimed': size_before - size_after,
+            'seconds': round(seconds, 3)
+        }
+        if deleted or rollups_deleted or pages_freed:
+            logger.info("🧹 Retention: deleted %d readings (%d rollup buckets, %d months), %d old rollups; "
+                        "reclaimed %.1f MB (%.1f -> %.1f MB) in %.2fs",
+                        deleted, rolled_up, dropped, rollups_deleted, (size_before - size_after) / 1e6,
+                        size_before / 1e6, size_after / 1e6, seconds,
+                        extra={'fields': self.last_report})
+        return self.last_report
+
+    def window_start(self, timestamp):
+        """Start of the batch window containing `timestamp` (aligned to whole buckets)"""
+        window = self.bucket_seconds * BUCKETS_PER_BATCH
+        seconds = (datetime.fromisoformat(timestamp) - EPOCH).total_seconds()
+        return EPOCH + timedelta(seconds=seconds // window * window)
+
+    def expire_partitions(self, conn, cutoff):
+        """Roll up and drop every month that ends before `cutoff`; returns (readings, buckets, months)"""
+        deleted = rolled_up = dropped = 0
+        for partition in self.router.partitions(end=cutoff):
+            if partition.legacy or partition.end > cutoff or self.stop_event.is_set():
+                continue
+
+            stamp = file_stamp(partition.path)
+            retired = conn.execute('SELECT file_stamp FROM retired_partitions WHERE key = ?',
+                                   (partition.key,)).fetchone()
+            if retired is None or retired[0] != stamp:
+                # Aggregated from the read-only (or compressed) file; only the upsert takes the write lock
+                readings = self.router.count([partition])
+                rows = [(row[0], self.bucket_seconds) + tuple(row[1:])
+                        for row in self.router.rollups(partition, self.bucket_seconds)]
+
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    conn.executemany(f'INSERT INTO sensor_rollups VALUES ({", ".join("?" * 12)}) {ROLLUP_MERGE}',
+                                     rows)
+                    conn.execute('INSERT OR REPLACE INTO retired_partitions VALUES (?, ?, ?, ?)',
+                                 (partition.key, stamp, readings, str(datetime.now())))
+                    conn.execute('COMMIT')
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+                deleted += readings
+                rolled_up += len(rows)
+                RETENTION_DELETED.inc(readings)
+
+            try:
+                self.router.drop(partition)
+                dropped += 1
+            except OSError as e:
+                # Windows keeps open files; the month is retried on the next pass
+                logger.warning("Could not drop partition %s: %s", partition.key, e)
+        return deleted, rolled_up, dropped
+
+    def expire_demo(self, cutoff):
+        """Drop demo months that end before `cutoff` without rolling them up; returns (readings, months)"""
+        deleted = dropped = 0
+        for partition in self.demo_router.partitions(end=cutoff):
+            if partition.end > cutoff or self.stop_event.is_set():
+                continue
+            readings = self.demo_router.count([partition])
+            try:
+                self.demo_router.drop(partition)
+            except OSError as e:
+                logger.warning("Could not drop partition %s: %s", partition.name, e)
+                continue
+            deleted += readings
+            dropped += 1
+            RETENTION_DELETED.inc(readings)
+        return deleted, dropped
+
+    def expire_raw(self, conn, cutoff):
+        """Roll up and delete legacy-table readings older than `cutoff`, one window per transaction"""
+        window = timedelta(seconds=self.bucket_seconds * BUCKETS_PER_BATCH)
+        deleted = rolled_up = 0
+
+        while not self.stop_event.is_set():
+            oldest = conn.execute('SELECT MIN(timestamp) FROM sensor_readings').fetchone()[0]
+            if oldest is None or oldest >= cutoff:
+                break
+            window_end = min(str(self.window_start(oldest) + window), cutoff)
+
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rolled_up += conn.execute(
+                    f'INSERT INTO sensor_rollups {ROLLUP_SELECT} WHERE timestamp < :end GROUP BY 1 {ROLLUP_MERGE}',
+                    {'b': self.bucket_seconds, 'end': window_end}).rowcount
+                batch = conn.execute('DELETE FROM sensor_readings WHERE timestamp < ?', (window_end,)).rowcount
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+
+            deleted += batch
+            RETENTION_DELETED.inc(batch)
+            self.stop_event.wait(BATCH_PAUSE)
+        return deleted, rolled_up
+
+    def expire_rollups(self, conn, cutoff):
+        return conn.execute('DELETE FROM sensor_rollups WHERE bucket < ?', (cutoff,)).rowcount
+
+    def vacuum(self, conn):
+        """Return free pages to the OS; needs auto_vacuum=INCREMENTAL (see --vacuum)"""
+        free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if not free_pages:
+            return 0
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            # Freed pages are still reused for new readings; the file just does not shrink
+            logger.info("Database has %d free pages; run 'python data/retention.py --vacuum' once "
+                        "to enable incremental vacuum", free_pages)
+            return 0
+        # execute() steps a column-less statement once (one page); executescript runs it to completion
+        conn.executescript('PRAGMA incremental_vacuum')
+        return free_pages - conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+
+def enable_incremental_vacuum(db_path):
+    """One-time full VACUUM that switches an existing database to auto_vacuum=INCREMENTAL"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+            return False
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        return True
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    from data.data_manager import resolve_data_dir
+
+    parser = argparse.ArgumentParser(description="Apply the retention policy to a sensor database once")
+    parser.add_argument('--db', default=None, help="database (default: IoT_Data/sensor_data.db)")
+    parser.add_argument('--raw-days', type=float, default=env_days('IOT_MONITOR_RAW_DAYS'),
+                        help="keep raw readings this many days")
+    parser.add_argument('--rollup-days', type=float, default=env_days('IOT_MONITOR_ROLLUP_DAYS'),
+                        help="keep per-minute rollups this many days (default: forever)")
+    parser.add_argument('--vacuum', action='store_true',
+                        help="first convert the database to incremental vacuum (full VACUUM, once)")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(resolve_data_dir(), 'sensor_data.db')
+    if not os.path.exists(db_path):
+        print(f"❌ Database not found: {db_path}")
+        return 1
+
+    if args.vacuum:
+        start = time.perf_counter()
+        if enable_incremental_vacuum(db_path):
+            print(f"✓ Enabled incremental vacuum in {time.perf_counter() - start:.2f}s")
+
+    if not args.raw_days:
+        if not args.vacuum:
+            print("❌ Nothing to do: give --raw-days (or IOT_MONITOR_RAW_DAYS)")
+            return 1
+        return 0
+
+    report = RetentionJob(db_path, args.raw_days, args.rollup_days).run_once()
+    print(f"🧹 Deleted {report['rows_deleted']} readings ({report['buckets_rolled_up']} rollup buckets, "
+          f"{report['partitions_dropped']} months), "
+          f"{report['rollups_deleted']} old rollups; reclaimed {report['bytes_reclaimed'] / 1e6:.1f} MB "
+          f"in {report['seconds']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,187 @@
+"""
+Shared Ring - Fixed-layout shared-memory ring buffer of sensor readings
+
+One writer (the process that owns collection) appends records; any number of
+readers in other processes map the same memory and read them as NumPy
+structured arrays without pickling or copying through a socket.
+
+Layout: a 64-byte header (magic, version, capacity, head) followed by
+`capacity` records of RECORD_DTYPE. Lock-free single-writer/multi-reader
+protocol, per slot:
+
+    writer: slot.seq = 0 -> write fields -> slot.seq = n -> header.head = n
+    reader: read header.head, copy the slots, keep a copied slot only if its
+            seq is the sequence number expected at that position, then read
+            header.head again and drop slots the writer may have reached
+            while they were being copied, including the one it writes next
+
+A reader that falls more than `capacity` records behind loses the oldest ones
+(reported through the returned sequence numbers), but never sees a torn record
+as valid. Timestamps are local wall-clock seconds since 1970-01-01, matching
+the naive datetimes stored in SQLite.
+"""
+
+import os
+import sys
+import zlib
+from datetime import datetime
+from multiprocessing import shared_memory
+
+import numpy as np
+
+MAGIC = 0x494F5452  # 'IOTR'
+VERSION = 1
+DEFAULT_CAPACITY = 4096
+
+HEADER_DTYPE = np.dtype([
+    ('magic', '<u4'),
+    ('version', '<u4'),
+    ('capacity', '<u8'),
+    ('head', '<u8')
+])
+HEADER_SIZE = 64
+
+RECORD_DTYPE = np.dtype([
+    ('seq', '<u8'),
+    ('timestamp', '<f8'),
+    ('device', '<u4'),
+    ('voltage', '<f8'),
+    ('current', '<f8'),
+    ('temperature', '<f8')
+], align=True)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def ring_name(data_dir):
+    """Shared memory name for an IoT_Data directory, so installs do not collide"""
+    return f"iot_monitor_{zlib.crc32(os.path.abspath(data_dir).encode()):08x}"
+
+
+def device_id(port):
+    """Stable 32-bit id for a serial port name; 0 is reserved for demo data"""
+    return zlib.crc32(port.encode()) or 1 if port else 0
+
+
+def to_seconds(timestamp):
+    return (timestamp - EPOCH).total_seconds()
+
+
+def to_datetime64(seconds):
+    """Record timestamps as datetime64 for plotting (local wall-clock)"""
+    return (np.asarray(seconds) * 1e6).astype('datetime64[us]')
+
+
+class SharedRing:
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        self.capacity = int(self.header['capacity'])
+        self.records = np.ndarray((self.capacity,), dtype=RECORD_DTYPE, buffer=shm.buf, offset=HEADER_SIZE)
+
+    @classmethod
+    def create(cls, name, capacity=DEFAULT_CAPACITY):
+        """Create the ring as its only writer, replacing one left by a crashed writer"""
+        size = HEADER_SIZE + capacity * RECORD_DTYPE.itemsize
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        header['capacity'] = capacity
+        header['head'] = 0
+        header['version'] = VERSION
+        header['magic'] = MAGIC
+        del header  # Release the export so close() can unmap
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Map an existing ring read-only; FileNotFoundError if there is none"""
+        shm = shared_memory.SharedMemory(name=name)
+        # Before 3.13 every attach is tracked and unlinked when this process exits
+        if sys.version_info < (3, 13):
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        valid = header['magic'] == MAGIC and header['version'] == VERSION
+        del header
+        if not valid:
+            shm.close()
+            raise ValueError(f"{name} is not an IoT Monitor ring buffer")
+        return cls(shm, owner=False)
+
+    @property
+    def head(self):
+        """Sequence number of the newest record (0 when empty)"""
+        return int(self.header['head'])
+
+    def append(self, timestamp, port, voltage, current, temperature):
+        """Write one reading (port None for demo data); only the owner may call this"""
+        seq = self.head + 1
+        index = seq % self.capacity
+        self.records['seq'][index] = 0  # Invalidate before overwriting
+        self.records[index] = (0, to_seconds(timestamp), device_id(port), voltage, current, temperature)
+        self.records['seq'][index] = seq
+        self.header['head'] = seq
+
+    def slots(self, first, last):
+        """Record views for sequence numbers first..last (at most two slices)"""
+        start, stop = first % self.capacity, last % self.capacity + 1
+        if start < stop:
+            return [self.records[start:stop]]
+        return [self.records[start:], self.records[:stop]]
+
+    def snapshot(self, first, head):
+        """Copy of the records first..head that were intact while being copied"""
+        # Checked on the copy: a slot is only trusted as it was when copied
+        records = np.concatenate(self.slots(first, head))
+        records = records[records['seq'] == np.arange(first, head + 1, dtype=np.uint64)]
+
+        # The writer may have started overwriting copied slots since; its seq
+        # was still valid when copied, so only the new head tells. The slot of
+        # head + 1 - capacity may be half-written already: append() does not
+        # move head until that record is complete.
+        lapped = self.head + 1 - self.capacity
+        if lapped >= first:
+            records = records[records['seq'] > lapped]
+        return records
+
+    def latest(self, count):
+        """Copy of up to `count` newest valid records, oldest first"""
+        head = self.head
+        first = max(1, head - min(count, self.capacity) + 1)
+        if head < first:
+            return self.records[:0].copy()
+        return self.snapshot(first, head)
+
+    def read_since(self, last_seq):
+        """Copy of every record newer than `last_seq`, plus the new position
+
+        Records overwritten before they were read are skipped; callers can
+        compare the first returned seq with last_seq + 1 to count them.
+        """
+        head = self.head
+        first = max(last_seq + 1, head - self.capacity + 1, 1)
+        if head < first:
+            return self.records[:0].copy(), last_seq
+        return self.snapshot(first, head), head
+
+    def close(self):
+        """Unmap the ring; the owner also removes it"""
+        if self.owner:
+            try:
+                self.shm.unlink()  # Readers keep their mapping until they close it
+            except FileNotFoundError:
+                pass
+        self.header = self.records = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # A caller still holds a view; the mapping goes away with it
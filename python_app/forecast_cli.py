@@ -0,0 +1,91 @@
+"""
+Headless Forecasting CLI
+Batch-forecasts one or more sensor databases without the GUI
+
+Example:
+    python forecast_cli.py IoT_Data/sensor_data.db --horizons 10 30 60 --model Advanced
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from prediction.engine import (ForecastEngine, MODEL_TYPES, load_readings,
+                               init_forecast_table, save_forecast)
+
+
+def forecast_database(db_path, model_type, horizons, limit, output_db=None):
+    """Forecast one database and write the results; runs in a worker process"""
+    start = time.perf_counter()
+
+    df = load_readings(db_path, limit)
+    engine = ForecastEngine(model_type)
+    forecasts = engine.run(df, horizons)
+
+    if forecasts:
+        generated_at = datetime.now()
+        # Forecasts of several databases in one output file are told apart by source_db
+        source_db = os.path.abspath(db_path) if output_db else None
+        conn = sqlite3.connect(output_db or db_path, timeout=30)
+        try:
+            init_forecast_table(conn)
+            for minutes, forecast in forecasts.items():
+                save_forecast(conn, forecast, model_type, minutes, generated_at, limit, source_db)
+            conn.commit()
+        finally:
+            conn.close()
+
+    return {
+        'db_path': db_path,
+        'rows': len(df),
+        'horizons': sorted(forecasts),
+        'seconds': time.perf_counter() - start
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-forecast IoT sensor databases without the GUI")
+    parser.add_argument('databases', nargs='+', help="sensor_data.db files (one per device)")
+    parser.add_argument('--model', choices=MODEL_TYPES, default="Polynomial")
+    parser.add_argument('--horizons', type=int, nargs='+', default=[10, 30, 60],
+                        help="forecast horizons in minutes")
+    parser.add_argument('--limit', type=int, default=None,
+                        help="train on the most recent N readings (default: all)")
+    parser.add_argument('--output-db', default=None,
+                        help="write forecasts here instead of into each source database "
+                             "(rows keep the source path in source_db)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                        help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    print(f"🔮 Forecasting {len(args.databases)} database(s) with {args.model} model "
+          f"for horizons {args.horizons} using {args.jobs} worker(s)")
+
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {
+            executor.submit(forecast_database, db_path, args.model, args.horizons,
+                            args.limit, args.output_db): db_path
+            for db_path in args.databases
+        }
+        for future in as_completed(futures):
+            db_path = futures[future]
+            try:
+                result = future.result()
+                if result['horizons']:
+                    print(f"  ✓ {db_path}: {result['rows']} rows, horizons {result['horizons']} "
+                          f"in {result['seconds']:.2f}s")
+                else:
+                    print(f"  ⚠️  {db_path}: insufficient data ({result['rows']} rows)")
+            except Exception as e:
+                failures += 1
+                print(f"  ✗ {db_path}: {e}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,309 @@
+"""
+Bulk Import CLI
+Loads sensor_data_YYYY-MM-DD.csv files (and JSON / JSON-lines exports) into a database
+
+Files are parsed in parallel worker processes (each into a small part database
+that is attached, not pickled back), staged in a temporary table keyed by
+timestamp, and copied into the monthly partition files (data/partitions.py)
+in one transaction per month, with the time index rebuilt afterwards for bulk
+loads. Readings already stored are skipped: a timestamp with whole seconds (as
+written by store_csv_data) matches any stored reading within that second, so
+an interrupted import can simply be run again.
+
+Example:
+    python import_cli.py IoT_Data data/csv --db IoT_Data/sensor_data.db
+"""
+
+import argparse
+import csv
+import glob
+import json
+import operator
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from data.data_manager import resolve_data_dir
+from data.partitions import PartitionRouter, init_reading_table, partition_key
+
+# File patterns picked up when a directory is given
+PATTERNS = ('sensor_data_*.csv', '*.json', '*.jsonl')
+
+COLUMNS = ('timestamp', 'voltage', 'temperature', 'current')
+
+# Rows per executemany call into the staging table
+STAGE_BATCH = 100000
+
+
+def normalize_timestamp(value):
+    """Timestamp in the form stored by DataManager ('YYYY-MM-DD HH:MM:SS[.ffffff]')"""
+    if len(value) == 19 and value[10] == ' ':
+        return value  # Already in store_csv_data's format
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)  # Stored times are local
+    return str(timestamp)
+
+
+def to_row(timestamp, voltage, temperature, current):
+    return (normalize_timestamp(timestamp.strip()), float(voltage), float(temperature), float(current))
+
+
+def parse_csv(path):
+    rows, bad = [], 0
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader, [])]
+        try:
+            # Column order differs between store_csv_data and exports
+            pick = operator.itemgetter(*(header.index(name) for name in COLUMNS))
+        except ValueError:
+            raise ValueError(f"missing timestamp/voltage/temperature/current columns in {header}")
+
+        append = rows.append
+        for record in reader:
+            try:
+                timestamp, voltage, temperature, current = pick(record)
+                if len(timestamp) != 19 or timestamp[10] != ' ':
+                    timestamp = normalize_timestamp(timestamp.strip())
+                append((timestamp, float(voltage), float(temperature), float(current)))
+            except (ValueError, IndexError):
+                bad += 1
+    return rows, bad
+
+
+def parse_json(path):
+    """JSON array of readings (API, exports) or one reading per line (live stream)"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    if text.lstrip().startswith('['):
+        items = json.loads(text)
+    else:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    rows, bad = [], 0
+    for item in items:
+        try:
+            rows.append(to_row(item['timestamp'], item['voltage'], item['temperature'], item['current']))
+        except (KeyError, TypeError, ValueError):
+            bad += 1
+    return rows, bad
+
+
+def parse_file(path):
+    """Parse one file into (timestamp, voltage, temperature, current) rows; runs in a worker"""
+    start = time.perf_counter()
+    if path.lower().endswith(('.json', '.jsonl')):
+        rows, bad = parse_json(path)
+    else:
+        rows, bad = parse_csv(path)
+    rows.sort()
+    return {'path': path, 'rows': rows, 'bad': bad, 'seconds': time.perf_counter() - start}
+
+
+def parse_to_part(path, part_path):
+    """Worker: parse one file into its own small database for the main process to attach"""
+    result = parse_file(path)
+    conn = sqlite3.connect(part_path)
+    try:
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute('CREATE TABLE readings (timestamp TEXT, voltage REAL, temperature REAL, current REAL)')
+        conn.executemany('INSERT INTO readings VALUES (?, ?, ?, ?)', result['rows'])
+        conn.commit()
+    finally:
+        conn.close()
+    # Only counts go back through the pool; pickling millions of rows would serialize on the parent
+    result['count'] = len(result.pop('rows'))
+    result['part'] = part_path
+    return result
+
+
+def expand_paths(paths):
+    """Files as given, plus matching files inside any directories"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for pattern in PATTERNS:
+                files.extend(sorted(glob.glob(os.path.join(path, pattern))))
+        else:
+            files.append(path)
+    return list(dict.fromkeys(files))
+
+
+def stage_rows(conn, rows):
+    """Insert into the staging table; returns how many were new timestamps"""
+    before = conn.total_changes
+    conn.execute('BEGIN')
+    for i in range(0, len(rows), STAGE_BATCH):
+        conn.executemany('INSERT OR IGNORE INTO import_staging VALUES (?, ?, ?, ?)', rows[i:i + STAGE_BATCH])
+    conn.execute('COMMIT')
+    return conn.total_changes - before
+
+
+def stage_part(conn, part_path):
+    """Copy a worker's part database into the staging table and delete it"""
+    before = conn.total_changes
+    conn.execute('ATTACH DATABASE ? AS part', (part_path,))
+    try:
+        conn.execute('INSERT OR IGNORE INTO import_staging SELECT * FROM part.readings ORDER BY timestamp')
+    finally:
+        conn.execute('DETACH DATABASE part')
+        os.remove(part_path)
+    return conn.total_changes - before
+
+
+def delete_stored(conn, table, start, end):
+    """Drop staged readings in [start, end) already in `table`; returns how many"""
+    # Whole-second timestamps match any stored reading in that second
+    return conn.execute(f'''
+        DELETE FROM import_staging
+        WHERE timestamp >= ? AND timestamp < ?
+          AND EXISTS (
+            SELECT 1 FROM {table} r
+            WHERE r.timestamp BETWEEN import_staging.timestamp
+                  AND import_staging.timestamp || CASE WHEN length(import_staging.timestamp) = 19
+                                                       THEN '.999999' ELSE '' END
+          )
+    ''', (start, end)).rowcount
+
+
+def load_month(conn, start, end, legacy=False):
+    """Copy one month of staged readings into the attached partition `part`; returns (inserted, present)"""
+    already_present = delete_stored(conn, 'part.sensor_readings', start, end)
+    if legacy:
+        already_present += delete_stored(conn, 'main.sensor_readings', start, end)
+    new_rows = conn.execute('SELECT COUNT(*) FROM import_staging WHERE timestamp >= ? AND timestamp < ?',
+                            (start, end)).fetchone()[0]
+    if not new_rows:
+        return 0, already_present
+
+    # For a bulk load, maintaining the index row by row is slower than building it
+    # once; a small top-up of a large month is cheaper through the existing index
+    stored_rows = conn.execute('SELECT MAX(id) FROM part.sensor_readings').fetchone()[0] or 0
+    rebuild_index = new_rows >= stored_rows
+    if rebuild_index:
+        conn.execute('DROP INDEX IF EXISTS part.idx_readings_timestamp')
+    inserted = conn.execute('''
+        INSERT INTO part.sensor_readings (timestamp, voltage, temperature, current)
+        SELECT timestamp, voltage, temperature, current
+        FROM import_staging
+        WHERE timestamp >= ? AND timestamp < ?
+        ORDER BY timestamp
+    ''', (start, end)).rowcount
+    if rebuild_index:
+        init_reading_table(conn, 'part')
+    return inserted, already_present
+
+
+def load_staged(conn, router):
+    """Copy staged readings not yet stored into their month partitions; returns (inserted, already present)"""
+    legacy = router.legacy_partition()
+    keys = [row[0] for row in conn.execute('SELECT DISTINCT substr(timestamp, 1, 7) FROM import_staging')]
+    current = partition_key(datetime.now())
+    inserted = already_present = 0
+    for key in keys:
+        partition = router.partition(key)
+        router.create(key)
+        overlaps_legacy = legacy is not None and legacy.overlaps(partition.start, partition.end)
+        if partition.sealed:
+            router.unseal(partition)
+
+        # One short write transaction per month: dedupe against stored readings, load, reindex
+        conn.execute('ATTACH DATABASE ? AS part', (partition.path,))
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                month_inserted, month_present = load_month(conn, partition.start, partition.end, overlaps_legacy)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.execute('DETACH DATABASE part')
+
+        if key < current:
+            router.seal(partition)  # Finished months stay read-only
+        inserted += month_inserted
+        already_present += month_present
+    return inserted, already_present
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load sensor CSV/JSON files into a database")
+    parser.add_argument('paths', nargs='+', help="files, or directories containing sensor_data_*.csv / *.json")
+    parser.add_argument('--db', default=None, help="target database (default: IoT_Data/sensor_data.db)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                        help="parser processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    files = expand_paths(args.paths)
+    if not files:
+        print("❌ No files to import")
+        return 1
+    db_path = args.db or os.path.join(resolve_data_dir(), 'sensor_data.db')
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+    jobs = max(1, min(args.jobs, len(files)))
+    print(f"📥 Importing {len(files)} file(s) into {db_path} using {jobs} worker(s)")
+    start = time.perf_counter()
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    failures = parsed = bad = staged = 0
+    try:
+        conn.execute('PRAGMA cache_size = -65536')  # 64 MB
+        # Staging lives in the temp database, so parsing never holds the write lock
+        conn.execute('''
+            CREATE TEMP TABLE import_staging (
+                timestamp TEXT PRIMARY KEY,
+                voltage REAL, temperature REAL, current REAL
+            ) WITHOUT ROWID
+        ''')
+
+        def report(result, count):
+            nonlocal parsed, bad
+            parsed += count
+            bad += result['bad']
+            unreadable = f", {result['bad']} unreadable" if result['bad'] else ""
+            print(f"  ✓ {result['path']}: {count} rows{unreadable} in {result['seconds']:.2f}s")
+
+        if jobs == 1:
+            for path in files:
+                try:
+                    result = parse_file(path)
+                    staged += stage_rows(conn, result['rows'])
+                    report(result, len(result['rows']))
+                except (OSError, ValueError) as e:
+                    failures += 1
+                    print(f"  ✗ {path}: {e}")
+        else:
+            with tempfile.TemporaryDirectory(prefix='iot_import_') as part_dir, \
+                    ProcessPoolExecutor(max_workers=jobs) as executor:
+                futures = {
+                    executor.submit(parse_to_part, path, os.path.join(part_dir, f'part_{index}.db')): path
+                    for index, path in enumerate(files)
+                }
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                        staged += stage_part(conn, result['part'])
+                        report(result, result['count'])
+                    except (OSError, ValueError, sqlite3.Error) as e:
+                        failures += 1
+                        print(f"  ✗ {futures[future]}: {e}")
+
+        inserted, already_present = load_staged(conn, PartitionRouter(db_path))
+    finally:
+        conn.close()
+
+    print(f"✅ {inserted} readings imported in {time.perf_counter() - start:.2f}s "
+          f"({parsed} parsed, {parsed - staged} duplicate in files, {already_present} already stored, "
+          f"{bad} unreadable)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
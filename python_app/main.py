@@ -5,16 +5,24 @@ Main Python Application for IoT Monitoring System
 
 import tkinter as tk
 from tkinter import ttk
+import os
+import sys
 import threading
+import time
 import json
 from datetime import datetime
 
-from pages.live_data import LiveDataPage
-from pages.past_data import PastDataPage  
-from pages.predictions import PredictionsPage
-from data.data_manager import DataManager
+from utils.startup_timer import startup_timer
+from utils.metrics import metrics
+from utils.logger import log_manager, get_logger
+from utils.profiler import profiler, requested_profile_path
+from data.data_manager import DataManager, resolve_data_dir
+from data.collector_status import read_collector_status
+from data.retention import RetentionJob
 from utils.theme_manager import theme_manager
 
+logger = get_logger('app')
+
 class IoTMonitorApp:
     def __init__(self):
         self.root = tk.Tk()
@@ -22,8 +30,18 @@ class IoTMonitorApp:
         self.root.geometry("1200x800")
         self.root.minsize(1000, 700)  # Set minimum window size
         
+        # Logs go through a background queue to IoT_Data/logs
+        log_manager.setup(os.path.join(resolve_data_dir(), 'logs'))
+        
+        # Optional sampling profiler (--profile [path] or IOT_MONITOR_PROFILE)
+        profile_path = requested_profile_path(sys.argv[1:], os.path.join(resolve_data_dir(), 'profiles'))
+        if profile_path:
+            profiler.start(profile_path)
+        
         # Initialize data manager
         self.data_manager = DataManager()
+        self.retention_job = None
+        startup_timer.mark("data manager ready")
         
         # Create top frame for controls
         self.top_frame = ttk.Frame(self.root)
@@ -36,15 +54,22 @@ class IoTMonitorApp:
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill='both', expand=True, padx=10, pady=(5, 10))
         
-        # Initialize pages
-        self.live_page = LiveDataPage(self.notebook, self.data_manager)
-        self.past_page = PastDataPage(self.notebook, self.data_manager)
-        self.predictions_page = PredictionsPage(self.notebook, self.data_manager)
+        # One placeholder tab per page; pages are built on first selection
+        self.page_specs = [
+            ("Live Data", 'live_page', self.build_live_page),
+            ("Past Data", 'past_page', self.build_past_page),
+            ("Predictions", 'predictions_page', self.build_predictions_page)
+        ]
+        self.live_page = None
+        self.past_page = None
+        self.predictions_page = None
         
-        # Add pages to notebook
-        self.notebook.add(self.live_page.frame, text="Live Data")
-        self.notebook.add(self.past_page.frame, text="Past Data")
-        self.notebook.add(self.predictions_page.frame, text="Predictions")
+        self.tab_frames = []
+        for text, _, _ in self.page_specs:
+            tab_frame = ttk.Frame(self.notebook)
+            self.notebook.add(tab_frame, text=text)
+            self.tab_frames.append(tab_frame)
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
         
         # Register theme callback
         theme_manager.register_callback(self.on_theme_changed)
@@ -57,6 +82,58 @@ class IoTMonitorApp:
         
         # Start data collection thread
         self.start_data_collection()
+        
+        # Show the window before building any page, then build the Live tab
+        self.root.update()
+        startup_timer.mark("window shown")
+        self.on_tab_changed()
+    
+    def build_live_page(self, parent):
+        """Create the Live Data page"""
+        from pages.live_data import LiveDataPage
+        return LiveDataPage(parent, self.data_manager)
+    
+    def build_past_page(self, parent):
+        """Create the Past Data page (imports pandas on first use)"""
+        from pages.past_data import PastDataPage
+        return PastDataPage(parent, self.data_manager)
+    
+    def build_predictions_page(self, parent):
+        """Create the Predictions page (imports pandas/numpy; sklearn loads in the scheduler)"""
+        from pages.predictions import PredictionsPage
+        return PredictionsPage(parent, self.data_manager)
+    
+    def built_pages(self):
+        """Pages that have been constructed so far"""
+        pages = [getattr(self, attr) for _, attr, _ in self.page_specs]
+        return [page for page in pages if page is not None]
+    
+    def shutdown_background(self):
+        """Stop background work: page-owned (e.g. the forecast scheduler) and retention"""
+        for page in self.built_pages():
+            if hasattr(page, 'shutdown'):
+                page.shutdown()
+        if self.retention_job:
+            self.retention_job.stop()  # Lets the current delete batch commit
+    
+    def on_tab_changed(self, event=None):
+        """Build the selected page the first time its tab is opened"""
+        index = self.notebook.index(self.notebook.select())
+        text, attr, builder = self.page_specs[index]
+        if getattr(self, attr) is not None:
+            return
+        
+        # Matplotlib styling must be in place before the first figure exists
+        if not self.built_pages():
+            theme_manager.apply_theme()
+        
+        start = time.perf_counter()
+        page = builder(self.tab_frames[index])
+        page.frame.pack(fill='both', expand=True)
+        setattr(self, attr, page)
+        
+        elapsed = startup_timer.mark(f"{text} page built")
+        logger.info("📑 Built %s page in %.3fs (%.3fs since launch)", text, time.perf_counter() - start, elapsed)
     
     def setup_theme_controls(self):
         """Setup theme toggle controls"""
@@ -92,9 +169,8 @@ class IoTMonitorApp:
         
         # Update all pages with smooth transition
         try:
-            self.live_page.apply_theme()
-            self.past_page.apply_theme()
-            self.predictions_page.apply_theme()
+            for page in self.built_pages():
+                page.apply_theme()
         except Exception as e:
             print(f"Theme transition warning: {e}")
         
@@ -270,6 +346,9 @@ class IoTMonitorApp:
         elif status == "demo":
             color = "#00bfff" if theme_manager.is_dark_mode else "#0066cc"  # Blue
             self.status_label.configure(text="Status: Demo Mode 🎭", foreground=color)
+        elif status == "attached":
+            color = "#00ff00" if theme_manager.is_dark_mode else "#008000"  # Green
+            self.status_label.configure(text="Status: Collector Service ✓", foreground=color)
         elif status == "error":
             color = "#ff4444" if theme_manager.is_dark_mode else "#cc0000"  # Red
             self.status_label.configure(text=f"Status: Error ✗", foreground=color)
@@ -279,12 +358,46 @@ class IoTMonitorApp:
     
     def start_data_collection(self):
         """Start background thread for data collection"""
-        collection_thread = threading.Thread(target=self.data_manager.start_collection, daemon=True)
+        # A running collector service owns the serial port; just read what it stores
+        collector = read_collector_status(self.data_manager.data_dir)
+        if collector:
+            logger.info("🛰️ Collector service running (pid %s) - attaching read-only", collector.get('pid'))
+            target = self.data_manager.follow_collector
+        else:
+            # Other local processes (recorders, alerting) can subscribe to our readings
+            self.data_manager.start_publishing()
+            target = self.collect_with_shared_ring
+            # Retention is the collector's job when one runs; otherwise opt in with IOT_MONITOR_RAW_DAYS
+            self.retention_job = RetentionJob.from_env(self.data_manager.db_path)
+            if self.retention_job:
+                self.retention_job.start()
+        collection_thread = threading.Thread(target=target, daemon=True)
         collection_thread.start()
     
+    def collect_with_shared_ring(self):
+        """Collection thread: set up the ring buffer (imports numpy) off the Tk thread, then collect"""
+        self.data_manager.create_shared_ring()
+        self.data_manager.start_collection()
+    
+    def exit_when_started(self):
+        """Close the app once startup has been reported (benchmark runs)"""
+        if startup_timer.reported:
+            self.root.destroy()
+        else:
+            self.root.after(100, self.exit_when_started)
+    
     def run(self):
         """Start the application"""
-        self.root.mainloop()
+        if os.environ.get('IOT_MONITOR_EXIT_AFTER_STARTUP'):
+            self.exit_when_started()
+        metrics.start_from_env()
+        try:
+            self.root.mainloop()
+        finally:
+            self.shutdown_background()
+            profiler.stop()
+            metrics.stop()
+            log_manager.shutdown()
 
 if __name__ == "__main__":
     app = IoTMonitorApp()
@@ -8,11 +8,18 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.animation import FuncAnimation
 import collections
+import time
 from datetime import datetime
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.theme_manager import theme_manager
+from utils.startup_timer import startup_timer
+from utils.metrics import metrics
+from data.shared_ring import to_datetime64
+
+# Time from a chart update until the frame is rendered
+CHART_FRAME_SECONDS = metrics.histogram('iot_chart_frame_seconds', 'Live chart update-to-render time')
 
 class LiveDataPage:
     def __init__(self, parent, data_manager):
@@ -129,15 +136,28 @@ class LiveDataPage:
     def start_animation(self):
         """Start real-time animation"""
         self.animation = FuncAnimation(self.fig, self.update_chart, interval=1000, blit=False, cache_frame_data=False)
+        self.frame_start = None
+        self.canvas.mpl_connect('draw_event', self.on_frame_drawn)
         print("🔄 Started live data animation")
     
     def update_chart(self, frame):
         """Update chart with new data"""
         try:
-            # Get latest data
-            latest = self.data_manager.get_latest_data()
+            # Every recent sample from the shared ring buffer when there is one,
+            # otherwise the newest reading only
+            ring = self.data_manager.ring
+            if ring is not None:
+                records = ring.latest(self.max_points)
+                latest = self.record_to_reading(records[-1]) if len(records) else None
+            else:
+                latest = self.data_manager.get_latest_data()
             
             if latest and latest.get('timestamp'):
+                # Startup is complete once the first reading is on screen
+                if not startup_timer.has_mark("first live sample"):
+                    startup_timer.mark("first live sample")
+                    startup_timer.report()
+                
                 # Calculate power
                 power = latest['voltage'] * latest['current']
                 
@@ -148,18 +168,25 @@ class LiveDataPage:
                 self.power_var.set(f"{power:.2f} W")
                 self.update_var.set(latest['timestamp'].strftime("%H:%M:%S"))
                 
-                # Add to data collections
-                current_time = latest['timestamp']
-                self.time_data.append(current_time)
-                self.voltage_data.append(latest['voltage'])
-                self.current_data.append(latest['current'])
-                self.temp_data.append(latest['temperature'])
+                if ring is not None:
+                    # Views into shared memory; set_data keeps its own copy
+                    times = to_datetime64(records['timestamp'])
+                    series = (records['voltage'], records['current'], records['temperature'])
+                else:
+                    # Add to data collections
+                    current_time = latest['timestamp']
+                    self.time_data.append(current_time)
+                    self.voltage_data.append(latest['voltage'])
+                    self.current_data.append(latest['current'])
+                    self.temp_data.append(latest['temperature'])
+                    times = list(self.time_data)
+                    series = (list(self.voltage_data), list(self.current_data), list(self.temp_data))
                 
                 # Update plots
-                if len(self.time_data) > 1:
-                    self.voltage_line.set_data(list(self.time_data), list(self.voltage_data))
-                    self.current_line.set_data(list(self.time_data), list(self.current_data))
-                    self.temp_line.set_data(list(self.time_data), list(self.temp_data))
+                if len(times) > 1:
+                    self.voltage_line.set_data(times, series[0])
+                    self.current_line.set_data(times, series[1])
+                    self.temp_line.set_data(times, series[2])
                     
                     # Auto-scale axes
                     self.ax1.relim()
@@ -175,6 +202,8 @@ class LiveDataPage:
                     self.ax2.tick_params(axis='x', labelbottom=False)
                     
                     # Force canvas update
+                    if metrics.enabled:
+                        self.frame_start = time.perf_counter()
                     self.canvas.draw_idle()
             else:
                 # No data available yet
@@ -186,6 +215,21 @@ class LiveDataPage:
         
         return self.voltage_line, self.current_line, self.temp_line
     
+    def record_to_reading(self, record):
+        """A ring buffer record in the shape returned by get_latest_data()"""
+        return {
+            'voltage': float(record['voltage']),
+            'current': float(record['current']),
+            'temperature': float(record['temperature']),
+            'timestamp': to_datetime64(record['timestamp']).item()
+        }
+    
+    def on_frame_drawn(self, event):
+        """Record how long the last chart update took to reach the screen"""
+        if self.frame_start is not None:
+            CHART_FRAME_SECONDS.observe(time.perf_counter() - self.frame_start)
+            self.frame_start = None
+    
     def apply_theme(self):
         """Apply current theme to charts and widgets with enhanced styling"""
         colors = theme_manager.get_matplotlib_colors()
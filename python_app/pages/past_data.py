@@ -6,8 +6,8 @@ import tkinter as tk
 from tkinter import ttk
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import pandas as pd
 from datetime import datetime, timedelta
+import threading
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -35,7 +35,7 @@ class PastDataPage:
         
         # Configure grid columns for proper alignment
         controls_frame.columnconfigure(1, weight=0)
-        controls_frame.columnconfigure(3, weight=1)
+        controls_frame.columnconfigure(5, weight=1)
         
         # Row 1: Show records control
         ttk.Label(controls_frame, text="Show:", font=('Arial', 9, 'bold')).grid(row=0, column=0, padx=5, pady=5, sticky='w')
@@ -48,19 +48,38 @@ class PastDataPage:
         
         ttk.Label(controls_frame, text="records").grid(row=0, column=2, padx=5, pady=5, sticky='w')
         
+        # Demo readings are stored apart from real ones and only shown on request
+        ttk.Label(controls_frame, text="Source:", font=('Arial', 9, 'bold')).grid(row=0, column=3, padx=5, pady=5, sticky='w')
+        
+        self.source_var = tk.StringVar(value="Real")
+        source_combo = ttk.Combobox(controls_frame, textvariable=self.source_var,
+                                    values=["Real", "Demo", "All"], width=6, state='readonly')
+        source_combo.grid(row=0, column=4, padx=5, pady=5, sticky='w')
+        source_combo.bind('<<ComboboxSelected>>', lambda e: self.refresh_data())
+        
         # Buttons frame for better alignment
         buttons_frame = ttk.Frame(controls_frame)
-        buttons_frame.grid(row=0, column=3, padx=10, pady=5, sticky='e')
+        buttons_frame.grid(row=0, column=5, padx=10, pady=5, sticky='e')
         
         refresh_btn = ttk.Button(buttons_frame, text="Refresh", command=self.refresh_data)
         refresh_btn.pack(side='left', padx=2)
         
-        export_btn = ttk.Button(buttons_frame, text="Export CSV", command=self.export_data)
-        export_btn.pack(side='left', padx=2)
+        self.export_btn = ttk.Button(buttons_frame, text="Export Data", command=self.export_data)
+        self.export_btn.pack(side='left', padx=2)
         
         csv_btn = ttk.Button(buttons_frame, text="Open Folder", command=self.open_csv_folder)
         csv_btn.pack(side='left', padx=2)
         
+        # Row 2: export progress (shown only while an export runs)
+        self.export_status_var = tk.StringVar(value="")
+        self.export_progressbar = ttk.Progressbar(controls_frame, mode='determinate', maximum=100)
+        self.export_progressbar.grid(row=1, column=0, columnspan=3, padx=5, pady=(0, 5), sticky='ew')
+        self.export_status_label = ttk.Label(controls_frame, textvariable=self.export_status_var, font=('Arial', 9))
+        self.export_status_label.grid(row=1, column=3, columnspan=3, padx=10, pady=(0, 5), sticky='w')
+        self.export_progressbar.grid_remove()
+        self.export_status_label.grid_remove()
+        self.export_thread = None
+        
         # Statistics frame
         self.setup_statistics()
         
@@ -134,6 +153,18 @@ class PastDataPage:
     
     def setup_chart(self):
         """Setup historical data chart with proper sizing"""
+        self.create_figure()
+        
+        # Embed in tkinter with optimized spacing
+        self.canvas = FigureCanvasTkAgg(self.fig, self.frame)
+        canvas_widget = self.canvas.get_tk_widget()
+        canvas_widget.pack(fill='both', expand=True, padx=8, pady=(3, 10))
+        
+        # Apply initial theme
+        self.apply_theme()
+    
+    def create_figure(self):
+        """Create the figure, axes and lines (no Tk needed, so benchmarks can use Agg)"""
         # Create matplotlib figure with better sizing to show all elements
         self.fig, (self.ax1, self.ax2, self.ax3) = plt.subplots(3, 1, figsize=(12, 7))
         # No suptitle needed - clean layout with individual chart titles
@@ -166,17 +197,13 @@ class PastDataPage:
         self.ax3.tick_params(labelsize=7)
         self.ax3.set_ylim(15, 40)
         
+        # Shaded spans of recorded gaps, replaced on every update
+        self.gap_spans = []
+        self.no_data_text = None
+        
         # Responsive layout that prevents text overlap on smaller screens
         self.fig.tight_layout(pad=1.0, h_pad=0.6)
         self.fig.subplots_adjust(bottom=0.08, top=0.94, left=0.10, right=0.96)
-        
-        # Embed in tkinter with optimized spacing
-        self.canvas = FigureCanvasTkAgg(self.fig, self.frame)
-        canvas_widget = self.canvas.get_tk_widget()
-        canvas_widget.pack(fill='both', expand=True, padx=8, pady=(3, 10))
-        
-        # Apply initial theme
-        self.apply_theme()
     
     def refresh_data(self):
         """Refresh data from database and update displays"""
@@ -186,25 +213,40 @@ class PastDataPage:
             limit = None if range_val == "All" else int(range_val)
             
             # Get historical data
-            data = self.data_manager.get_historical_data(limit)
+            source = self.source
+            data = self.data_manager.get_historical_data(limit, source)
             
             if not data:
+                self.show_no_data_message()
                 return
             
-            # Convert to pandas DataFrame for easier analysis
-            df = pd.DataFrame(data)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df = df.sort_values('timestamp')  # Sort by time
+            df = self.to_dataframe(data)
+            
+            # Gaps come from the gaps table, not from scanning the readings
+            gaps = self.data_manager.get_gaps(df['timestamp'].iloc[0], df['timestamp'].iloc[-1], source)
             
             # Update statistics
             self.update_statistics(df)
             
             # Update chart
-            self.update_chart(df)
+            self.update_chart(df, gaps)
             
         except Exception as e:
             print(f"Error refreshing data: {e}")
     
+    @property
+    def source(self):
+        """'real', 'demo' or 'all' from the Source selector"""
+        return self.source_var.get().lower()
+    
+    def to_dataframe(self, data):
+        """Convert historical rows to a time-sorted DataFrame"""
+        # pandas is imported on first use to keep startup fast
+        import pandas as pd
+        df = pd.DataFrame(data)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df.sort_values('timestamp')  # Sort by time
+    
     def update_statistics(self, df):
         """Update statistics display"""
         if df.empty:
@@ -251,11 +293,16 @@ class PastDataPage:
         else:
             self.csv_info_var.set("CSV: Not available")
     
-    def update_chart(self, df):
+    def update_chart(self, df, gaps=()):
         """Update historical data chart with lively styling like live data page"""
         if df.empty:
             self.show_no_data_message()
             return
+        if self.no_data_text:
+            self.no_data_text.remove()
+            self.no_data_text = None
+        
+        self.shade_gaps(gaps, df['timestamp'].iloc[0], df['timestamp'].iloc[-1])
         
         # Update line data (same approach as live data page)
         self.voltage_line.set_data(df['timestamp'], df['voltage'])
@@ -283,6 +330,24 @@ class PastDataPage:
         # Force canvas update (same as live data)
         self.canvas.draw_idle()
     
+    def shade_gaps(self, gaps, first, last):
+        """Shade the intervals with no readings on all three charts, within [first, last]"""
+        for span in self.gap_spans:
+            span.remove()
+        self.gap_spans = []
+        
+        if not gaps:
+            return
+        import pandas as pd
+        colors = theme_manager.get_matplotlib_colors()
+        for gap in gaps:
+            start, end = max(pd.Timestamp(gap['start']), first), min(pd.Timestamp(gap['end']), last)
+            if start >= end:
+                continue
+            for ax in (self.ax1, self.ax2, self.ax3):
+                self.gap_spans.append(ax.axvspan(start, end, color=colors['grid_color'], alpha=0.5,
+                                                 linewidth=0, zorder=0))
+    
     def show_no_data_message(self):
         """Show message when no data is available"""
         colors = theme_manager.get_matplotlib_colors()
@@ -292,38 +357,98 @@ class PastDataPage:
         self.voltage_line.set_data([], [])
         self.current_line.set_data([], [])
         self.temp_line.set_data([], [])
+        self.shade_gaps((), None, None)
         
-        self.ax2.text(0.5, 0.5, '📊 No Historical Data Available\n\nStart collecting sensor data\nto see historical trends', 
-                     ha='center', va='center', transform=self.ax2.transAxes, fontsize=12, 
-                     color=text_color, weight='bold')
+        # Shown once, however often the (empty) source is refreshed
+        if self.no_data_text:
+            self.no_data_text.remove()
+        self.no_data_text = self.ax2.text(0.5, 0.5, '📊 No Historical Data Available\n\nStart collecting sensor data\nto see historical trends', 
+                                          ha='center', va='center', transform=self.ax2.transAxes, fontsize=12, 
+                                          color=text_color, weight='bold')
         
         self.canvas.draw()
     
     def export_data(self):
-        """Export data to CSV file"""
+        """Export the full history in chunks on a background thread (click again to cancel)"""
+        if self.export_thread and self.export_thread.is_alive():
+            self.export_cancel.set()
+            self.export_status_var.set("Cancelling export...")
+            return
+        
         try:
             from tkinter import filedialog
             
-            # Get data
-            data = self.data_manager.get_historical_data()
-            if not data:
+            if not self.data_manager.get_historical_data(1, self.source):
                 tk.messagebox.showwarning("No Data", "No data available to export")
                 return
             
-            # Ask for save location
+            # Ask for save location; the extension picks the format
             filename = filedialog.asksaveasfilename(
                 defaultextension=".csv",
-                filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+                filetypes=[("CSV files", "*.csv"), ("Gzipped CSV", "*.csv.gz"),
+                           ("Parquet files", "*.parquet"), ("All files", "*.*")]
             )
+            if not filename:
+                return
             
-            if filename:
-                df = pd.DataFrame(data)
-                df.to_csv(filename, index=False)
-                tk.messagebox.showinfo("Export Complete", f"Data exported to {filename}")
+            # Include readings still waiting for a batched write
+            self.data_manager.flush()
+            
+            self.export_progress = (0, 0)
+            self.export_result = None
+            self.export_cancel = threading.Event()
+            self.export_thread = threading.Thread(target=self.run_export, args=(filename, self.source),
+                                                  name='export', daemon=True)
+            self.export_thread.start()
+            
+            self.export_btn.configure(text="Cancel Export")
+            self.export_progressbar['value'] = 0
+            self.export_progressbar.grid()
+            self.export_status_label.grid()
+            self.frame.after(200, self.poll_export)
                 
         except Exception as e:
             tk.messagebox.showerror("Export Error", f"Failed to export data: {e}")
     
+    def run_export(self, filename, source):
+        """Export thread: never touches Tk, only leaves results for poll_export()"""
+        from data.exporter import export_readings, ExportCancelled
+        from data.raw_log import raw_log_dir
+        try:
+            rows = export_readings(self.data_manager.db_path, filename, progress=self.on_export_progress,
+                                   cancel_event=self.export_cancel, source=source,
+                                   raw_log_dir=raw_log_dir(self.data_manager.data_dir))
+            self.export_result = ('done', filename, rows)
+        except ExportCancelled:
+            self.export_result = ('cancelled', filename, None)
+        except Exception as e:
+            self.export_result = ('error', filename, e)
+    
+    def on_export_progress(self, done, total):
+        self.export_progress = (done, total)
+    
+    def poll_export(self):
+        """Show export progress from the Tk thread until the export finishes"""
+        done, total = self.export_progress
+        if total:
+            self.export_progressbar['value'] = 100 * done / total
+            if not self.export_cancel.is_set():
+                self.export_status_var.set(f"Exporting... {done:,} / {total:,} records")
+        
+        if self.export_result is None:
+            self.frame.after(200, self.poll_export)
+            return
+        
+        self.export_progressbar.grid_remove()
+        self.export_status_label.grid_remove()
+        self.export_btn.configure(text="Export Data")
+        
+        status, filename, detail = self.export_result
+        if status == 'done':
+            tk.messagebox.showinfo("Export Complete", f"{detail:,} records exported to {filename}")
+        elif status == 'error':
+            tk.messagebox.showerror("Export Error", f"Failed to export data: {detail}")
+    
     def open_csv_folder(self):
         """Open the CSV data folder in file explorer"""
         try:
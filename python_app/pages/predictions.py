@@ -6,28 +6,44 @@ import tkinter as tk
 from tkinter import ttk
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.collections import PolyCollection
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+import matplotlib.dates as mdates
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.pipeline import Pipeline
-import warnings
-warnings.filterwarnings('ignore')
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.theme_manager import theme_manager
+from prediction.engine import ForecastEngine
+from prediction.scheduler import ForecastScheduler
+
+# Room left past the newest forecast step, as a share of the shown span: the
+# x limits (and the cached background) stay put until the data runs past them
+XLIM_PADDING = 0.25
 
 class PredictionsPage:
-    def __init__(self, parent, data_manager):
+    def __init__(self, parent, data_manager, scheduler=None):
         self.parent = parent
         self.data_manager = data_manager
         
+        # Background scheduler that precomputes forecasts; the page only draws them
+        self.owns_scheduler = scheduler is None
+        if scheduler is None:
+            scheduler = ForecastScheduler(data_manager.db_path)
+            scheduler.start()
+        self.scheduler = scheduler
+        self.pending_timer = None
+        
         # Create main frame
         self.frame = ttk.Frame(parent)
         
-        # Prediction models
+        # GUI-free forecasting engine (data prep, models, intervals)
+        self.engine = ForecastEngine()
+        
+        # Prediction models (trained by the engine)
         self.voltage_model = None
         self.current_model = None
         self.temp_model = None
@@ -53,8 +69,9 @@ class PredictionsPage:
         ttk.Label(controls_frame, text="Predict:", font=('Arial', 9, 'bold')).grid(row=0, column=0, padx=5, pady=5, sticky='w')
         
         self.predict_minutes_var = tk.StringVar(value="10")
+        self.horizon_options = ["1", "5", "10", "15", "30", "60"]
         minutes_combo = ttk.Combobox(controls_frame, textvariable=self.predict_minutes_var,
-                                   values=["1", "5", "10", "15", "30", "60"], width=6)
+                                   values=self.horizon_options, width=6)
         minutes_combo.grid(row=0, column=1, padx=5, pady=5, sticky='w')
         minutes_combo.bind('<<ComboboxSelected>>', lambda e: self.generate_predictions())
         
@@ -92,7 +109,7 @@ class PredictionsPage:
         buttons_frame.grid(row=2, column=0, columnspan=6, pady=10, sticky='w')
         
         predict_btn = ttk.Button(buttons_frame, text="🚀 Generate Predictions", 
-                               command=self.generate_predictions)
+                               command=self.refresh_predictions)
         predict_btn.pack(side='left', padx=5)
         
         self.auto_refresh_var = tk.BooleanVar(value=True)
@@ -114,6 +131,31 @@ class PredictionsPage:
     
     def setup_chart(self):
         """Setup prediction chart with proper sizing and no redundant titles"""
+        self.create_figure()
+        
+        # Embed in tkinter with optimized spacing
+        self.canvas = FigureCanvasTkAgg(self.fig, self.frame)
+        canvas_widget = self.canvas.get_tk_widget()
+        canvas_widget.pack(fill='both', expand=True, padx=8, pady=(3, 15))
+        
+        # Cache the static background after every full draw for blitting
+        self.background = None
+        self.background_bounds = None
+        self.canvas.mpl_connect('draw_event', self.on_chart_draw)
+        
+        # Add navigation toolbar with minimal spacing
+        from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
+        toolbar_frame = ttk.Frame(self.frame)
+        toolbar_frame.pack(fill='x', padx=8, pady=(0, 5))
+        
+        self.toolbar = NavigationToolbar2Tk(self.canvas, toolbar_frame)
+        self.toolbar.update()
+        
+        # Apply initial theme
+        self.apply_theme()
+    
+    def create_figure(self):
+        """Create the figure, axes and chart artists (no Tk needed, so benchmarks can use Agg)"""
         # Create matplotlib figure with better sizing
         self.fig, (self.ax1, self.ax2, self.ax3) = plt.subplots(3, 1, figsize=(12, 8))
         
@@ -145,112 +187,77 @@ class PredictionsPage:
         self.ax3.tick_params(labelsize=8)
         self.ax3.set_ylim(15, 40)
         
+        # Format x-axis once; only the limits change on refresh
+        self.ax3.tick_params(axis='x', rotation=45, labelsize=8)
+        self.ax1.tick_params(axis='x', labelbottom=False, labelsize=8)
+        self.ax2.tick_params(axis='x', labelbottom=False, labelsize=8)
+        
+        # Persistent lines, bands and markers updated in place on every refresh
+        self.create_chart_artists()
+        
         # Responsive layout that prevents text overlap on smaller screens
         self.fig.tight_layout(pad=1.2, h_pad=0.8)
         self.fig.subplots_adjust(bottom=0.10, top=0.94, left=0.10, right=0.96)
-        
-        # Embed in tkinter with optimized spacing
-        self.canvas = FigureCanvasTkAgg(self.fig, self.frame)
-        canvas_widget = self.canvas.get_tk_widget()
-        canvas_widget.pack(fill='both', expand=True, padx=8, pady=(3, 15))
-        
-        # Add navigation toolbar with minimal spacing
-        from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
-        toolbar_frame = ttk.Frame(self.frame)
-        toolbar_frame.pack(fill='x', padx=8, pady=(0, 5))
-        
-        self.toolbar = NavigationToolbar2Tk(self.canvas, toolbar_frame)
-        self.toolbar.update()
-        
-        # Apply initial theme
-        self.apply_theme()
     
     def generate_predictions(self):
-        """Generate enhanced predictions with 30-minute focus and smart data handling"""
+        """Draw the precomputed forecast for the current selection"""
         try:
-            # Get historical data based on user selection
+            if self.pending_timer:
+                self.frame.after_cancel(self.pending_timer)
+                self.pending_timer = None
+            
+            # Get selection; forecasts are keyed by model and training window
+            model_type = self.model_var.get()
             data_range = self.data_range_var.get()
-            if data_range == "All":
-                data = self.data_manager.get_historical_data(10000)  # Get all available data
-            else:
-                data = self.data_manager.get_historical_data(int(data_range))
+            data_points = 10000 if data_range == "All" else int(data_range)
+            predict_minutes = int(self.predict_minutes_var.get())
+            
+            # Make sure the scheduler keeps this selection fresh
+            horizons = [int(option) for option in self.horizon_options]
+            self.scheduler.request(model_type, data_points, horizons)
             
+            data = self.data_manager.get_historical_data(data_points)
             if len(data) < 10:  # Need minimum data for predictions
                 self.show_insufficient_data()
                 return
             
-            # Convert to DataFrame and clean data
+            # Convert to DataFrame and clean data (for the historical trace)
             df = pd.DataFrame(data)
             df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df = df.sort_values('timestamp')
-            
-            # Remove outliers and invalid data
-            df = self.clean_data(df)
+            df = self.clean_data(df.sort_values('timestamp'))
             
             if len(df) < 10:
                 self.show_insufficient_data()
                 return
             
-            # Prepare data for ML with enhanced features
-            X, y_voltage, y_current, y_temp = self.prepare_enhanced_data(df)
-            
-            # Train enhanced models
-            self.train_enhanced_models(X, y_voltage, y_current, y_temp)
-            
-            # Generate predictions with 30-minute focus
-            predictions = self.predict_future_enhanced(df)
+            predictions = self.scheduler.get_forecast(model_type, data_points, predict_minutes)
+            if predictions is None:
+                # Scheduler has not finished this selection yet; check back shortly
+                self.show_pending_message()
+                self.pending_timer = self.frame.after(1000, self.generate_predictions)
+                return
             
             # Update chart with zoom functionality
             self.update_enhanced_chart(df, predictions)
             
-            # Model info removed for cleaner interface
-            print(f"✅ Generated predictions using {len(df)} data points with {self.model_var.get()} model")
-            
         except Exception as e:
             print(f"Error generating predictions: {e}")
             self.show_error_message(str(e))
     
+    def refresh_predictions(self):
+        """Ask the scheduler for a fresh run, then redraw once it lands"""
+        if self.pending_timer:
+            self.frame.after_cancel(self.pending_timer)
+        self.scheduler.run_now()
+        self.pending_timer = self.frame.after(1000, self.generate_predictions)
+    
     def clean_data(self, df):
         """Clean and filter data for better predictions"""
-        # Remove rows with all zeros (inactive periods)
-        df = df[(df['voltage'] != 0) | (df['current'] != 0) | (df['temperature'] != 0)]
-        
-        # Remove extreme outliers using IQR method
-        for column in ['voltage', 'current', 'temperature']:
-            Q1 = df[column].quantile(0.25)
-            Q3 = df[column].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            df = df[(df[column] >= lower_bound) & (df[column] <= upper_bound)]
-        
-        return df
+        return self.engine.clean(df)
     
     def prepare_enhanced_data(self, df):
         """Prepare enhanced data for machine learning with time-based features"""
-        # Convert timestamps to minutes since first reading for better 30-min predictions
-        start_time = df['timestamp'].iloc[0]
-        df['minutes'] = (df['timestamp'] - start_time).dt.total_seconds() / 60
-        
-        # Add time-based features for better predictions
-        df['hour_of_day'] = df['timestamp'].dt.hour
-        df['day_of_week'] = df['timestamp'].dt.dayofweek
-        df['minute_of_hour'] = df['timestamp'].dt.minute
-        
-        # Create feature matrix with multiple time scales
-        X = np.column_stack([
-            df['minutes'].values,
-            df['hour_of_day'].values,
-            df['minute_of_hour'].values,
-            np.sin(2 * np.pi * df['hour_of_day'] / 24),  # Cyclical hour feature
-            np.cos(2 * np.pi * df['hour_of_day'] / 24)
-        ])
-        
-        y_voltage = df['voltage'].values
-        y_current = df['current'].values
-        y_temp = df['temperature'].values
-        
-        return X, y_voltage, y_current, y_temp
+        return self.engine.prepare_features(df)
     
     def prepare_data(self, df):
         """Prepare data for machine learning (legacy method for compatibility)"""
@@ -258,43 +265,12 @@ class PredictionsPage:
     
     def train_enhanced_models(self, X, y_voltage, y_current, y_temp):
         """Train enhanced prediction models with better algorithms"""
-        model_type = self.model_var.get()
-        
-        if model_type == "Advanced":
-            # Advanced models with regularization
-            from sklearn.ensemble import RandomForestRegressor
-            from sklearn.linear_model import Ridge
-            
-            self.voltage_model = RandomForestRegressor(n_estimators=50, random_state=42, max_depth=10)
-            self.current_model = RandomForestRegressor(n_estimators=50, random_state=42, max_depth=10)
-            self.temp_model = RandomForestRegressor(n_estimators=50, random_state=42, max_depth=10)
-            
-        elif model_type == "Polynomial":
-            # Enhanced polynomial regression with regularization
-            from sklearn.linear_model import Ridge
-            self.voltage_model = Pipeline([
-                ('poly', PolynomialFeatures(degree=3, include_bias=False)),
-                ('ridge', Ridge(alpha=0.1))
-            ])
-            self.current_model = Pipeline([
-                ('poly', PolynomialFeatures(degree=3, include_bias=False)),
-                ('ridge', Ridge(alpha=0.1))
-            ])
-            self.temp_model = Pipeline([
-                ('poly', PolynomialFeatures(degree=3, include_bias=False)),
-                ('ridge', Ridge(alpha=0.1))
-            ])
-        else:
-            # Enhanced linear regression with regularization
-            from sklearn.linear_model import Ridge
-            self.voltage_model = Ridge(alpha=0.1)
-            self.current_model = Ridge(alpha=0.1)
-            self.temp_model = Ridge(alpha=0.1)
+        self.engine.model_type = self.model_var.get()
+        self.engine.train(X, y_voltage, y_current, y_temp)
         
-        # Train models
-        self.voltage_model.fit(X, y_voltage)
-        self.current_model.fit(X, y_current)
-        self.temp_model.fit(X, y_temp)
+        self.voltage_model = self.engine.models['voltage']
+        self.current_model = self.engine.models['current']
+        self.temp_model = self.engine.models['temperature']
     
     def train_models(self, X, y_voltage, y_current, y_temp):
         """Train prediction models (legacy method for compatibility)"""
@@ -302,175 +278,167 @@ class PredictionsPage:
     
     def predict_future_enhanced(self, df):
         """Generate enhanced future predictions with 30-minute focus"""
-        predict_minutes = int(self.predict_minutes_var.get())
-        
-        # Get time range for predictions
-        last_time = df['timestamp'].iloc[-1]
-        start_time = df['timestamp'].iloc[0]
-        
-        # Create future time points with higher resolution for 30-minute predictions
-        future_times = []
-        future_features = []
-        
-        # Generate predictions with adaptive time step for smoother curves
-        if predict_minutes <= 10:
-            time_step = 1  # 1-minute steps for short predictions
-        elif predict_minutes <= 30:
-            time_step = 2  # 2-minute steps for medium predictions
-        else:
-            time_step = 5  # 5-minute steps for longer predictions
-        
-        num_steps = predict_minutes // time_step
-        
-        for i in range(1, num_steps + 1):
-            future_time = last_time + timedelta(minutes=i * time_step)
-            future_times.append(future_time)
-            
-            # Calculate features for future time
-            minutes_since_start = (future_time - start_time).total_seconds() / 60
-            hour_of_day = future_time.hour
-            minute_of_hour = future_time.minute
-            
-            features = [
-                minutes_since_start,
-                hour_of_day,
-                minute_of_hour,
-                np.sin(2 * np.pi * hour_of_day / 24),
-                np.cos(2 * np.pi * hour_of_day / 24)
-            ]
-            future_features.append(features)
-        
-        # Make predictions
-        X_future = np.array(future_features)
-        voltage_pred = self.voltage_model.predict(X_future)
-        current_pred = self.current_model.predict(X_future)
-        temp_pred = self.temp_model.predict(X_future)
-        
-        # Clamp predictions to realistic ranges (same as other pages)
-        voltage_pred = np.clip(voltage_pred, 2.5, 6.0)  # Realistic voltage range
-        current_pred = np.clip(current_pred, 0.0, 3.0)  # Realistic current range
-        temp_pred = np.clip(temp_pred, 15.0, 40.0)      # Realistic temperature range
-        
-        # Add confidence intervals (simple approach using recent variance)
-        recent_data = df.tail(50)  # Last 50 points for variance calculation
-        voltage_std = recent_data['voltage'].std()
-        current_std = recent_data['current'].std()
-        temp_std = recent_data['temperature'].std()
-        
-        return {
-            'times': future_times,
-            'voltage': voltage_pred,
-            'current': current_pred,
-            'temperature': temp_pred,
-            'voltage_confidence': voltage_std,
-            'current_confidence': current_std,
-            'temp_confidence': temp_std
-        }
+        return self.engine.forecast(df, int(self.predict_minutes_var.get()))
     
     def predict_future(self, df):
         """Generate future predictions (legacy method for compatibility)"""
         return self.predict_future_enhanced(df)
     
-    def update_enhanced_chart(self, historical_df, predictions):
-        """Update prediction chart with enhanced features and zoom functionality"""
-        # Clear previous plots
-        self.ax1.clear()
-        self.ax2.clear()
-        self.ax3.clear()
+    def create_chart_artists(self):
+        """Create the artists that every refresh updates instead of re-plotting"""
+        self.series = []
+        chart_configs = [
+            (self.ax1, 'voltage', 'voltage'),
+            (self.ax2, 'current', 'current'),
+            (self.ax3, 'temperature', 'temp')
+        ]
         
-        # Get enhanced colors
+        for ax, channel, prefix in chart_configs:
+            ax.xaxis_date()
+            
+            # Data artists are animated so they can be blitted over the cached background
+            hist_line, = ax.plot([], [], linewidth=2.0, alpha=0.7, linestyle='-', animated=True)
+            pred_line, = ax.plot([], [], linewidth=2.5, alpha=0.8, linestyle='-', animated=True)
+            band = PolyCollection([], alpha=0.2, animated=True)
+            ax.add_collection(band, autolim=False)
+            start_line = ax.axvline(x=0, linestyle=':', alpha=0.8, linewidth=2, animated=True, visible=False)
+            
+            # Status messages replace the data while no forecast is shown
+            message = ax.text(0.5, 0.5, '', ha='center', va='center', transform=ax.transAxes,
+                             fontsize=14, weight='bold', visible=False)
+            
+            self.series.append({
+                'ax': ax,
+                'channel': channel,
+                'prefix': prefix,
+                'hist_line': hist_line,
+                'pred_line': pred_line,
+                'band': band,
+                'start_line': start_line,
+                'message': message
+            })
+        
+        self.last_xlim = None
+        self.showing_message = False
+    
+    def data_artists(self):
+        """All animated artists in draw order"""
+        for series in self.series:
+            yield series['band']
+            yield series['hist_line']
+            yield series['pred_line']
+            yield series['start_line']
+    
+    def update_artist_colors(self):
+        """Recolor data artists and rebuild legends for the current theme"""
         colors = theme_manager.get_matplotlib_colors()
-        
+        hist_colors = [colors['voltage_color'], colors['current_color'], colors['temp_color']]
+        if theme_manager.is_dark_mode:
+            pred_colors = ['#ff6b6b', '#4ecdc4', '#45b7d1']
+            line_color = '#ffd700'
+        else:
+            pred_colors = ['#e74c3c', '#16a085', '#3498db']
+            line_color = '#f39c12'
+        
+        for series, hist_color, pred_color in zip(self.series, hist_colors, pred_colors):
+            series['hist_line'].set_color(hist_color)
+            series['pred_line'].set_color(pred_color)
+            series['band'].set_facecolor(pred_color)
+            series['band'].set_edgecolor('none')
+            series['start_line'].set_color(line_color)
+            
+            # Legend uses proxies since data artists may be hidden when it is built
+            handles = [
+                Line2D([], [], color=hist_color, linewidth=2.0, alpha=0.7, label='📊 Historical Data'),
+                Line2D([], [], color=pred_color, linewidth=2.5, alpha=0.8, label='🔮 Prediction'),
+                Patch(facecolor=pred_color, alpha=0.2, label='Prediction Interval')
+            ]
+            if series['ax'] is self.ax1:
+                handles.append(Line2D([], [], color=line_color, linestyle=':', linewidth=2, alpha=0.8,
+                                      label='Prediction Start'))
+            series['ax'].legend(handles=handles, fontsize=8, framealpha=0.9, loc='upper left')
+    
+    def update_enhanced_chart(self, historical_df, predictions):
+        """Update prediction chart in place with zoom functionality"""
         # Apply zoom settings
         zoom_df = self.apply_zoom_filter(historical_df)
         
-        # Plot historical data with smooth, blended lines
-        self.ax1.plot(zoom_df['timestamp'], zoom_df['voltage'], 
-                     color=colors['voltage_color'], label='📊 Historical Data', linewidth=2.0, alpha=0.7,
-                     linestyle='-', marker='', markersize=0)
-        self.ax2.plot(zoom_df['timestamp'], zoom_df['current'], 
-                     color=colors['current_color'], label='📊 Historical Data', linewidth=2.0, alpha=0.7,
-                     linestyle='-', marker='', markersize=0)
-        self.ax3.plot(zoom_df['timestamp'], zoom_df['temperature'], 
-                     color=colors['temp_color'], label='📊 Historical Data', linewidth=2.0, alpha=0.7,
-                     linestyle='-', marker='', markersize=0)
-        
-        # Plot predictions with smooth, blended lines
-        pred_color_v = '#ff6b6b' if theme_manager.is_dark_mode else '#e74c3c'
-        pred_color_c = '#4ecdc4' if theme_manager.is_dark_mode else '#16a085'
-        pred_color_t = '#45b7d1' if theme_manager.is_dark_mode else '#3498db'
-        
-        self.ax1.plot(predictions['times'], predictions['voltage'], 
-                     color=pred_color_v, linestyle='-', label='🔮 30-Min Prediction', 
-                     linewidth=2.5, alpha=0.8, marker='', markersize=0)
-        self.ax2.plot(predictions['times'], predictions['current'], 
-                     color=pred_color_c, linestyle='-', label='🔮 30-Min Prediction', 
-                     linewidth=2.5, alpha=0.8, marker='', markersize=0)
-        self.ax3.plot(predictions['times'], predictions['temperature'], 
-                     color=pred_color_t, linestyle='-', label='🔮 30-Min Prediction', 
-                     linewidth=2.5, alpha=0.8, marker='', markersize=0)
-        
-        # Add confidence bands if available
-        if 'voltage_confidence' in predictions:
-            voltage_upper = predictions['voltage'] + predictions['voltage_confidence']
-            voltage_lower = predictions['voltage'] - predictions['voltage_confidence']
-            self.ax1.fill_between(predictions['times'], voltage_lower, voltage_upper, 
-                                alpha=0.2, color=pred_color_v, label='Confidence Band')
+        hist_x = mdates.date2num(zoom_df['timestamp'].to_numpy())
+        pred_x = mdates.date2num(pd.DatetimeIndex(predictions['times']).to_numpy())
+        if len(pred_x) == 0:
+            return
+        
+        for series in self.series:
+            channel, prefix = series['channel'], series['prefix']
+            lower = np.asarray(predictions[f'{prefix}_lower'])
+            upper = np.asarray(predictions[f'{prefix}_upper'])
             
-            current_upper = predictions['current'] + predictions['current_confidence']
-            current_lower = predictions['current'] - predictions['current_confidence']
-            self.ax2.fill_between(predictions['times'], current_lower, current_upper, 
-                                alpha=0.2, color=pred_color_c, label='Confidence Band')
+            series['hist_line'].set_data(hist_x, zoom_df[channel].to_numpy())
+            series['pred_line'].set_data(pred_x, predictions[channel])
             
-            temp_upper = predictions['temperature'] + predictions['temp_confidence']
-            temp_lower = predictions['temperature'] - predictions['temp_confidence']
-            self.ax3.fill_between(predictions['times'], temp_lower, temp_upper, 
-                                alpha=0.2, color=pred_color_t, label='Confidence Band')
-        
-        # Add vertical line at prediction start with better styling
-        if len(predictions['times']) > 0:
-            prediction_start = predictions['times'][0]
-            line_color = '#ffd700' if theme_manager.is_dark_mode else '#f39c12'
-            self.ax1.axvline(x=prediction_start, color=line_color, linestyle=':', alpha=0.8, linewidth=2, label='Prediction Start')
-            self.ax2.axvline(x=prediction_start, color=line_color, linestyle=':', alpha=0.8, linewidth=2)
-            self.ax3.axvline(x=prediction_start, color=line_color, linestyle=':', alpha=0.8, linewidth=2)
-        
-        # Enhanced formatting with responsive spacing to prevent text overlap
-        self.ax1.set_title('⚡ Voltage Prediction', fontsize=11, weight='bold', pad=8)
-        self.ax1.set_ylabel('Voltage (V)', fontsize=9, weight='bold')
-        self.ax1.grid(True, alpha=0.3, linestyle='--')
-        self.ax1.legend(fontsize=8, framealpha=0.9, loc='upper left')
-        # Set realistic voltage scale (2.5V to 6V) with 0.5V increments
-        self.ax1.set_ylim(2.5, 6.0)
-        self.ax1.set_yticks(np.arange(2.5, 6.5, 0.5))
-        
-        self.ax2.set_title('🔌 Current Prediction', fontsize=11, weight='bold', pad=8)
-        self.ax2.set_ylabel('Current (A)', fontsize=9, weight='bold')
-        self.ax2.grid(True, alpha=0.3, linestyle='--')
-        self.ax2.legend(fontsize=8, framealpha=0.9, loc='upper left')
-        # Set realistic current scale (0A to 3A) with 0.5A increments
-        self.ax2.set_ylim(0, 3.0)
-        self.ax2.set_yticks(np.arange(0, 3.5, 0.5))
-        
-        self.ax3.set_title('🌡️ Temperature Prediction', fontsize=11, weight='bold', pad=8)
-        self.ax3.set_ylabel('Temperature (°C)', fontsize=9, weight='bold')
-        self.ax3.set_xlabel('Time', fontsize=9, weight='bold')
-        self.ax3.grid(True, alpha=0.3, linestyle='--')
-        self.ax3.legend(fontsize=8, framealpha=0.9, loc='upper left')
-        # Set realistic temperature scale (15°C to 40°C)
-        self.ax3.set_ylim(15, 40)
-        
-        # Format x-axis with responsive spacing to prevent overlap
-        self.ax3.tick_params(axis='x', rotation=45, labelsize=8)
-        self.ax1.tick_params(axis='x', labelbottom=False, labelsize=8)
-        self.ax2.tick_params(axis='x', labelbottom=False, labelsize=8)
-        self.ax1.tick_params(axis='y', labelsize=8)
-        self.ax2.tick_params(axis='y', labelsize=8)
-        self.ax3.tick_params(axis='y', labelsize=8)
+            # Replace the band polygon vertices instead of creating a new fill
+            series['band'].set_verts([np.column_stack([
+                np.concatenate([pred_x, pred_x[::-1]]),
+                np.concatenate([upper, lower[::-1]])
+            ])])
+            
+            # Vertical line at prediction start
+            series['start_line'].set_xdata([pred_x[0], pred_x[0]])
+            
+            series['message'].set_visible(False)
+            for artist in (series['hist_line'], series['pred_line'], series['band'], series['start_line']):
+                artist.set_visible(True)
+        
+        # Only limits and tick labels depend on the time span
+        xlim = self.chart_xlim(min(hist_x[0], pred_x[0]) if len(hist_x) else pred_x[0], pred_x[-1])
+        if xlim != self.last_xlim or self.showing_message:
+            for ax in (self.ax1, self.ax2, self.ax3):
+                ax.set_xlim(*xlim)
+            self.last_xlim = xlim
+            self.showing_message = False
+            self.canvas.draw_idle()
+        else:
+            # Same axes: redraw only the data over the cached background
+            self.blit_chart()
+    
+    def chart_xlim(self, start, end):
+        """X limits for data spanning [start, end] (matplotlib date numbers)
+
+        The previous limits are kept while they still hold the data and it
+        fills at least half of them; otherwise a new window with XLIM_PADDING
+        of room on the right is chosen. New samples and forecasts then only
+        move the data, so the chart is blitted instead of fully redrawn.
+        """
+        if self.last_xlim:
+            low, high = self.last_xlim
+            if low <= start and end <= high and end - start >= (high - low) / 2:
+                return self.last_xlim
+        span = max(end - start, 1 / 1440)  # At least a minute
+        return (start, end + span * XLIM_PADDING)
+    
+    def on_chart_draw(self, event):
+        """Cache the static background, then draw the animated data on top"""
+        if event is not None:
+            self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+            self.background_bounds = tuple(self.fig.bbox.bounds)
+            renderer = event.renderer
+        else:
+            renderer = self.canvas.get_renderer()
         
-        # Maintain responsive layout that prevents text overlap
-        self.fig.subplots_adjust(left=0.10, right=0.96, top=0.94, bottom=0.10, hspace=0.3)
-        self.canvas.draw()
+        for artist in self.data_artists():
+            if artist.get_visible():
+                artist.draw(renderer)
+    
+    def blit_chart(self):
+        """Redraw only the data artists over the cached background"""
+        if self.background is None or self.background_bounds != tuple(self.fig.bbox.bounds):
+            # No valid background (first draw, resize or figure save); full redraw
+            self.canvas.draw_idle()
+            return
+        
+        self.canvas.restore_region(self.background)
+        self.on_chart_draw(None)
+        self.canvas.blit(self.fig.bbox)
     
     def apply_zoom_filter(self, df):
         """Apply zoom filter based on user selection"""
@@ -501,6 +469,11 @@ class PredictionsPage:
     
 
     
+    def shutdown(self):
+        """Stop the scheduler this page started (called once the app window is gone)"""
+        if self.owns_scheduler:
+            self.scheduler.stop()
+    
     def apply_theme(self):
         """Apply current theme with perfect dark/light mode compatibility"""
         colors = theme_manager.get_matplotlib_colors()
@@ -509,6 +482,9 @@ class PredictionsPage:
         # Update figure background for dark/light mode
         self.fig.patch.set_facecolor(colors['figure_bg'])
         
+        # Recolor persistent data artists and their legends
+        self.update_artist_colors()
+        
         # Enhanced chart styling with perfect dark mode support
         chart_configs = [
             (self.ax1, '⚡ Voltage Prediction', (2.5, 6.0)),
@@ -617,66 +593,47 @@ class PredictionsPage:
             self.generate_predictions()
             self.start_auto_refresh()  # Schedule next refresh
     
+    def show_chart_messages(self, messages, fontsize=14):
+        """Hide the data artists and show one (text, color, weight) message per chart"""
+        for series, (text, color, weight) in zip(self.series, messages):
+            for artist in (series['hist_line'], series['pred_line'], series['band'], series['start_line']):
+                artist.set_visible(False)
+            series['message'].set_text(text)
+            series['message'].set_color(color)
+            series['message'].set_fontsize(fontsize)
+            series['message'].set_weight(weight)
+            series['message'].set_visible(bool(text))
+        
+        self.showing_message = True
+        self.canvas.draw_idle()
+    
     def show_insufficient_data(self):
         """Show enhanced message when insufficient data for predictions"""
-        self.ax1.clear()
-        self.ax2.clear()
-        self.ax3.clear()
-        
-        colors = theme_manager.get_matplotlib_colors()
-        text_color = colors['text_color']
-        
-        self.ax1.text(0.5, 0.5, '📊 Insufficient Data for Predictions\n\nNeed at least 10 data points\nCurrently collecting sensor data...', 
-                     ha='center', va='center', transform=self.ax1.transAxes, fontsize=14, 
-                     color=text_color, weight='bold')
-        self.ax2.text(0.5, 0.5, '⏳ Collecting Data...\n\nPlease wait while the system\ngathers sensor readings', 
-                     ha='center', va='center', transform=self.ax2.transAxes, fontsize=14,
-                     color=text_color, weight='bold')
-        self.ax3.text(0.5, 0.5, '🔄 Auto-refresh enabled\n\nPredictions will appear\nautomatically when ready', 
-                     ha='center', va='center', transform=self.ax3.transAxes, fontsize=14,
-                     color=text_color, weight='bold')
-        
-        # Apply theme to empty charts with realistic scales
-        chart_configs = [
-            (self.ax1, (2.5, 6.0)),
-            (self.ax2, (0, 3.0)),
-            (self.ax3, (15, 40))
-        ]
+        text_color = theme_manager.get_matplotlib_colors()['text_color']
         
-        for i, (ax, y_range) in enumerate(chart_configs):
-            ax.set_facecolor(colors['axes_bg'])
-            ax.set_ylim(y_range[0], y_range[1])  # Set realistic scales
-            
-            # Set custom tick spacing for voltage and current (0.5 increments)
-            if i == 0:  # Voltage
-                ax.set_yticks(np.arange(2.5, 6.5, 0.5))
-            elif i == 1:  # Current
-                ax.set_yticks(np.arange(0, 3.5, 0.5))
-            # Temperature keeps default ticks
-            
-            for spine in ax.spines.values():
-                spine.set_color(colors['text_color'])
-                spine.set_alpha(0.3)
-        
-        self.canvas.draw()
+        self.show_chart_messages([
+            ('📊 Insufficient Data for Predictions\n\nNeed at least 10 real data points\n(demo readings are not used)', text_color, 'bold'),
+            ('⏳ Collecting Data...\n\nPlease wait while the system\ngathers sensor readings', text_color, 'bold'),
+            ('🔄 Auto-refresh enabled\n\nPredictions will appear\nautomatically when ready', text_color, 'bold')
+        ])
+    
+    def show_pending_message(self):
+        """Show message while the scheduler computes the first forecast"""
+        text_color = theme_manager.get_matplotlib_colors()['text_color']
+        
+        self.show_chart_messages([
+            ('', text_color, 'bold'),
+            ('🔮 Computing Forecasts...\n\nPredictions will appear\nautomatically when ready', text_color, 'bold'),
+            ('', text_color, 'bold')
+        ])
     
     def show_error_message(self, error_msg):
         """Show error message on charts"""
-        self.ax1.clear()
-        self.ax2.clear()
-        self.ax3.clear()
-        
         colors = theme_manager.get_matplotlib_colors()
-        text_color = '#ff6b6b' if theme_manager.is_dark_mode else '#e74c3c'
-        
-        self.ax1.text(0.5, 0.5, f'❌ Prediction Error\n\n{error_msg}', 
-                     ha='center', va='center', transform=self.ax1.transAxes, fontsize=12, 
-                     color=text_color, weight='bold')
-        self.ax2.text(0.5, 0.5, '🔧 Troubleshooting Tips:\n\n• Check data quality\n• Try different model\n• Reduce prediction time', 
-                     ha='center', va='center', transform=self.ax2.transAxes, fontsize=11,
-                     color=colors['text_color'])
-        self.ax3.text(0.5, 0.5, '🔄 Click "Generate Predictions"\nto try again', 
-                     ha='center', va='center', transform=self.ax3.transAxes, fontsize=12,
-                     color=colors['text_color'], weight='bold')
-        
-        self.canvas.draw()
\ No newline at end of file
+        error_color = '#ff6b6b' if theme_manager.is_dark_mode else '#e74c3c'
+        
+        self.show_chart_messages([
+            (f'❌ Prediction Error\n\n{error_msg}', error_color, 'bold'),
+            ('🔧 Troubleshooting Tips:\n\n• Check data quality\n• Try different model\n• Reduce prediction time', colors['text_color'], 'normal'),
+            ('🔄 Click "Generate Predictions"\nto try again', colors['text_color'], 'bold')
+        ], fontsize=12)
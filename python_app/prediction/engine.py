@@ -0,0 +1,255 @@
+"""
+Forecast Engine - GUI-free data loading, cleaning, features and models
+"""
+
+import sqlite3
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import warnings
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.data_cleaning import clean_sensor_data, SENSOR_CHANNELS
+from prediction.intervals import PredictionIntervals
+from utils.metrics import metrics
+from data.partitions import PartitionRouter
+
+MODEL_TYPES = ("Linear", "Polynomial", "Advanced")
+
+# Realistic ranges (same as the chart scales on every page)
+CHANNEL_RANGES = {
+    'voltage': (2.5, 6.0),
+    'current': (0.0, 3.0),
+    'temperature': (15.0, 40.0)
+}
+
+# Prefix used for interval keys in forecast dicts
+INTERVAL_PREFIX = {'voltage': 'voltage', 'current': 'current', 'temperature': 'temp'}
+
+TRAINING_SECONDS = metrics.histogram('iot_prediction_training_seconds',
+                                     'Time to train all channel models and their intervals')
+
+
+def load_readings(db_path, limit=None, source='real'):
+    """Load the most recent readings from a database, oldest first
+
+    Real readings only (what models are trained on) unless `source` is 'demo' or 'all'.
+    """
+    rows = list(PartitionRouter(db_path, source).select(descending=True, limit=limit))
+    df = pd.DataFrame(rows[::-1], columns=['timestamp', 'voltage', 'temperature', 'current'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+
+def init_forecast_table(conn):
+    """Create the forecasts table used by batch runs and the scheduler"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS forecasts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            generated_at DATETIME NOT NULL,
+            model TEXT NOT NULL,
+            data_points INTEGER,
+            horizon_minutes INTEGER NOT NULL,
+            source_db TEXT,
+            step_time DATETIME NOT NULL,
+            voltage REAL, voltage_lower REAL, voltage_upper REAL,
+            current REAL, current_lower REAL, current_upper REAL,
+            temperature REAL, temp_lower REAL, temp_upper REAL
+        )
+    ''')
+
+    # Tables created before data_points / source_db existed get the columns added
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(forecasts)')]
+    if 'data_points' not in columns:
+        conn.execute('ALTER TABLE forecasts ADD COLUMN data_points INTEGER')
+    if 'source_db' not in columns:
+        # Database the readings came from when forecasts are written elsewhere
+        # (forecast_cli --output-db); NULL for forecasts of this database
+        conn.execute('ALTER TABLE forecasts ADD COLUMN source_db TEXT')
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_forecasts_selection
+        ON forecasts (model, data_points, horizon_minutes, generated_at)
+    ''')
+
+
+def save_forecast(conn, forecast, model_type, horizon_minutes, generated_at=None, data_points=None,
+                  source_db=None):
+    """Write one forecast (all of its steps) into the forecasts table"""
+    generated_at = generated_at or datetime.now()
+    rows = [
+        (generated_at, model_type, data_points, horizon_minutes, source_db, step_time.to_pydatetime(),
+         float(forecast['voltage'][i]), float(forecast['voltage_lower'][i]), float(forecast['voltage_upper'][i]),
+         float(forecast['current'][i]), float(forecast['current_lower'][i]), float(forecast['current_upper'][i]),
+         float(forecast['temperature'][i]), float(forecast['temp_lower'][i]), float(forecast['temp_upper'][i]))
+        for i, step_time in enumerate(forecast['times'])
+    ]
+    conn.executemany('''
+        INSERT INTO forecasts (generated_at, model, data_points, horizon_minutes, source_db, step_time,
+                               voltage, voltage_lower, voltage_upper,
+                               current, current_lower, current_upper,
+                               temperature, temp_lower, temp_upper)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+
+
+def prune_forecasts(conn, model_type, data_points, keep_since, source_db=None):
+    """Delete forecasts for a selection generated before `keep_since`"""
+    conn.execute('''
+        DELETE FROM forecasts
+        WHERE model = ? AND data_points IS ? AND source_db IS ? AND generated_at < ?
+    ''', (model_type, data_points, source_db, keep_since))
+
+
+def load_latest_forecast(db_path, model_type, horizon_minutes, data_points=None, source_db=None):
+    """Read the newest stored forecast for a selection, in engine.forecast() shape
+
+    `source_db` picks the forecasts of one database among several written to
+    the same file (forecast_cli --output-db); None means the database's own.
+    """
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        df = pd.read_sql_query('''
+            SELECT step_time, voltage, voltage_lower, voltage_upper,
+                   current, current_lower, current_upper,
+                   temperature, temp_lower, temp_upper
+            FROM forecasts
+            WHERE model = ? AND data_points IS ? AND horizon_minutes = ? AND source_db IS ?
+              AND generated_at = (
+                  SELECT MAX(generated_at) FROM forecasts
+                  WHERE model = ? AND data_points IS ? AND horizon_minutes = ? AND source_db IS ?
+              )
+            ORDER BY step_time
+        ''', conn, params=(model_type, data_points, horizon_minutes, source_db) * 2)
+    except (sqlite3.OperationalError, pd.errors.DatabaseError):
+        # No forecasts table yet
+        return None
+    finally:
+        conn.close()
+
+    if df.empty:
+        return None
+
+    forecast = {'times': pd.DatetimeIndex(pd.to_datetime(df['step_time']))}
+    for column in df.columns.drop('step_time'):
+        forecast[column] = df[column].to_numpy()
+    return forecast
+
+
+class ForecastEngine:
+    def __init__(self, model_type="Polynomial", coverage=0.9):
+        self.model_type = model_type
+        self.coverage = coverage
+
+        # Trained models and their cached intervals, keyed by channel
+        self.models = {}
+        self.intervals = {}
+
+    def clean(self, df):
+        """Remove inactive rows and outliers"""
+        return clean_sensor_data(df)
+
+    def prepare_features(self, df):
+        """Build the time-feature matrix and per-channel targets (`df` is not modified)"""
+        # Minutes since first reading, plus cyclical time-of-day features
+        timestamps = df['timestamp']
+        minutes = (timestamps - timestamps.iloc[0]).dt.total_seconds().to_numpy() / 60
+        hour_of_day = timestamps.dt.hour.to_numpy()
+
+        X = np.column_stack([
+            minutes,
+            hour_of_day,
+            timestamps.dt.minute.to_numpy(),
+            np.sin(2 * np.pi * hour_of_day / 24),  # Cyclical hour feature
+            np.cos(2 * np.pi * hour_of_day / 24)
+        ])
+
+        return X, df['voltage'].values, df['current'].values, df['temperature'].values
+
+    def build_model(self):
+        """Create an untrained model for the configured model type"""
+        from sklearn.linear_model import Ridge
+
+        if self.model_type == "Advanced":
+            from sklearn.ensemble import RandomForestRegressor
+            # Out-of-bag predictions are kept for honest interval residuals
+            return RandomForestRegressor(n_estimators=50, random_state=42, max_depth=10, oob_score=True)
+        elif self.model_type == "Polynomial":
+            from sklearn.pipeline import Pipeline
+            from sklearn.preprocessing import PolynomialFeatures
+            return Pipeline([
+                ('poly', PolynomialFeatures(degree=3, include_bias=False)),
+                ('ridge', Ridge(alpha=0.1))
+            ])
+        else:
+            return Ridge(alpha=0.1)
+
+    def train(self, X, y_voltage, y_current, y_temp):
+        """Train one model per channel and fit its prediction intervals"""
+        targets = {'voltage': y_voltage, 'current': y_current, 'temperature': y_temp}
+
+        # sklearn's fit warnings (OOB with few samples, ill-conditioned ridge) are expected
+        # on small windows; silenced here only, not process-wide
+        with TRAINING_SECONDS.time(), warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            for channel, y in targets.items():
+                model = self.build_model()
+                model.fit(X, y)
+                self.models[channel] = model
+                self.intervals[channel] = PredictionIntervals(coverage=self.coverage).fit(model, X, y)
+
+    def forecast(self, df, predict_minutes):
+        """Predict every channel `predict_minutes` ahead of the last reading"""
+        last_time = df['timestamp'].iloc[-1]
+        start_time = df['timestamp'].iloc[0]
+
+        # Adaptive time step for smoother curves
+        if predict_minutes <= 10:
+            time_step = 1
+        elif predict_minutes <= 30:
+            time_step = 2
+        else:
+            time_step = 5
+
+        num_steps = predict_minutes // time_step
+
+        # Build all future time points and their features at once
+        offsets = np.arange(1, num_steps + 1) * time_step
+        future_times = last_time + pd.to_timedelta(offsets, unit='min')
+        hour_of_day = future_times.hour.to_numpy()
+
+        X_future = np.column_stack([
+            (future_times - start_time).total_seconds().to_numpy() / 60,
+            hour_of_day,
+            future_times.minute.to_numpy(),
+            np.sin(2 * np.pi * hour_of_day / 24),
+            np.cos(2 * np.pi * hour_of_day / 24)
+        ])
+
+        result = {'times': future_times}
+        for channel in SENSOR_CHANNELS:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                center = self.models[channel].predict(X_future)
+                lower, upper = self.intervals[channel].predict(X_future, center)
+
+            # Clamp predictions and bands to realistic ranges
+            low, high = CHANNEL_RANGES[channel]
+            prefix = INTERVAL_PREFIX[channel]
+            result[channel] = np.clip(center, low, high)
+            result[f'{prefix}_lower'] = np.clip(lower, low, high)
+            result[f'{prefix}_upper'] = np.clip(upper, low, high)
+
+        return result
+
+    def run(self, df, horizons):
+        """Clean, train once and forecast each horizon; returns {minutes: forecast}"""
+        df = self.clean(df)
+        if len(df) < 10:
+            return {}
+
+        X, y_voltage, y_current, y_temp = self.prepare_features(df)
+        self.train(X, y_voltage, y_current, y_temp)
+
+        return {minutes: self.forecast(df, minutes) for minutes in horizons}
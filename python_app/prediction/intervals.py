@@ -0,0 +1,83 @@
+"""
+Prediction Intervals - Horizon-aware uncertainty bands for the forecast models
+"""
+
+import numpy as np
+
+
+class PredictionIntervals:
+    """Interval estimator fitted once per trained model and cached alongside it"""
+
+    def __init__(self, coverage=0.9, ridge_alpha=0.1):
+        self.coverage = coverage
+        self.ridge_alpha = ridge_alpha
+        self.model = None
+        self.kind = None
+        self.gram_inv = None
+        self.lower_q = 0.0
+        self.upper_q = 0.0
+        self.last_minutes = 0.0
+        self.span = 1.0
+
+    @property
+    def tail(self):
+        """Probability mass left outside the band on each side"""
+        return (1.0 - self.coverage) / 2
+
+    def fit(self, model, X, y):
+        """Compute residual quantiles (and the ridge Gram inverse) for a fitted model"""
+        self.model = model
+        # Column 0 of the feature matrix is minutes since the first reading
+        self.last_minutes = float(X[:, 0].max())
+        self.span = max(float(X[:, 0].max() - X[:, 0].min()), 1.0)
+
+        if hasattr(model, 'estimators_'):
+            self.kind = 'forest'
+            # Out-of-bag predictions give honest residuals; in-sample ones are near zero
+            fitted = getattr(model, 'oob_prediction_', None)
+            residuals = y - fitted if fitted is not None else y - model.predict(X)
+            residuals = residuals[np.isfinite(residuals)]
+            if len(residuals) == 0:
+                residuals = y - model.predict(X)
+        else:
+            self.kind = 'linear'
+            design = self._design(X)
+            penalty = self.ridge_alpha * np.eye(design.shape[1])
+            penalty[0, 0] = 0.0  # Intercept is not regularized
+            self.gram_inv = np.linalg.pinv(design.T @ design + penalty)
+
+            # Standardize in-sample residuals by their leverage
+            leverage = np.einsum('ij,jk,ik->i', design, self.gram_inv, design)
+            residuals = (y - model.predict(X)) / np.sqrt(np.clip(1 - leverage, 0.05, None))
+
+        self.lower_q, self.upper_q = np.quantile(residuals, [self.tail, 1 - self.tail])
+        return self
+
+    def _design(self, X):
+        """Design matrix the final linear estimator actually sees, with intercept"""
+        features = self.model[:-1].transform(X) if hasattr(self.model, 'steps') else X
+        return np.column_stack([np.ones(len(features)), features])
+
+    def predict(self, X_future, center):
+        """Return (lower, upper) bands around `center` that widen with the horizon"""
+        if self.kind == 'forest':
+            # Per-tree spread captures model uncertainty at each future point
+            tree_preds = np.stack([tree.predict(X_future) for tree in self.model.estimators_])
+            tree_lo, tree_hi = np.quantile(tree_preds, [self.tail, 1 - self.tail], axis=0)
+
+            # Trees extrapolate flat, so grow the noise term with distance past the data
+            ahead = np.clip(X_future[:, 0] - self.last_minutes, 0, None)
+            growth = np.sqrt(1 + ahead / self.span)
+
+            lower = center - np.hypot(center - tree_lo, self.lower_q * growth)
+            upper = center + np.hypot(tree_hi - center, self.upper_q * growth)
+        else:
+            # Classic regression prediction interval: noise * sqrt(1 + leverage)
+            design = self._design(X_future)
+            leverage = np.einsum('ij,jk,ik->i', design, self.gram_inv, design)
+            scale = np.sqrt(1 + np.clip(leverage, 0, None))
+
+            lower = center + self.lower_q * scale
+            upper = center + self.upper_q * scale
+
+        return lower, upper
@@ -0,0 +1,134 @@
+"""
+Forecast Scheduler - Precomputes forecasts in the background at a fixed cadence
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from prediction.engine import (ForecastEngine, load_readings, load_latest_forecast,
+                               init_forecast_table, save_forecast, prune_forecasts)
+from utils.logger import get_logger
+
+logger = get_logger('scheduler')
+
+# Horizons (minutes) that are always precomputed
+STANDARD_HORIZONS = (10, 30, 60)
+
+
+class ForecastScheduler:
+    def __init__(self, db_path, interval=60, horizons=STANDARD_HORIZONS):
+        self.db_path = db_path
+        self.interval = interval
+        self.horizons = set(horizons)
+
+        # (model_type, data_points) selections to keep fresh, and their latest results
+        self.selections = set()
+        self.latest = {}
+        self.lock = threading.Lock()
+
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.is_running = False
+        self.thread = None
+
+    def start(self):
+        """Start the background scheduler thread"""
+        if self.is_running:
+            return
+        self.is_running = True
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run_loop, name='forecast-scheduler', daemon=True)
+        self.thread.start()
+        logger.info("🗓️ Forecast scheduler started (every %ss, horizons %s)", self.interval, sorted(self.horizons))
+
+    def stop(self, timeout=5):
+        """Stop the scheduler thread (after the selection being trained, if any)"""
+        self.is_running = False
+        self.stop_event.set()
+        self.wake_event.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=timeout)
+            self.thread = None
+
+    def run_now(self):
+        """Recompute every selection without waiting for the next tick"""
+        self.wake_event.set()
+
+    def request(self, model_type, data_points, horizons=()):
+        """Keep a selection precomputed; runs immediately if it is new"""
+        key = (model_type, data_points)
+        with self.lock:
+            is_new = key not in self.selections or not self.horizons.issuperset(horizons)
+            self.selections.add(key)
+            self.horizons.update(horizons)
+        if is_new:
+            self.wake_event.set()
+
+    def get_forecast(self, model_type, data_points, horizon_minutes):
+        """Return the newest forecast for a selection, or None if not computed yet"""
+        with self.lock:
+            cached = self.latest.get((model_type, data_points))
+        if cached and horizon_minutes in cached['forecasts']:
+            return cached['forecasts'][horizon_minutes]
+
+        # Fall back to forecasts written by another process (e.g. forecast_cli)
+        try:
+            return load_latest_forecast(self.db_path, model_type, horizon_minutes, data_points)
+        except sqlite3.Error:
+            return None
+
+    def get_generated_at(self, model_type, data_points):
+        """Timestamp of the newest in-memory forecast for a selection"""
+        with self.lock:
+            cached = self.latest.get((model_type, data_points))
+        return cached['generated_at'] if cached else None
+
+    def run_loop(self):
+        """Recompute every selection at a fixed cadence, or sooner when woken"""
+        while self.is_running:
+            self.wake_event.clear()
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error("Error in forecast scheduler: %s", e)
+            self.wake_event.wait(self.interval)
+
+    def run_once(self):
+        """Train and forecast every requested selection, storing the results"""
+        with self.lock:
+            selections = list(self.selections)
+            horizons = sorted(self.horizons)
+
+        for model_type, data_points in selections:
+            if self.stop_event.is_set():
+                break  # Stopping: do not start another selection
+            start = time.perf_counter()
+            df = load_readings(self.db_path, data_points)
+            forecasts = ForecastEngine(model_type).run(df, horizons)
+            if not forecasts:
+                continue
+
+            generated_at = datetime.now()
+            with self.lock:
+                self.latest[(model_type, data_points)] = {
+                    'generated_at': generated_at,
+                    'forecasts': forecasts
+                }
+
+            conn = sqlite3.connect(self.db_path)
+            try:
+                init_forecast_table(conn)
+                for minutes, forecast in forecasts.items():
+                    save_forecast(conn, forecast, model_type, minutes, generated_at, data_points)
+                # Only the newest run per selection is kept
+                prune_forecasts(conn, model_type, data_points, generated_at)
+                conn.commit()
+            finally:
+                conn.close()
+
+            logger.info("🔮 Precomputed %s forecasts (%s points, horizons %s) in %.2fs",
+                        model_type, data_points, horizons, time.perf_counter() - start)
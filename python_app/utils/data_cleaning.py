@@ -0,0 +1,80 @@
+"""
+Data Cleaning - Vectorized outlier filtering for sensor readings
+"""
+
+import collections
+import numpy as np
+
+# Sensor channels that every reading carries
+SENSOR_CHANNELS = ('voltage', 'current', 'temperature')
+
+
+def clean_sensor_data(df, channels=SENSOR_CHANNELS, iqr_factor=1.5):
+    """Drop inactive rows and IQR outliers in a single pass over all channels"""
+    if df.empty:
+        return df
+
+    values = df[list(channels)].to_numpy(dtype=float)
+
+    # Rows with all zeros are inactive periods
+    active = (values != 0).any(axis=1)
+    if not active.any():
+        return df.iloc[0:0]
+
+    # One quantile call for every channel instead of one per column
+    q1, q3 = np.nanquantile(values[active], [0.25, 0.75], axis=0)
+    iqr = q3 - q1
+    lower_bound = q1 - iqr_factor * iqr
+    upper_bound = q3 + iqr_factor * iqr
+
+    in_range = ((values >= lower_bound) & (values <= upper_bound)).all(axis=1)
+
+    # Single boolean-index copy of the frame
+    return df[active & in_range]
+
+
+# Smallest step each channel reports (the Arduino sends 2/2/1 decimals); a
+# window that has not moved is no tighter than this
+CHANNEL_RESOLUTION = {'voltage': 0.01, 'current': 0.01, 'temperature': 0.1}
+
+
+class RollingMADFilter:
+    """Streaming median/MAD (Hampel) outlier filter for use on the ingest path"""
+
+    def __init__(self, window=25, threshold=3.5, channels=SENSOR_CHANNELS, min_samples=5, min_mad=None):
+        self.window = window
+        self.threshold = threshold
+        self.channels = tuple(channels)
+        self.min_samples = min_samples
+        if min_mad is None:
+            min_mad = [CHANNEL_RESOLUTION.get(channel, 0.0) for channel in self.channels]
+        self.min_mad = np.asarray(min_mad, dtype=float)
+        self.history = collections.deque(maxlen=window)
+
+    def is_outlier(self, sample):
+        """Check a reading against the recent window without adding it"""
+        if len(self.history) < self.min_samples:
+            return False
+
+        values = np.array([sample[channel] for channel in self.channels], dtype=float)
+        window = np.array(self.history)
+        median = np.median(window, axis=0)
+        mad = np.median(np.abs(window - median), axis=0) * 1.4826
+        deviation = np.abs(values - median)
+
+        # The floor keeps a flat window from rejecting the smallest real change
+        return bool(np.any(deviation > self.threshold * np.maximum(mad, self.min_mad)))
+
+    def accept(self, sample):
+        """Return True if the reading is kept
+
+        Rejected readings join the window too: the median ignores a lone spike,
+        and after a real step change the window follows the new level.
+        """
+        outlier = self.is_outlier(sample)
+        self.history.append([float(sample[channel]) for channel in self.channels])
+        return not outlier
+
+    def reset(self):
+        """Forget the current window (e.g. after a reconnect)"""
+        self.history.clear()
@@ -0,0 +1,196 @@
+"""
+Logger - Structured, rate-limited logging through a background queue
+
+Records are filtered and queued on the calling thread, then written by a
+QueueListener thread to a rotating JSON-lines file (IoT_Data/logs/iot_monitor.log)
+and, when there is a console, to stdout. Collection threads never wait on disk
+or terminal I/O.
+
+Environment:
+    IOT_MONITOR_LOG_LEVEL=DEBUG   # default INFO; DEBUG also logs every reading
+"""
+
+import collections
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+
+LOGGER_NAME = 'iot_monitor'
+
+# Rotating file limits
+MAX_LOG_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 5
+
+
+def get_logger(name):
+    """Logger under the application namespace (e.g. get_logger('data'))"""
+    return logging.getLogger(f'{LOGGER_NAME}.{name}')
+
+
+class RateLimitFilter(logging.Filter):
+    """Let each message template through at most once per interval"""
+
+    def __init__(self, interval=10.0):
+        super().__init__()
+        self.interval = interval
+        self.last_emitted = {}
+        self.suppressed = collections.Counter()
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        # Periodic summaries are already rate-limited by construction
+        if getattr(record, 'no_rate_limit', False):
+            return True
+
+        # Keyed by the unformatted template, so "Invalid JSON: %s" is one message
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self.lock:
+            last = self.last_emitted.get(key)
+            if last is not None and now - last < self.interval:
+                self.suppressed[key] += 1
+                return False
+            self.last_emitted[key] = now
+            suppressed = self.suppressed.pop(key, 0)
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any `extra={'fields': {...}}` merged in"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Plain message like the old prints, noting repeats that were suppressed"""
+
+    def format(self, record):
+        message = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            message += f" ({suppressed} similar suppressed)"
+        return message
+
+
+class ActivitySummary:
+    """Counts events and logs one aggregated line per interval"""
+
+    def __init__(self, logger, interval=60.0, rate_name='samples'):
+        self.logger = logger
+        self.interval = interval
+        self.rate_name = rate_name
+        self.counts = collections.Counter()
+        self.details = collections.defaultdict(collections.Counter)
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def count(self, name, detail=None, amount=1):
+        """Count an event, e.g. count('samples', 'real') or count('parse errors')"""
+        now = time.monotonic()
+        with self.lock:
+            self.counts[name] += amount
+            if detail:
+                self.details[name][detail] += amount
+            due = now - self.started >= self.interval
+        if due:
+            self.flush(now)
+
+    def flush(self, now=None):
+        """Log the counts gathered since the last summary and start over"""
+        now = now or time.monotonic()
+        with self.lock:
+            counts, details = self.counts, self.details
+            elapsed = now - self.started
+            self.counts = collections.Counter()
+            self.details = collections.defaultdict(collections.Counter)
+            self.started = now
+        if not counts or elapsed <= 0:
+            return
+
+        parts = []
+        for name, total in counts.items():
+            if name == self.rate_name:
+                part = f"{total * 60 / elapsed:.0f} {name}/min"
+            else:
+                part = f"{total} {name}"
+            if details.get(name):
+                part += f" ({', '.join(f'{key} {value}' for key, value in details[name].items())})"
+            parts.append(part)
+
+        self.logger.info("📊 Last %.0fs: %s", elapsed, ', '.join(parts),
+                         extra={'fields': {'summary': dict(counts), 'interval_seconds': round(elapsed, 1)},
+                                'no_rate_limit': True})
+
+
+class LogManager:
+    def __init__(self):
+        self.listener = None
+        self.log_path = None
+
+    def setup(self, log_dir, level=None, console=None, rate_limit_interval=10.0):
+        """Route application logs through a queue to a rotating file (and the console)"""
+        if self.listener:
+            return self.log_path
+
+        # Handlers pull in socket/pickle; only pay for them when logging is set up
+        import logging.handlers
+
+        level = level or os.environ.get('IOT_MONITOR_LOG_LEVEL', 'INFO')
+        os.makedirs(log_dir, exist_ok=True)
+        self.log_path = os.path.join(log_dir, 'iot_monitor.log')
+
+        file_handler = logging.handlers.RotatingFileHandler(
+            self.log_path, maxBytes=MAX_LOG_BYTES, backupCount=BACKUP_COUNT, encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())
+        handlers = [file_handler]
+
+        # Windowed (PyInstaller) builds have no stdout to write to
+        if console is None:
+            console = sys.stdout is not None
+        if console:
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setFormatter(ConsoleFormatter('%(message)s'))
+            handlers.append(console_handler)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter(rate_limit_interval))
+
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.setLevel(level)
+        logger.addHandler(queue_handler)
+        logger.propagate = False
+
+        self.listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        return self.log_path
+
+    def shutdown(self):
+        """Flush queued records and stop the writer thread"""
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
+
+
+# Global log manager instance
+log_manager = LogManager()
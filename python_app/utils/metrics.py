@@ -0,0 +1,264 @@
+"""
+Metrics - Lightweight counters, gauges and histograms for the hot paths
+
+Disabled by default: every update is a single flag check, and timers hand back
+a shared no-op context manager. Enable with IOT_MONITOR_METRICS=1 (or
+metrics.enable()) and export with:
+
+    IOT_MONITOR_METRICS_FILE=metrics.prom   # rewritten every few seconds (.json for JSON)
+    IOT_MONITOR_METRICS_PORT=9108           # Prometheus text on http://127.0.0.1:9108/metrics
+"""
+
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+
+from utils.logger import get_logger
+
+logger = get_logger('metrics')
+
+# Default histogram buckets (seconds): 100us .. 10s
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Shared do-nothing timer handed out while metrics are disabled
+NULL_TIMER = contextlib.nullcontext()
+
+
+class Counter:
+    """Monotonically increasing count"""
+    kind = 'counter'
+
+    def __init__(self, registry, name, help_text):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.value = 0
+
+    def inc(self, amount=1):
+        if self.registry.enabled:
+            self.value += amount
+
+    def samples(self):
+        return [(self.name, self.value)]
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge:
+    """Value that can go up and down (queue depth, buffer size)"""
+    kind = 'gauge'
+
+    def __init__(self, registry, name, help_text):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.value = 0
+
+    def set(self, value):
+        if self.registry.enabled:
+            self.value = value
+
+    def inc(self, amount=1):
+        if self.registry.enabled:
+            self.value += amount
+
+    def dec(self, amount=1):
+        if self.registry.enabled:
+            self.value -= amount
+
+    def samples(self):
+        return [(self.name, self.value)]
+
+    def snapshot(self):
+        return self.value
+
+
+class Timer:
+    """Context manager that observes its elapsed time into a histogram"""
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Histogram:
+    """Distribution of observed values in cumulative buckets"""
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        if not self.registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """`with histogram.time(): ...` observes the block's duration"""
+        return Timer(self) if self.registry.enabled else NULL_TIMER
+
+    def samples(self):
+        with self.lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        samples = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            samples.append((f'{self.name}_bucket{{le="{bound:g}"}}', cumulative))
+        samples.append((f'{self.name}_bucket{{le="+Inf"}}', count))
+        samples.append((f'{self.name}_sum', total))
+        samples.append((f'{self.name}_count', count))
+        return samples
+
+    def snapshot(self):
+        with self.lock:
+            return {'count': self.count, 'sum': self.sum,
+                    'mean': self.sum / self.count if self.count else None,
+                    'buckets': dict(zip([f'{b:g}' for b in self.buckets] + ['+Inf'], self.counts))}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.enabled = bool(os.environ.get('IOT_MONITOR_METRICS'))
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.export_thread = None
+        self.server = None
+
+    def enable(self, enabled=True):
+        """Turn recording on or off at runtime"""
+        self.enabled = enabled
+
+    def register(self, metric_class, name, help_text, **kwargs):
+        """Get or create a metric; metrics are module-level singletons at their use sites"""
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = metric_class(self, name, help_text, **kwargs)
+                self.metrics[name] = metric
+            return metric
+
+    def counter(self, name, help_text):
+        return self.register(Counter, name, help_text)
+
+    def gauge(self, name, help_text):
+        return self.register(Gauge, name, help_text)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram, name, help_text, buckets=buckets)
+
+    def to_prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in sorted(self.metrics.values(), key=lambda m: m.name):
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(f'{name} {value}' for name, value in metric.samples())
+        return '\n'.join(lines) + '\n'
+
+    def as_dict(self):
+        """All metrics as {name: value or histogram summary}"""
+        return {name: metric.snapshot() for name, metric in sorted(self.metrics.items())}
+
+    def write_file(self, path):
+        """Write metrics atomically: JSON for *.json, Prometheus text otherwise"""
+        if path.endswith('.json'):
+            content = json.dumps({'time': time.time(), 'metrics': self.as_dict()}, indent=2)
+        else:
+            content = self.to_prometheus()
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def start_file_export(self, path, interval=5.0):
+        """Rewrite `path` every `interval` seconds from a daemon thread"""
+        def export_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_file(path)
+                except OSError as e:
+                    logger.error("Metrics export error: %s", e)
+
+        self.export_thread = threading.Thread(target=export_loop, daemon=True)
+        self.export_thread.start()
+        logger.info("📈 Metrics written to %s every %gs", path, interval)
+
+    def start_http_server(self, port, host='127.0.0.1'):
+        """Serve Prometheus text on http://host:port/metrics"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes are not worth a console line each
+
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        logger.info("📈 Metrics endpoint: http://%s:%s/metrics", host, port)
+
+    def start_from_env(self):
+        """Start the exporters requested through environment variables"""
+        if not self.enabled:
+            return
+        path = os.environ.get('IOT_MONITOR_METRICS_FILE')
+        if path:
+            self.start_file_export(path)
+        port = os.environ.get('IOT_MONITOR_METRICS_PORT')
+        if port:
+            try:
+                self.start_http_server(int(port))
+            except (OSError, ValueError) as e:
+                logger.warning("Could not start metrics endpoint on port %s: %s", port, e)
+
+    def stop(self):
+        """Shut down the HTTP endpoint and write a final file snapshot"""
+        if self.server:
+            self.server.shutdown()
+            self.server = None
+        path = os.environ.get('IOT_MONITOR_METRICS_FILE')
+        if self.enabled and path:
+            try:
+                self.write_file(path)
+            except OSError as e:
+                logger.error("Metrics export error: %s", e)
+
+
+# Global metrics registry instance
+metrics = MetricsRegistry()
@@ -0,0 +1,148 @@
+"""
+Profiler - Low-overhead sampling profiler for every thread in the app
+
+Samples the stacks of all threads (Tk main loop, data collection, forecast
+scheduler, ...) from a background thread and writes them on exit in the
+collapsed-stack format used by flamegraph.pl, speedscope and inferno:
+
+    MainThread;mainloop (tkinter/__init__.py:1);update_chart (live_data.py:135) 42
+
+A short summary attributing samples to the dashboard's hot functions is printed
+and saved next to it. Enable with `--profile [path]` on the command line or
+IOT_MONITOR_PROFILE=1 (or a path) in the environment.
+"""
+
+import atexit
+import collections
+import json
+import os
+import sys
+import threading
+import time
+
+# Functions whose inclusive time is reported in the summary
+HOT_FUNCTIONS = (
+    'LiveDataPage.update_chart',
+    'PastDataPage.refresh_data',
+    'PredictionsPage.generate_predictions',
+    'ForecastScheduler.run_once',
+    'DataManager.process_data',
+    'DataManager.store_data',
+    'DataManager.store_csv_data',
+    'DataManager.parse_line'
+)
+
+
+def requested_profile_path(argv, default_dir):
+    """Output path if profiling was asked for with --profile [path] or IOT_MONITOR_PROFILE"""
+    default_path = os.path.join(default_dir, f"profile_{time.strftime('%Y%m%d_%H%M%S')}.folded")
+
+    if '--profile' in argv:
+        index = argv.index('--profile')
+        if index + 1 < len(argv) and not argv[index + 1].startswith('-'):
+            return argv[index + 1]
+        return default_path
+
+    value = os.environ.get('IOT_MONITOR_PROFILE')
+    if not value or value == '0':
+        return None
+    return default_path if value.lower() in ('1', 'true', 'yes') else value
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self.output_path = None
+        self.is_running = False
+        self.thread = None
+        self.started_at = None
+
+    def start(self, output_path, interval=None):
+        """Start sampling; the profile is written to `output_path` at exit"""
+        if self.is_running:
+            return
+        self.output_path = output_path
+        self.interval = interval or self.interval
+        self.is_running = True
+        self.started_at = time.perf_counter()
+        self.thread = threading.Thread(target=self.sample_loop, name='profiler', daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+        print(f"🔬 Profiling all threads every {self.interval * 1000:g}ms -> {output_path}")
+
+    def sample_loop(self):
+        own_ident = threading.get_ident()
+        while self.is_running:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own_ident:
+                    self.stacks[self.collapse(names.get(ident, f'thread-{ident}'), frame)] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+    def collapse(self, thread_name, frame):
+        """One stack as 'thread;outer;...;inner' (flamegraph folded format)"""
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            name = getattr(code, 'co_qualname', code.co_name)  # co_qualname is 3.11+
+            labels.append(f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        labels.append(thread_name)
+        return ';'.join(label.replace(';', ':') for label in reversed(labels))
+
+    def hot_function_summary(self, duration):
+        """Inclusive samples and estimated seconds for each HOT_FUNCTIONS entry"""
+        totals = collections.Counter()
+        for stack, count in self.stacks.items():
+            # Count a function once per stack even if it recurses
+            names = {frame.split(' (')[0] for frame in stack.split(';')[1:]}
+            for name in HOT_FUNCTIONS:
+                if name in names or name.split('.')[-1] in names:
+                    totals[name] += count
+
+        # Each sampling round stands for duration / samples seconds of wall time
+        seconds_per_sample = duration / self.samples if self.samples else 0.0
+        return {
+            name: {
+                'samples': totals[name],
+                'seconds': round(totals[name] * seconds_per_sample, 3),
+                'percent_of_wall': round(100 * totals[name] / self.samples, 1) if self.samples else 0.0
+            }
+            for name in HOT_FUNCTIONS
+        }
+
+    def stop(self):
+        """Stop sampling and write the folded stacks plus a JSON summary"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        self.thread.join(timeout=1)
+
+        directory = os.path.dirname(self.output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.output_path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        duration = time.perf_counter() - self.started_at
+        summary = {
+            'duration_seconds': round(duration, 3),
+            'interval_seconds': self.interval,
+            'samples': self.samples,
+            'hot_functions': self.hot_function_summary(duration)
+        }
+        with open(f"{os.path.splitext(self.output_path)[0]}.summary.json", 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        print(f"🔬 Profile written to {self.output_path} ({self.samples} samples)")
+        for name, stats in summary['hot_functions'].items():
+            if stats['samples']:
+                print(f"   {stats['seconds']:8.2f}s ({stats['percent_of_wall']:5.1f}% of wall)  {name}")
+
+
+# Global profiler instance
+profiler = SamplingProfiler()
@@ -0,0 +1,48 @@
+"""
+Startup Timer - Records how long each startup stage takes
+"""
+
+import json
+import os
+import time
+
+
+class StartupTimer:
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.marks = []
+        self.reported = False
+
+    def mark(self, label):
+        """Record a startup milestone (seconds since the timer was created)"""
+        elapsed = time.perf_counter() - self.start_time
+        self.marks.append((label, elapsed))
+        return elapsed
+
+    def has_mark(self, label):
+        """Check whether a milestone has already been recorded"""
+        return any(name == label for name, _ in self.marks)
+
+    def as_dict(self):
+        """Milestones as {label: seconds}"""
+        return {label: round(elapsed, 4) for label, elapsed in self.marks}
+
+    def report(self):
+        """Print the startup timing report once"""
+        if self.reported:
+            return
+        self.reported = True
+
+        print("⏱️ Startup timing:")
+        for label, elapsed in self.marks:
+            print(f"   {elapsed:7.3f}s  {label}")
+
+        # Machine-readable copy for the startup benchmark
+        report_path = os.environ.get('IOT_MONITOR_STARTUP_REPORT')
+        if report_path:
+            with open(report_path, 'w') as f:
+                json.dump(self.as_dict(), f, indent=2)
+
+
+# Global startup timer instance (created when the app module is first imported)
+startup_timer = StartupTimer()
@@ -4,8 +4,6 @@ Theme Manager for Dark/Light Mode Toggle
 
 import tkinter as tk
 from tkinter import ttk
-import matplotlib.pyplot as plt
-from matplotlib import style
 
 class ThemeManager:
     def __init__(self):
@@ -76,6 +74,9 @@ class ThemeManager:
     
     def apply_theme(self):
         """Apply current theme to matplotlib with proper figure updates"""
+        # Imported here so the window can appear before matplotlib loads
+        import matplotlib.pyplot as plt
+        
         if self.is_dark_mode:
             plt.style.use('dark_background')
             # Set matplotlib rcParams for dark theme